@@ -0,0 +1,31 @@
+"""add_content_encoding
+
+Revision ID: add_content_encoding
+Revises: add_storage_blobs
+Create Date: 2026-10-19
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+
+revision = "add_content_encoding"
+down_revision = "add_storage_blobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "documents", sa.Column("content_encoding", sa.String(), nullable=True)
+    )
+    op.add_column(
+        "storage_blobs",
+        sa.Column("content_encoding", sa.String(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("storage_blobs", "content_encoding")
+    op.drop_column("documents", "content_encoding")
@@ -0,0 +1,50 @@
+"""add_document_listing_indexes
+
+Revision ID: add_document_listing_indexes
+Revises: add_jobs
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op  # type: ignore
+
+revision = "add_document_listing_indexes"
+down_revision = "add_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_documents_project_uploaded_at",
+        "documents",
+        ["project_id", "uploaded_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_documents_project_size",
+        "documents",
+        ["project_id", "size"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_documents_project_content_type",
+        "documents",
+        ["project_id", "content_type"],
+        unique=False,
+        postgresql_ops={"content_type": "text_pattern_ops"},
+    )
+    op.create_index(
+        "ix_documents_project_filename",
+        "documents",
+        ["project_id", "filename"],
+        unique=False,
+        postgresql_ops={"filename": "text_pattern_ops"},
+    )
+
+
+def downgrade():
+    op.drop_index("ix_documents_project_filename", table_name="documents")
+    op.drop_index("ix_documents_project_content_type", table_name="documents")
+    op.drop_index("ix_documents_project_size", table_name="documents")
+    op.drop_index("ix_documents_project_uploaded_at", table_name="documents")
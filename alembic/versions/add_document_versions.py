@@ -0,0 +1,56 @@
+"""add_document_versions
+
+Revision ID: add_document_versions
+Revises: add_content_encoding
+Create Date: 2026-10-19
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+
+revision = "add_document_versions"
+down_revision = "add_content_encoding"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "documents",
+        sa.Column(
+            "version", sa.Integer(), nullable=False, server_default="1"
+        ),
+    )
+    op.create_table(
+        "storage_deletions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("s3_key", sa.String(), nullable=False),
+        sa.Column("enqueued_at", sa.DateTime(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_storage_deletions_id"),
+        "storage_deletions",
+        ["id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_storage_deletions_due",
+        "storage_deletions",
+        ["attempts", "next_attempt_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_storage_deletions_due", table_name="storage_deletions")
+    op.drop_index(
+        op.f("ix_storage_deletions_id"), table_name="storage_deletions"
+    )
+    op.drop_table("storage_deletions")
+    op.drop_column("documents", "version")
@@ -0,0 +1,51 @@
+"""add_email_outbox
+
+Revision ID: add_email_outbox
+Revises: add_upload_sessions
+Create Date: 2026-10-19
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+
+revision = "add_email_outbox"
+down_revision = "add_upload_sessions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("recipient", sa.String(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("send_after", sa.DateTime(), nullable=False),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_email_outbox_id"), "email_outbox", ["id"], unique=False
+    )
+    op.create_index(
+        "ix_email_outbox_claim",
+        "email_outbox",
+        ["status", "send_after"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_email_outbox_claim", table_name="email_outbox")
+    op.drop_index(op.f("ix_email_outbox_id"), table_name="email_outbox")
+    op.drop_table("email_outbox")
@@ -0,0 +1,64 @@
+"""add_search_index
+
+Revision ID: add_search_index
+Revises: add_document_listing_indexes
+Create Date: 2026-10-19
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+
+revision = "add_search_index"
+down_revision = "add_document_listing_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "search_documents",
+        sa.Column("document_id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("s3_key", sa.String(), nullable=False),
+        sa.Column("term_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["document_id"], ["documents.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("document_id"),
+    )
+    op.create_index(
+        op.f("ix_search_documents_project_id"),
+        "search_documents",
+        ["project_id"],
+        unique=False,
+    )
+    op.create_table(
+        "search_postings",
+        sa.Column("document_id", sa.Integer(), nullable=False),
+        sa.Column("term", sa.String(length=64), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("frequency", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["document_id"], ["documents.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("document_id", "term"),
+    )
+    op.create_index(
+        "ix_search_postings_project_term",
+        "search_postings",
+        ["project_id", "term"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_search_postings_project_term", table_name="search_postings"
+    )
+    op.drop_table("search_postings")
+    op.drop_index(
+        op.f("ix_search_documents_project_id"), table_name="search_documents"
+    )
+    op.drop_table("search_documents")
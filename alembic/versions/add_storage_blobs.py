@@ -0,0 +1,70 @@
+"""add_storage_blobs
+
+Revision ID: add_storage_blobs
+Revises: fix_foreign_keys
+Create Date: 2026-10-19
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+
+revision = "add_storage_blobs"
+down_revision = "fix_foreign_keys"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "storage_blobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("s3_key", sa.String(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("s3_key"),
+    )
+    op.create_index(
+        op.f("ix_storage_blobs_id"), "storage_blobs", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_storage_blobs_sha256"),
+        "storage_blobs",
+        ["sha256"],
+        unique=True,
+    )
+    op.add_column(
+        "documents",
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_documents_content_hash"),
+        "documents",
+        ["content_hash"],
+        unique=False,
+    )
+    # Deduplicated documents share a key, so s3_key is no longer unique
+    op.execute(
+        "ALTER TABLE documents DROP CONSTRAINT IF EXISTS documents_s3_key_key"
+    )
+    op.create_index(
+        op.f("ix_documents_s3_key"), "documents", ["s3_key"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_documents_s3_key"), table_name="documents")
+    op.create_unique_constraint(
+        "documents_s3_key_key", "documents", ["s3_key"]
+    )
+    op.drop_index(op.f("ix_documents_content_hash"), table_name="documents")
+    op.drop_column("documents", "content_hash")
+    op.drop_index(
+        op.f("ix_storage_blobs_sha256"), table_name="storage_blobs"
+    )
+    op.drop_index(op.f("ix_storage_blobs_id"), table_name="storage_blobs")
+    op.drop_table("storage_blobs")
@@ -0,0 +1,64 @@
+"""add_upload_sessions
+
+Revision ID: add_upload_sessions
+Revises: add_search_index
+Create Date: 2026-10-19
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore
+
+revision = "add_upload_sessions"
+down_revision = "add_search_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "upload_sessions",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("content_type", sa.String(), nullable=True),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("offset", sa.BigInteger(), nullable=False),
+        sa.Column("part_size", sa.Integer(), nullable=False),
+        sa.Column("s3_key", sa.String(), nullable=False),
+        sa.Column("s3_upload_id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["project_id"], ["projects.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_upload_sessions_expires_at"),
+        "upload_sessions",
+        ["expires_at"],
+        unique=False,
+    )
+    op.create_table(
+        "upload_parts",
+        sa.Column("session_id", sa.String(length=32), nullable=False),
+        sa.Column("part_number", sa.Integer(), nullable=False),
+        sa.Column("etag", sa.String(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["session_id"], ["upload_sessions.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("session_id", "part_number"),
+    )
+
+
+def downgrade():
+    op.drop_table("upload_parts")
+    op.drop_index(
+        op.f("ix_upload_sessions_expires_at"), table_name="upload_sessions"
+    )
+    op.drop_table("upload_sessions")
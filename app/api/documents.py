@@ -1,29 +1,90 @@
 import io
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 from fastapi import (
     APIRouter,
     Depends,
     File,
     HTTPException,
+    Query,
+    Request,
     UploadFile,
     status,
 )
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from PIL import UnidentifiedImageError
+from sqlalchemy import and_, delete
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, require_project_role
 from app.core.database import get_db
+from app.domain.storage import S3ServiceInterface
 from app.models.document import Document
+from app.models.project_access import ProjectAccess
 from app.models.user import User
-from app.schemas.document import DocumentResponse
+from app.schemas.document import (
+    DocumentBatchDelete,
+    DocumentBatchDeleteResponse,
+    DocumentResponse,
+    DocumentSearchHit,
+    DocumentSearchResponse,
+    DocumentSort,
+)
+from app.services.document_jobs import (
+    schedule_document_jobs,
+    schedule_storage_gc,
+)
+from app.services.document_store import (
+    release_content,
+    release_contents,
+    replace_content,
+    store_content,
+)
+from app.services.download_cache import get_download_cache, iter_file
+from app.services.image_pipeline import ImageTooLarge
+from app.services.local_storage import LocalStorageService
+from app.services.previews import (
+    PREVIEW_FORMATS,
+    get_preview_service,
+    snap_size,
+)
+from app.services.project_report_service import adjust_usage, get_usage
+from app.services.renditions import (
+    accepted_types,
+    choose_rendition,
+    load_manifest,
+)
 from app.services.s3_service_refactored import S3Service
+from app.services.search_service import remove_from_index, search_documents
+from app.services.storage_codec import accepts_encoding, decode
+from app.services.storage_gc import enqueue_deletion
+from app.services.zip_export import ArchiveEntry, stream_zip, unique_names
 
+_s3_service: Optional[S3ServiceInterface] = None
 
-def get_s3_service():
+
+def _build_storage_service() -> S3ServiceInterface:
+    from app.core.config import settings
+
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorageService(
+            settings.LOCAL_STORAGE_ROOT, fsync=settings.LOCAL_STORAGE_FSYNC
+        )
+    if settings.STORAGE_BACKEND != "s3":
+        raise ValueError(
+            f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND!r}"
+        )
     return S3Service()
 
 
+def get_s3_service() -> S3ServiceInterface:
+    global _s3_service
+    if _s3_service is None:
+        _s3_service = _build_storage_service()
+    return _s3_service
+
+
 # Error message constants
 DOCUMENT_NOT_FOUND = "Document not found"
 
@@ -36,16 +97,124 @@ router = APIRouter()
 )
 def get_project_documents(
     project_id: int,
+    content_type: Optional[str] = Query(
+        None, description="Content type prefix, e.g. 'image/'"
+    ),
+    filename_prefix: Optional[str] = None,
+    min_size: Optional[int] = Query(None, ge=0),
+    max_size: Optional[int] = Query(None, ge=0),
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    sort: Optional[DocumentSort] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10_000),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     require_project_role(project_id, db, current_user)
-    documents = (
-        db.query(Document).filter(Document.project_id == project_id).all()
-    )
+    query = db.query(Document).filter(Document.project_id == project_id)
+    if content_type:
+        query = query.filter(
+            Document.content_type.startswith(content_type, autoescape=True)
+        )
+    if filename_prefix:
+        query = query.filter(
+            Document.filename.startswith(filename_prefix, autoescape=True)
+        )
+    if min_size is not None:
+        query = query.filter(Document.size >= min_size)
+    if max_size is not None:
+        query = query.filter(Document.size <= max_size)
+    if uploaded_after is not None:
+        query = query.filter(Document.uploaded_at >= uploaded_after)
+    if uploaded_before is not None:
+        query = query.filter(Document.uploaded_at < uploaded_before)
+    if sort is not None:
+        column = getattr(Document, sort.value.lstrip("-"))
+        query = query.order_by(
+            column.desc() if sort.value.startswith("-") else column.asc()
+        )
+    documents = query.order_by(Document.id).offset(offset).limit(limit).all()
     return documents
 
 
+@router.get(
+    "/project/{project_id}/documents/search",
+    response_model=DocumentSearchResponse,
+)
+def search_project_documents(
+    project_id: int,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Rank the project's indexed documents against a free-text query."""
+    require_project_role(project_id, db, current_user)
+    total, hits = search_documents(db, project_id, q, limit, offset)
+    return DocumentSearchResponse(
+        total=total,
+        results=[
+            DocumentSearchHit(
+                document=DocumentResponse.model_validate(document),
+                score=score,
+            )
+            for document, score in hits
+        ],
+    )
+
+
+@router.get("/project/{project_id}/documents/archive")
+def download_project_archive(
+    project_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    require_project_role(project_id, db, current_user)
+    from app.core.config import settings
+
+    rows = (
+        db.query(
+            Document.filename,
+            Document.s3_key,
+            Document.content_type,
+            Document.content_encoding,
+            Document.uploaded_at,
+        )
+        .filter(Document.project_id == project_id)
+        .order_by(Document.id)
+        .all()
+    )
+    names = unique_names(str(row.filename) for row in rows)
+    entries = [
+        ArchiveEntry(
+            name=name,
+            s3_key=str(row.s3_key),
+            content_type=row.content_type,
+            content_encoding=row.content_encoding,
+            modified=row.uploaded_at,
+        )
+        for name, row in zip(names, rows)
+    ]
+    s3_service = get_s3_service()
+    return StreamingResponse(
+        stream_zip(
+            entries,
+            lambda entry: s3_service.open_stream(
+                settings.S3_BUCKET_NAME, entry.s3_key
+            ),
+            read_ahead=settings.ARCHIVE_READ_AHEAD,
+        ),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename=project-{project_id}.zip"
+            )
+        },
+    )
+
+
 @router.post(
     "/project/{project_id}/documents",
     response_model=List[DocumentResponse],
@@ -60,29 +229,24 @@ async def upload_documents(
     require_project_role(project_id, db, current_user)
     from app.core.config import settings
 
-    # Calculate current total project file size
-    current_total_size = (
-        db.query(Document)
-        .filter(Document.project_id == project_id)
-        .with_entities(Document.size)
-        .all()
-    )
-    current_total_size = sum(doc.size or 0 for doc in current_total_size)
     new_files_size = 0
     for file in files:
         content = await file.read()
         new_files_size += len(content)
         await file.seek(0)  # Reset file pointer for second read
-    if (
-        current_total_size + new_files_size
-        > settings.PROJECT_FILE_SIZE_LIMIT
+    if not adjust_usage(
+        db,
+        project_id,
+        new_files_size,
+        count_delta=len(files),
+        limit=settings.PROJECT_FILE_SIZE_LIMIT,
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=(
                 f"Project file size limit exceeded. "
-                "Limit: {settings.PROJECT_FILE_SIZE_LIMIT} bytes. "
-                f"Current: {current_total_size} bytes. "
+                f"Limit: {settings.PROJECT_FILE_SIZE_LIMIT} bytes. "
+                f"Current: {get_usage(db, project_id)} bytes. "
                 f"Attempted upload size: {new_files_size} bytes."
             ),
         )
@@ -90,24 +254,32 @@ async def upload_documents(
     uploaded_documents = []
     s3_service = get_s3_service()
     for file in files:
-        content = await file.read()
-        s3_key = s3_service.upload_file(
-            content, str(file.filename or ""), str(file.content_type or "")
+        stored = store_content(
+            db,
+            s3_service,
+            file.file,
+            str(file.filename or ""),
+            str(file.content_type or ""),
+            project_id=project_id,
         )
-        if not s3_key:
+        if not stored.s3_key:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=(f"Failed to upload {file.filename}"),
             )
         document = Document(
             filename=str(file.filename),
-            s3_key=str(s3_key),
+            s3_key=str(stored.s3_key),
             content_type=str(file.content_type),
-            size=int(len(content)),
+            size=int(stored.size),
+            content_hash=stored.content_hash,
+            content_encoding=stored.content_encoding,
             project_id=int(project_id),
         )
         db.add(document)
         uploaded_documents.append(document)
+    db.flush()
+    schedule_document_jobs(db, [int(doc.id) for doc in uploaded_documents])
     db.commit()
     for doc in uploaded_documents:
         db.refresh(doc)
@@ -117,6 +289,7 @@ async def upload_documents(
 @router.get("/document/{document_id}")
 async def download_document(
     document_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -130,22 +303,177 @@ async def download_document(
     from app.core.config import settings
 
     s3_service = get_s3_service()
-    file_content = s3_service.download_file(
+    headers = {
+        "Content-Disposition": (
+            f"attachment; filename=" f"{str(document.filename)}"
+        )
+    }
+    # Compressed objects go out as-is to clients that accept the codec and
+    # are decompressed here for everyone else.
+    encoding = document.content_encoding
+    send_encoded = bool(encoding) and accepts_encoding(
+        request.headers.get("accept-encoding"), str(encoding)
+    )
+    if encoding:
+        headers["Vary"] = "Accept-Encoding"
+    if send_encoded:
+        headers["Content-Encoding"] = str(encoding)
+
+    local_path = s3_service.local_path(
         settings.S3_BUCKET_NAME, str(document.s3_key)
     )
+    if local_path is not None and (not encoding or send_encoded):
+        # Local backend: serve the stored file itself, zero-copy where
+        # the server supports pathsend.
+        return FileResponse(
+            local_path,
+            media_type=str(document.content_type),
+            headers=headers,
+        )
+
+    cache = get_download_cache()
+    if (
+        cache is not None
+        and int(document.size or 0) <= settings.DOWNLOAD_CACHE_MAX_ITEM_BYTES
+    ):
+        # Stream from the file opened by the cache, not its path: another
+        # worker may evict the entry before a FileResponse would open it.
+        cached = cache.fetch(
+            str(document.s3_key),
+            lambda: s3_service.download_file(
+                settings.S3_BUCKET_NAME, str(document.s3_key)
+            ),
+        )
+        if not encoding or send_encoded:
+            headers["Content-Length"] = str(cached.seek(0, io.SEEK_END))
+            cached.seek(0)
+            return StreamingResponse(
+                iter_file(cached),
+                media_type=str(document.content_type),
+                headers=headers,
+            )
+        with cached:
+            file_content = cached.read()
+    else:
+        file_content = s3_service.download_file(
+            settings.S3_BUCKET_NAME, str(document.s3_key)
+        )
     if not file_content:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to download document",
         )
+    if encoding and not send_encoded:
+        file_content = decode(file_content, str(encoding))
     return StreamingResponse(
         io.BytesIO(file_content),
         media_type=str(document.content_type),
-        headers={
-            "Content-Disposition": (
-                f"attachment; filename=" f"{str(document.filename)}"
-            )
-        },
+        headers=headers,
+    )
+
+
+@router.get("/document/{document_id}/renditions/{name}")
+def download_rendition(
+    document_id: int,
+    name: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Serve the ``name`` rendition (e.g. "thumb") of an image document in
+    the smallest format the client's Accept header allows.
+    """
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DOCUMENT_NOT_FOUND,
+        )
+    require_project_role(int(document.project_id), db, current_user)
+    from app.core.config import settings
+
+    s3_service = get_s3_service()
+    manifest = load_manifest(
+        s3_service, settings.S3_BUCKET_NAME, str(document.s3_key)
+    )
+    entries = (manifest or {}).get("renditions", {}).get(name)
+    if not entries:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rendition not available",
+        )
+    entry = choose_rendition(entries, request.headers.get("accept"))
+    headers = {"Vary": "Accept"}
+    local_path = s3_service.local_path(settings.S3_BUCKET_NAME, entry["key"])
+    if local_path is not None:
+        return FileResponse(
+            local_path, media_type=entry["content_type"], headers=headers
+        )
+    return Response(
+        s3_service.download_file(settings.S3_BUCKET_NAME, entry["key"]),
+        media_type=entry["content_type"],
+        headers=headers,
+    )
+
+
+@router.get("/document/{document_id}/preview")
+def preview_document(
+    document_id: int,
+    request: Request,
+    w: int = Query(256, ge=1),
+    h: int = Query(256, ge=1),
+    fmt: Optional[str] = Query(None, pattern="^(jpeg|png|webp)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Image document resized to fit ``w`` x ``h``, rendered on first request
+    and cached. Both dimensions are rounded up to the next preview size.
+    Without ``fmt``, WebP is sent to clients that accept it.
+    """
+    document = db.query(Document).filter(Document.id == document_id).first()
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DOCUMENT_NOT_FOUND,
+        )
+    require_project_role(int(document.project_id), db, current_user)
+    from app.core.config import settings
+
+    if max(w, h) > settings.PREVIEW_MAX_DIMENSION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Preview dimensions are limited to "
+                f"{settings.PREVIEW_MAX_DIMENSION} pixels"
+            ),
+        )
+    if not str(document.content_type or "").startswith("image/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Previews are only available for images",
+        )
+    headers = {"Cache-Control": "private, max-age=86400"}
+    if fmt is None:
+        headers["Vary"] = "Accept"
+        accepted = accepted_types(request.headers.get("accept"))
+        fmt = "webp" if accepted.get("image/webp", 0) > 0 else "jpeg"
+
+    width = snap_size(w, settings.PREVIEW_MAX_DIMENSION)
+    height = snap_size(h, settings.PREVIEW_MAX_DIMENSION)
+    previews = get_preview_service(get_s3_service())
+    try:
+        preview = previews.get(
+            str(document.s3_key), width, height, PREVIEW_FORMATS[fmt]
+        )
+    except (ImageTooLarge, UnidentifiedImageError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="This image cannot be previewed",
+        )
+    return Response(
+        preview.data, media_type=preview.content_type, headers=headers
     )
 
 
@@ -165,21 +493,52 @@ async def update_document(
     require_project_role(int(document.project_id), db, current_user)
     from app.core.config import settings
 
-    s3_service = get_s3_service()
-    s3_service.delete_file(settings.S3_BUCKET_NAME, str(document.s3_key))
     content = await file.read()
-    s3_key = s3_service.upload_file(
-        content, str(file.filename or ""), str(file.content_type or "")
+    if not adjust_usage(
+        db,
+        int(document.project_id),
+        len(content) - int(document.size or 0),
+        limit=settings.PROJECT_FILE_SIZE_LIMIT,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Project file size limit exceeded. "
+                f"Limit: {settings.PROJECT_FILE_SIZE_LIMIT} bytes."
+            ),
+        )
+    await file.seek(0)
+    s3_service = get_s3_service()
+    stored = store_content(
+        db,
+        s3_service,
+        file.file,
+        str(file.filename or ""),
+        str(file.content_type or ""),
+        project_id=int(document.project_id),
     )
-    if not s3_key:
+    if not stored.s3_key:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to upload document",
         )
-    setattr(document, "filename", str(file.filename))
-    setattr(document, "s3_key", str(s3_key))
-    setattr(document, "content_type", str(file.content_type))
-    setattr(document, "size", int(len(content)))
+    if not replace_content(
+        db,
+        document,
+        stored,
+        str(file.filename),
+        str(file.content_type),
+    ):
+        # Someone else updated the document first: discard our upload.
+        db.rollback()
+        enqueue_deletion(db, stored.s3_key)
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Document was modified concurrently, retry the update",
+        )
+    schedule_document_jobs(db, [document_id])
+    schedule_storage_gc(db)
     db.commit()
     db.refresh(document)
     return document
@@ -200,9 +559,79 @@ def delete_document(
             detail=DOCUMENT_NOT_FOUND,
         )
     require_project_role(int(document.project_id), db, current_user)
-    from app.core.config import settings
-
-    s3_service = get_s3_service()
-    s3_service.delete_file(settings.S3_BUCKET_NAME, str(document.s3_key))
+    release_content(db, str(document.s3_key))
+    remove_from_index(db, [document_id])
+    adjust_usage(
+        db,
+        int(document.project_id),
+        -int(document.size or 0),
+        count_delta=-1,
+    )
     db.delete(document)
+    schedule_storage_gc(db)
     db.commit()
+
+
+@router.post(
+    "/documents/batch-delete", response_model=DocumentBatchDeleteResponse
+)
+def batch_delete_documents(
+    payload: DocumentBatchDelete,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Delete many documents at once, reporting the outcome per ID."""
+    requested = list(dict.fromkeys(payload.document_ids))
+    # One query both loads the documents and authorizes them.
+    rows = (
+        db.query(
+            Document.id,
+            Document.project_id,
+            Document.s3_key,
+            Document.size,
+            ProjectAccess.id.label("access_id"),
+        )
+        .outerjoin(
+            ProjectAccess,
+            and_(
+                ProjectAccess.project_id == Document.project_id,
+                ProjectAccess.user_id == current_user.id,
+            ),
+        )
+        .filter(Document.id.in_(requested))
+        .all()
+    )
+    found = {row.id: row for row in rows}
+    allowed = [row for row in rows if row.access_id is not None]
+
+    if allowed:
+        remove_from_index(db, [row.id for row in allowed])
+        db.execute(
+            delete(Document)
+            .where(Document.id.in_([row.id for row in allowed]))
+            .execution_options(synchronize_session=False)
+        )
+        usage: dict[int, list[int]] = {}
+        for row in allowed:
+            totals = usage.setdefault(row.project_id, [0, 0])
+            totals[0] -= int(row.size or 0)
+            totals[1] -= 1
+        for project_id, (size_delta, count_delta) in usage.items():
+            adjust_usage(db, project_id, size_delta, count_delta=count_delta)
+        # Freed objects are queued in this transaction and removed by the
+        # storage GC, so a storage failure cannot orphan them.
+        if release_contents(db, [str(row.s3_key) for row in allowed]):
+            schedule_storage_gc(db)
+        db.commit()
+
+    results = []
+    for document_id in requested:
+        match = found.get(document_id)
+        if match is None:
+            outcome = "not_found"
+        elif match.access_id is None:
+            outcome = "forbidden"
+        else:
+            outcome = "deleted"
+        results.append({"id": document_id, "status": outcome})
+    return {"results": results}
@@ -1,21 +1,18 @@
 import secrets
 from typing import List
 
-from fastapi import (
-    APIRouter,
-    BackgroundTasks,
-    Depends,
-    HTTPException,
-    status,
-)
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, require_project_role
+from app.api.documents import get_s3_service
 from app.core.config import settings
 from app.core.database import get_db
+from app.models.document import Document
 from app.models.invite_token import InviteToken
 from app.models.project import Project
 from app.models.project_access import ProjectAccess
+from app.models.upload_session import UploadSession
 from app.models.user import User
 from app.schemas.project import (
     ProjectCreate,
@@ -23,6 +20,10 @@ from app.schemas.project import (
     ProjectResponse,
     ProjectUpdate,
 )
+from app.services.document_jobs import schedule_storage_gc
+from app.services.document_store import release_contents
+from app.services.search_service import remove_project_from_index
+from app.services.upload_sessions import abort_session
 
 PROJECT_NOT_FOUND = "Project not found"
 
@@ -125,6 +126,25 @@ def delete_project(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=PROJECT_NOT_FOUND
         )
+    remove_project_from_index(db, project_id)
+    # The ORM cascade deletes the documents; release their objects first so
+    # shared blobs lose a reference and unreferenced objects are queued for
+    # the storage GC in this transaction.
+    keys = [
+        str(row.s3_key)
+        for row in db.query(Document.s3_key).filter(
+            Document.project_id == project_id
+        )
+    ]
+    if keys:
+        release_contents(db, keys)
+        schedule_storage_gc(db)
+    # Open resumable uploads would otherwise keep their parts in S3.
+    sessions = db.query(UploadSession).filter(
+        UploadSession.project_id == project_id
+    )
+    for session in sessions.all():
+        abort_session(db, get_s3_service(), session)
     db.delete(project)
     db.commit()
 
@@ -167,13 +187,15 @@ def invite_user_to_project(
 def share_project_via_email(
     project_id: int,
     with_email: str,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Share a project via email invitation."""
-    from app.services.mock_email_service import MockEmailService
-    from app.services.ses_email_service import SESEmailService
+    from app.services.email_dispatcher import (
+        InviteEmail,
+        enqueue_invite,
+        wake_email_dispatcher,
+    )
 
     # Verify user is project owner
     require_project_role(project_id, db, current_user, role="owner")
@@ -193,31 +215,25 @@ def share_project_via_email(
         token=token, project_id=project_id, email=with_email, days_valid=7
     )
     db.add(invite_token)
-    db.commit()
 
     # Generate join link
     join_link = (
         f"{settings.FRONTEND_URL}/join?token={token}&project_id={project_id}"
     )
 
-    # Send email (use mock in dev, SES in production)
-    if settings.USE_MOCK_EMAIL:
-        email_service = MockEmailService()  # type: ignore[assignment]
-    else:
-        email_service = SESEmailService(  # type: ignore[assignment]
-            sender_email=settings.SES_SENDER_EMAIL,
-            aws_region=settings.SES_AWS_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        )
-
-    background_tasks.add_task(
-        email_service.send_invite_email,
-        recipient_email=with_email,
-        project_name=project.name,
-        inviter_name=current_user.email,
-        join_link=join_link,
+    # The email is committed with the token, so it is sent only if the
+    # token exists and survives restarts; an outbox worker delivers it
+    enqueue_invite(
+        db,
+        InviteEmail(
+            to=with_email,
+            project_name=str(project.name),
+            join_link=join_link,
+            inviter=str(current_user.email or current_user.login),
+        ),
     )
+    db.commit()
+    wake_email_dispatcher()
 
     return {
         "message": f"Invite link sent to {with_email}",
@@ -0,0 +1,250 @@
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, require_project_role
+from app.api.documents import get_s3_service
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.upload_session import UploadSession
+from app.models.user import User
+from app.schemas.document import DocumentResponse
+from app.schemas.upload import UploadSessionCreate, UploadSessionResponse
+from app.services.document_jobs import schedule_document_jobs
+from app.services.project_report_service import adjust_usage, get_usage
+from app.services.upload_sessions import (
+    abort_session,
+    append_chunk,
+    complete_session,
+    create_session,
+    expected_chunk_size,
+    get_live_session,
+)
+
+UPLOAD_NOT_FOUND = "Upload not found or expired"
+
+
+router = APIRouter()
+
+
+def _offset_headers(session: UploadSession) -> dict:
+    return {
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.size),
+        "Cache-Control": "no-store",
+    }
+
+
+def _get_session(
+    db: Session, session_id: str, user: User, lock: bool = False
+) -> UploadSession:
+    session = get_live_session(db, session_id, lock=lock)
+    if session is None or session.user_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=UPLOAD_NOT_FOUND
+        )
+    require_project_role(int(session.project_id), db, user)
+    return session
+
+
+def _check_offset(session: UploadSession, upload_offset: int) -> int:
+    """Reject a chunk not at the session's offset; return its size."""
+    if upload_offset != session.offset:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload-Offset must be {session.offset}",
+            headers=_offset_headers(session),
+        )
+    expected = expected_chunk_size(session)
+    if expected == 0:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is already complete",
+            headers=_offset_headers(session),
+        )
+    return expected
+
+
+@router.post(
+    "/project/{project_id}/uploads",
+    response_model=UploadSessionResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_upload(
+    project_id: int,
+    payload: UploadSessionCreate,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Start a resumable upload; chunks are then sent with PATCH."""
+    require_project_role(project_id, db, current_user)
+    usage = get_usage(db, project_id)
+    if usage + payload.size > settings.PROJECT_FILE_SIZE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Project file size limit exceeded. "
+                f"Limit: {settings.PROJECT_FILE_SIZE_LIMIT} bytes. "
+                f"Current: {usage} bytes. "
+                f"Attempted upload size: {payload.size} bytes."
+            ),
+        )
+    session = create_session(
+        db,
+        get_s3_service(),
+        project_id,
+        int(current_user.id),
+        payload.filename,
+        payload.content_type or "application/octet-stream",
+        payload.size,
+    )
+    db.commit()
+    db.refresh(session)
+    response.headers["Location"] = f"/uploads/{session.id}"
+    response.headers.update(_offset_headers(session))
+    return session
+
+
+@router.head("/uploads/{session_id}")
+def get_upload_offset(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    session = _get_session(db, session_id, current_user)
+    return Response(headers=_offset_headers(session))
+
+
+@router.get("/uploads/{session_id}", response_model=UploadSessionResponse)
+def get_upload(
+    session_id: str,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    session = _get_session(db, session_id, current_user)
+    response.headers.update(_offset_headers(session))
+    return session
+
+
+@router.patch(
+    "/uploads/{session_id}", status_code=status.HTTP_204_NO_CONTENT
+)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Append the request body at ``Upload-Offset``.
+
+    The body must be one full part, or the remainder of the file. On 409
+    the client re-reads the offset with HEAD and resumes from there.
+    """
+    session = await run_in_threadpool(
+        _get_session, db, session_id, current_user
+    )
+    expected = _check_offset(session, upload_offset)
+    headers = _offset_headers(session)
+    # Receive the body without holding the row lock or an open
+    # transaction: a slow client must not block HEAD, complete or other
+    # writers. Nothing has been written yet, so this only ends the read.
+    db.commit()
+
+    chunk = bytearray()
+    async for data in request.stream():
+        chunk += data
+        if len(chunk) > expected:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Chunk must be {expected} bytes",
+            )
+    if len(chunk) != expected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Chunk must be {expected} bytes, got {len(chunk)}",
+            headers=headers,
+        )
+
+    # Another request may have stored this part meanwhile; the offset
+    # decides under the lock, and an unchanged offset means an unchanged
+    # expected size.
+    session = await run_in_threadpool(
+        _get_session, db, session_id, current_user, True
+    )
+    _check_offset(session, upload_offset)
+    await run_in_threadpool(
+        append_chunk, db, get_s3_service(), session, bytes(chunk)
+    )
+    db.commit()
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers=_offset_headers(session),
+    )
+
+
+@router.post(
+    "/uploads/{session_id}/complete",
+    response_model=DocumentResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def complete_upload(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Turn a fully received upload into a document."""
+    session = _get_session(db, session_id, current_user, lock=True)
+    if session.offset != session.size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete: {session.offset}/{session.size}",
+            headers=_offset_headers(session),
+        )
+    project_id = int(session.project_id)
+    if not adjust_usage(
+        db,
+        project_id,
+        int(session.size),
+        count_delta=1,
+        limit=settings.PROJECT_FILE_SIZE_LIMIT,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Project file size limit exceeded. "
+                f"Limit: {settings.PROJECT_FILE_SIZE_LIMIT} bytes. "
+                f"Current: {get_usage(db, project_id)} bytes. "
+                f"Attempted upload size: {session.size} bytes."
+            ),
+        )
+    document = complete_session(db, get_s3_service(), session)
+    db.flush()
+    schedule_document_jobs(db, [int(document.id)])
+    db.commit()
+    db.refresh(document)
+    return document
+
+
+@router.delete(
+    "/uploads/{session_id}", status_code=status.HTTP_204_NO_CONTENT
+)
+def cancel_upload(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    session = _get_session(db, session_id, current_user)
+    abort_session(db, get_s3_service(), session)
+    db.commit()
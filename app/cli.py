@@ -0,0 +1,221 @@
+"""
+Maintenance commands.
+
+Usage:
+    python -m app.cli reconcile-reports [--project-id ID]
+    python -m app.cli gc-storage [--batch-size N]
+    python -m app.cli run-jobs [--workers N] [--once]
+    python -m app.cli send-emails [--once]
+    python -m app.cli expire-uploads
+    python -m app.cli migrate-keys [--batch-size N] [--max-per-second R]
+"""
+
+import argparse
+from typing import List, Optional
+
+from app.core.database import SessionLocal
+
+
+def _reconcile_reports(args: argparse.Namespace) -> None:
+    from app.services.project_report_service import reconcile_project_reports
+
+    db = SessionLocal()
+    try:
+        count = reconcile_project_reports(db, args.project_id)
+    finally:
+        db.close()
+    print(f"Reconciled {count} project report(s)")
+
+
+def _gc_storage(args: argparse.Namespace) -> None:
+    from app.api.documents import get_s3_service
+    from app.services.storage_gc import drain_deletion_queue
+
+    db = SessionLocal()
+    total = 0
+    try:
+        while True:
+            cleared = drain_deletion_queue(
+                db, get_s3_service(), args.batch_size
+            )
+            total += cleared
+            if cleared < args.batch_size:
+                break
+    finally:
+        db.close()
+    print(f"Cleared {total} queued deletion(s)")
+
+
+def _run_jobs(args: argparse.Namespace) -> None:
+    import time
+
+    from app.core.config import settings
+    from app.services.jobs import JobWorker, run_pending
+
+    if args.once:
+        db = SessionLocal()
+        try:
+            count = run_pending(db, worker_id="cli", limit=args.limit)
+        finally:
+            db.close()
+        print(f"Ran {count} job(s)")
+        return
+
+    workers = [
+        JobWorker(
+            SessionLocal,
+            poll_interval=settings.JOB_POLL_INTERVAL,
+            name=f"job-worker-{index}",
+        )
+        for index in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.stop(timeout=30)
+
+
+def _send_emails(args: argparse.Namespace) -> None:
+    import time
+
+    from app.core.config import settings
+    from app.services.email_dispatcher import (
+        EmailDispatcher,
+        build_transport,
+        dispatch_pending,
+        send_rate_limiter,
+    )
+
+    transport = build_transport()
+    if args.once:
+        db = SessionLocal()
+        try:
+            count = dispatch_pending(
+                db,
+                transport,
+                worker_id="cli",
+                batch_size=settings.EMAIL_BATCH_SIZE,
+                limit=args.limit,
+                limiter=send_rate_limiter(
+                    transport,
+                    settings.EMAIL_MAX_SEND_RATE,
+                    settings.EMAIL_DISPATCHERS,
+                ),
+            )
+        finally:
+            db.close()
+        print(f"Processed {count} queued email(s)")
+        return
+
+    dispatcher = EmailDispatcher(
+        SessionLocal,
+        transport,
+        batch_size=settings.EMAIL_BATCH_SIZE,
+        poll_interval=settings.EMAIL_POLL_INTERVAL or 1.0,
+        linger=settings.EMAIL_BATCH_LINGER_SECONDS,
+        max_send_rate=settings.EMAIL_MAX_SEND_RATE,
+        dispatchers=settings.EMAIL_DISPATCHERS,
+    )
+    dispatcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        dispatcher.stop(timeout=30)
+
+
+def _expire_uploads(args: argparse.Namespace) -> None:
+    from app.api.documents import get_s3_service
+    from app.services.upload_sessions import expire_sessions
+
+    db = SessionLocal()
+    try:
+        count = expire_sessions(db, get_s3_service())
+    finally:
+        db.close()
+    print(f"Aborted {count} expired upload session(s)")
+
+
+def _migrate_keys(args: argparse.Namespace) -> None:
+    from app.api.documents import get_s3_service
+    from app.services.key_migration import migrate_keys
+
+    db = SessionLocal()
+    try:
+        count = migrate_keys(
+            db,
+            get_s3_service(),
+            batch_size=args.batch_size,
+            max_per_second=args.max_per_second,
+            limit=args.limit,
+        )
+    finally:
+        db.close()
+    print(f"Migrated {count} document key(s)")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = subparsers.add_parser(
+        "reconcile-reports",
+        help="Rebuild project_report counters from the documents table",
+    )
+    reconcile.add_argument("--project-id", type=int, default=None)
+    reconcile.set_defaults(func=_reconcile_reports)
+
+    gc = subparsers.add_parser(
+        "gc-storage", help="Drain the storage deletion queue once"
+    )
+    gc.add_argument("--batch-size", type=int, default=1000)
+    gc.set_defaults(func=_gc_storage)
+
+    jobs = subparsers.add_parser(
+        "run-jobs", help="Process background jobs in this process"
+    )
+    jobs.add_argument("--workers", type=int, default=2)
+    jobs.add_argument(
+        "--once", action="store_true", help="Run due jobs, then exit"
+    )
+    jobs.add_argument("--limit", type=int, default=1000)
+    jobs.set_defaults(func=_run_jobs)
+
+    emails = subparsers.add_parser(
+        "send-emails", help="Send queued outbox emails from this process"
+    )
+    emails.add_argument(
+        "--once", action="store_true", help="Send due emails, then exit"
+    )
+    emails.add_argument("--limit", type=int, default=1000)
+    emails.set_defaults(func=_send_emails)
+
+    expire = subparsers.add_parser(
+        "expire-uploads", help="Abort resumable uploads past their expiry"
+    )
+    expire.set_defaults(func=_expire_uploads)
+
+    migrate = subparsers.add_parser(
+        "migrate-keys",
+        help="Copy objects to documents/{project_id}/... keys (resumable)",
+    )
+    migrate.add_argument("--batch-size", type=int, default=100)
+    migrate.add_argument(
+        "--max-per-second",
+        type=float,
+        default=0.0,
+        help="Throttle copies (0 = unthrottled)",
+    )
+    migrate.add_argument("--limit", type=int, default=None)
+    migrate.set_defaults(func=_migrate_keys)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
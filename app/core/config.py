@@ -15,10 +15,36 @@ class Settings(BaseSettings):
     S3_BUCKET_NAME: str = "test-bucket"
     S3_ENDPOINT_URL: str = "http://localhost:4566"
 
+    # S3 client transport tuning (shared, process-wide client)
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_CONNECT_TIMEOUT: float = 5.0
+    S3_READ_TIMEOUT: float = 60.0
+    S3_RETRY_MODE: str = "standard"  # legacy | standard | adaptive
+    S3_MAX_ATTEMPTS: int = 3
+    S3_TCP_KEEPALIVE: bool = True
+
     # SES Email Settings
     SES_SENDER_EMAIL: str = "noreply@example.com"
     SES_AWS_REGION: str = "us-east-1"
     USE_MOCK_EMAIL: bool = True  # Set to False in production
+    SES_INVITE_TEMPLATE: str = "project-invite"
+
+    # Email outbox dispatcher (app.services.email_dispatcher); a 0 poll
+    # interval sends via the CLI only
+    EMAIL_POLL_INTERVAL: float = 1.0
+    EMAIL_BATCH_SIZE: int = 50  # SES bulk sends take <= 50 destinations
+    # How long a woken dispatcher waits for more messages to join a batch
+    EMAIL_BATCH_LINGER_SECONDS: float = 0.05
+    EMAIL_LEASE_SECONDS: int = 300
+    # Recipients per second; 0 uses the account's SES MaxSendRate
+    EMAIL_MAX_SEND_RATE: float = 0
+    # Processes sending outbox email at the same time (API workers with
+    # a dispatcher plus any "cli send-emails"); each one paces itself to
+    # an equal share of the send rate so together they stay within it
+    EMAIL_DISPATCHERS: int = 1
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BASE_DELAY: float = 1.0
+    EMAIL_RETRY_MAX_DELAY: float = 60.0
 
     # Frontend URL for email links
     FRONTEND_URL: str = "http://localhost:3000"
@@ -33,6 +59,69 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
 
     PROJECT_FILE_SIZE_LIMIT: int = 100_000_000  # 100 MB default
+    # Cap on a single upload request body; 0 derives it from the project limit
+    UPLOAD_MAX_REQUEST_BYTES: int = 0
+
+    # Resumable uploads: bytes per chunk/S3 part (S3 needs >= 5 MiB) and
+    # how long an idle session is kept before it is aborted
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600
+
+    # Document storage: "s3", or "local" to keep objects on this machine
+    STORAGE_BACKEND: str = "s3"
+    LOCAL_STORAGE_ROOT: str = "./storage"
+    # fsync local writes before publishing them (durability over speed)
+    LOCAL_STORAGE_FSYNC: bool = True
+
+    # Key layout for new objects: "project" puts them under
+    # documents/{project_id}/{xx}/, "flat" at the bucket root
+    STORAGE_KEY_SCHEME: str = "project"
+
+    # Store identical uploads once under a SHA-256 derived key
+    STORAGE_DEDUP: bool = False
+
+    # Compression at rest for compressible types: "", "gzip" or "zstd"
+    STORAGE_COMPRESSION: str = ""
+    STORAGE_COMPRESSION_MIN_SIZE: int = 1024
+    # Only keep the compressed copy if it is at most this fraction in size
+    STORAGE_COMPRESSION_MAX_RATIO: float = 0.9
+
+    # Local disk cache for downloads (disabled when the directory is empty)
+    DOWNLOAD_CACHE_DIR: str = ""
+    DOWNLOAD_CACHE_MAX_BYTES: int = 1_073_741_824  # 1 GB
+    DOWNLOAD_CACHE_MAX_ITEM_BYTES: int = 64_000_000
+
+    # On-demand image previews (GET /document/{id}/preview)
+    PREVIEW_MAX_DIMENSION: int = 1600
+    PREVIEW_WORKERS: int = 0  # 0 = one per CPU
+    PREVIEW_CACHE_MAX_BYTES: int = 64_000_000  # in-process LRU
+    # Also keep rendered previews in storage under previews/
+    PREVIEW_STORE: bool = True
+
+    # Background deletion of superseded objects (0 disables the worker)
+    STORAGE_GC_INTERVAL_SECONDS: float = 30.0
+    STORAGE_GC_BATCH_SIZE: int = 1000
+    # Failed deletes back off exponentially and are given up (left in the
+    # queue as dead letters) after this many attempts
+    STORAGE_GC_MAX_ATTEMPTS: int = 10
+    STORAGE_GC_RETRY_BASE_DELAY: float = 30.0
+    STORAGE_GC_RETRY_MAX_DELAY: float = 6 * 3600.0
+
+    # Background jobs (app.services.jobs); 0 workers = run via the CLI only
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_VISIBILITY_TIMEOUT: int = 300
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_DELAY: float = 5.0
+    JOB_RETRY_MAX_DELAY: float = 600.0
+    # Finished jobs are deleted by the workers after this long (0 keeps them)
+    JOB_RETENTION_DAYS: float = 7.0
+
+    # Objects fetched ahead of the writer when streaming a project ZIP
+    ARCHIVE_READ_AHEAD: int = 4
+
+    # Larger documents are not downloaded for full-text indexing
+    SEARCH_MAX_DOCUMENT_BYTES: int = 20_000_000
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,209 @@
+"""
+ASGI middleware that rejects oversized uploads before the body is read.
+
+Uploads are otherwise only measured after Starlette has parsed and spooled
+the whole multipart body. The guard compares ``Content-Length`` with its
+limit up front, and counts chunked bodies as they arrive, answering 413 as
+soon as the limit is crossed. The limit is the global request cap, lowered
+to the project's remaining quota when the request carries a valid bearer
+token for a member of the project; anonymous or invalid requests only get
+the global cap and are left to the handlers' authentication. The 413 body
+does not state the limit, and the handlers still perform the exact quota
+check.
+"""
+
+import json
+import re
+from typing import Callable, List, Optional, Tuple
+
+import anyio.to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+
+# Room for multipart boundaries and part headers on top of the file bytes
+MULTIPART_OVERHEAD = 64 * 1024
+
+PROJECT_UPLOAD = re.compile(r"^/project/(\d+)/documents/?$")
+DOCUMENT_UPDATE = re.compile(r"^/document/(\d+)/?$")
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+def _remaining_quota(db, project_id: int, replaced_document_id=None) -> int:
+    from app.models.document import Document
+    from app.services.project_report_service import get_usage
+
+    remaining = settings.PROJECT_FILE_SIZE_LIMIT - get_usage(db, project_id)
+    if replaced_document_id is not None:
+        # Replacing a document frees its current size.
+        size = (
+            db.query(Document.size)
+            .filter(Document.id == replaced_document_id)
+            .scalar()
+        )
+        remaining += int(size or 0)
+    return max(remaining, 0)
+
+
+class UploadSizeGuard:
+    """Apply the global and per-project upload limits at the ASGI layer."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        target = self._match(scope)
+        if target is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self._global_limit()
+        user_id = self._bearer_user_id(scope)
+        if user_id is not None:
+            project_limit = await anyio.to_thread.run_sync(
+                self._project_limit, scope, user_id, *target
+            )
+            if project_limit is not None:
+                limit = min(limit, project_limit + MULTIPART_OVERHEAD)
+        content_length = self._content_length(scope)
+        if content_length is not None and content_length > limit:
+            await self._reject(send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def guarded_receive() -> Message:
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    if not response_started:
+                        rejected = True
+                        await self._reject(send)
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if rejected:
+                # The 413 has been sent; drop whatever the app answers.
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, guarded_receive, guarded_send)
+        except _BodyTooLarge:
+            if not rejected:
+                raise
+
+    @staticmethod
+    def _match(scope: Scope) -> Optional[Tuple[int, Optional[int]]]:
+        """Return (project_id or 0, replaced document id) for upload routes."""
+        method = scope["method"].upper()
+        path = scope["path"]
+        if method == "POST" and (match := PROJECT_UPLOAD.match(path)):
+            return int(match.group(1)), None
+        if method == "PUT" and (match := DOCUMENT_UPDATE.match(path)):
+            return 0, int(match.group(1))
+        return None
+
+    @staticmethod
+    def _bearer_user_id(scope: Scope) -> Optional[int]:
+        """Return the user id of a valid bearer token, else None."""
+        for name, value in scope.get("headers", []):
+            if name != b"authorization":
+                continue
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token.strip():
+                return None
+            payload = decode_access_token(token.strip())
+            try:
+                return int(payload["sub"]) if payload else None
+            except (KeyError, TypeError, ValueError):
+                return None
+        return None
+
+    @staticmethod
+    def _project_limit(
+        scope: Scope,
+        user_id: int,
+        project_id: int,
+        document_id: Optional[int],
+    ) -> Optional[int]:
+        """Return the remaining quota if ``user_id`` can access the project."""
+        from app.core.database import get_db
+        from app.models.document import Document
+        from app.models.project_access import ProjectAccess
+
+        app = scope.get("app")
+        overrides = getattr(app, "dependency_overrides", {})
+        factory: Callable = overrides.get(get_db, get_db)
+        sessions = factory()
+        db = next(sessions)
+        try:
+            if document_id is not None:
+                project_id = (
+                    db.query(Document.project_id)
+                    .filter(Document.id == document_id)
+                    .scalar()
+                )
+                if project_id is None:
+                    return None
+            access = (
+                db.query(ProjectAccess.id)
+                .filter(
+                    ProjectAccess.project_id == project_id,
+                    ProjectAccess.user_id == user_id,
+                )
+                .first()
+            )
+            if access is None:
+                return None
+            return _remaining_quota(db, int(project_id), document_id)
+        finally:
+            sessions.close()
+
+    @staticmethod
+    def _global_limit() -> int:
+        if settings.UPLOAD_MAX_REQUEST_BYTES > 0:
+            return settings.UPLOAD_MAX_REQUEST_BYTES
+        return settings.PROJECT_FILE_SIZE_LIMIT + MULTIPART_OVERHEAD
+
+    @staticmethod
+    def _content_length(scope: Scope) -> Optional[int]:
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
+
+    @staticmethod
+    async def _reject(send: Send) -> None:
+        body = json.dumps({"detail": "Upload too large."}).encode()
+        headers: List[Tuple[bytes, bytes]] = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"connection", b"close"),
+        ]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -1,11 +1,19 @@
+import io
 from abc import ABC, abstractmethod
-from typing import List
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
 
 
 class S3ServiceInterface(ABC):
     @abstractmethod
-    def upload_file(self, file_path: str, bucket: str, key: str) -> str:
-        pass
+    def upload_file(
+        self,
+        content: bytes,
+        filename: str,
+        content_type: str,
+        key: Optional[str] = None,
+        content_encoding: Optional[str] = None,
+    ) -> str:
+        """Store ``content`` and return its key (generated unless given)."""
 
     @abstractmethod
     def download_file(self, bucket: str, key: str) -> bytes:
@@ -18,3 +26,60 @@ class S3ServiceInterface(ABC):
     @abstractmethod
     def list_files(self, bucket: str, prefix: str = "") -> List[str]:
         pass
+
+    def open_stream(self, bucket: str, key: str) -> BinaryIO:
+        """Open an object for incremental reads."""
+        return io.BytesIO(self.download_file(bucket, key))
+
+    def local_path(self, bucket: str, key: str) -> Optional[str]:
+        """Path of the object on local disk, for backends that have one."""
+        return None
+
+    @abstractmethod
+    def copy_file(self, bucket: str, source_key: str, dest_key: str) -> None:
+        """Copy an object to a new key within the bucket."""
+
+    @abstractmethod
+    def create_multipart_upload(
+        self, bucket: str, key: str, content_type: str
+    ) -> str:
+        """Start a multipart upload and return its upload ID."""
+
+    @abstractmethod
+    def upload_part(
+        self,
+        bucket: str,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        body: bytes,
+    ) -> str:
+        """Store one part of a multipart upload and return its ETag."""
+
+    @abstractmethod
+    def complete_multipart_upload(
+        self,
+        bucket: str,
+        key: str,
+        upload_id: str,
+        parts: Sequence[Tuple[int, str]],
+    ) -> None:
+        """Assemble the (part number, ETag) parts into the final object."""
+
+    @abstractmethod
+    def abort_multipart_upload(
+        self, bucket: str, key: str, upload_id: str
+    ) -> None:
+        """Discard a multipart upload and the parts stored so far."""
+
+    def delete_files(
+        self, bucket: str, keys: Sequence[str]
+    ) -> Dict[str, str]:
+        """Delete several objects; return an error message per failed key."""
+        failed = {}
+        for key in keys:
+            try:
+                self.delete_file(bucket, key)
+            except Exception as e:
+                failed[key] = str(e)
+        return failed
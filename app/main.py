@@ -1,11 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import auth, documents, invitations, join, projects
+from app.api import auth, documents, invitations, join, projects, uploads
 from app.core.config import settings
+from app.core.upload_guard import UploadSizeGuard
 
 app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
 
+# Added first so CORS headers are also applied to its 413 responses
+app.add_middleware(UploadSizeGuard)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -22,10 +26,50 @@ app.add_middleware(
 app.include_router(auth.router, tags=["auth"])
 app.include_router(projects.router, tags=["projects"])
 app.include_router(documents.router, tags=["documents"])
+app.include_router(uploads.router, tags=["uploads"])
 app.include_router(invitations.router, tags=["invitations"])
 app.include_router(join.router, tags=["join"])
 
 
+_background_workers: list = []
+
+
+@app.on_event("startup")
+def start_background_workers():
+    from app.core.database import SessionLocal
+    from app.services.email_dispatcher import start_email_dispatcher
+    from app.services.jobs import JobWorker
+    from app.services.storage_gc import StorageGCWorker
+
+    for index in range(settings.JOB_WORKERS):
+        job_worker = JobWorker(
+            SessionLocal,
+            poll_interval=settings.JOB_POLL_INTERVAL,
+            name=f"job-worker-{index}",
+        )
+        job_worker.start()
+        _background_workers.append(job_worker)
+
+    if settings.STORAGE_GC_INTERVAL_SECONDS > 0:
+        worker = StorageGCWorker(
+            SessionLocal,
+            documents.get_s3_service(),
+            interval=settings.STORAGE_GC_INTERVAL_SECONDS,
+            batch_size=settings.STORAGE_GC_BATCH_SIZE,
+        )
+        worker.start()
+        _background_workers.append(worker)
+
+    if settings.EMAIL_POLL_INTERVAL > 0:
+        _background_workers.append(start_email_dispatcher(SessionLocal))
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    while _background_workers:
+        _background_workers.pop().stop(timeout=10)
+
+
 @app.get("/")
 def root():
     """Root endpoint - API information"""
@@ -34,4 +78,10 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    from app.services.download_cache import get_download_cache
+
+    health: dict = {"status": "healthy"}
+    cache = get_download_cache()
+    if cache is not None:
+        health["download_cache"] = cache.stats()
+    return health
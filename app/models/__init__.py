@@ -1,6 +1,12 @@
 # Import all models so Alembic can detect them
 from .document import Document  # noqa: F401
+from .email_outbox import EmailOutbox  # noqa: F401
+from .job import Job  # noqa: F401
 from .project import Project  # noqa: F401
 from .project_access import ProjectAccess  # noqa: F401
 from .project_report import ProjectReport  # noqa: F401
+from .search_index import SearchDocument, SearchPosting  # noqa: F401
+from .storage_blob import StorageBlob  # noqa: F401
+from .storage_deletion import StorageDeletion  # noqa: F401
+from .upload_session import UploadPart, UploadSession  # noqa: F401
 from .user import User  # noqa: F401
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -11,12 +11,39 @@ class Document(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
-    s3_key = Column(String, nullable=False, unique=True)
+    # Not unique: deduplicated documents share one content-addressed key.
+    s3_key = Column(String, nullable=False, index=True)
     content_type = Column(String)
     size = Column(Integer)
+    content_hash = Column(String(64), index=True, nullable=True)
+    # Codec the stored object is compressed with (None = stored as-is)
+    content_encoding = Column(String, nullable=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    # Bumped on every content update; guards the pointer swap
+    version = Column(Integer, default=1, nullable=False)
     uploaded_at = Column(
         DateTime, default=lambda: datetime.now(timezone.utc)
     )
 
     project = relationship("Project", back_populates="documents")
+
+    # One composite index per listing filter/sort. text_pattern_ops lets
+    # PostgreSQL serve prefix LIKE filters from the index.
+    __table_args__ = (
+        Index(
+            "ix_documents_project_uploaded_at", "project_id", "uploaded_at"
+        ),
+        Index("ix_documents_project_size", "project_id", "size"),
+        Index(
+            "ix_documents_project_content_type",
+            "project_id",
+            "content_type",
+            postgresql_ops={"content_type": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_documents_project_filename",
+            "project_id",
+            "filename",
+            postgresql_ops={"filename": "text_pattern_ops"},
+        ),
+    )
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+from app.core.database import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class EmailOutbox(Base):
+    """Email written with the change that triggered it, sent by a worker."""
+
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False, default="invite")
+    recipient = Column(String, nullable=False)
+    payload = Column(Text, nullable=False, default="{}")
+    # pending -> sending -> sent | failed (sending rows whose lock expired
+    # are claimable again)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    send_after = Column(DateTime, nullable=False, default=_utcnow)
+    locked_until = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=_utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_claim", "status", "send_after"),
+    )
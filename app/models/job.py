@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+from app.core.database import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Job(Base):
+    """Durable background job processed by app.services.jobs workers."""
+
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False, default="{}")
+    priority = Column(Integer, nullable=False, default=0)
+    # queued -> running -> done | failed (running jobs whose lock expired
+    # are claimable again)
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=_utcnow)
+    locked_until = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=_utcnow)
+    updated_at = Column(
+        DateTime, nullable=False, default=_utcnow, onupdate=_utcnow
+    )
+
+    __table_args__ = (
+        Index("ix_jobs_claim", "status", "priority", "run_after"),
+    )
@@ -34,6 +34,14 @@ class Project(Base):
         back_populates="project",
         cascade="all, delete-orphan",
     )
+    upload_sessions = relationship(
+        "UploadSession",
+        back_populates="project",
+        cascade="all, delete-orphan",
+    )
     report = relationship(
-        "ProjectReport", back_populates="project", uselist=False
+        "ProjectReport",
+        back_populates="project",
+        uselist=False,
+        cascade="all, delete-orphan",
     )
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+
+from app.core.database import Base
+
+
+class SearchDocument(Base):
+    """Per-document state of the full-text index."""
+
+    __tablename__ = "search_documents"
+
+    document_id = Column(
+        Integer,
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    project_id = Column(Integer, nullable=False, index=True)
+    # Object the postings were built from; a different key means stale
+    s3_key = Column(String, nullable=False)
+    term_count = Column(Integer, nullable=False, default=0)
+
+
+class SearchPosting(Base):
+    """One term of one document in the inverted index."""
+
+    __tablename__ = "search_postings"
+
+    document_id = Column(
+        Integer,
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    term = Column(String(64), primary_key=True)
+    project_id = Column(Integer, nullable=False)
+    frequency = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_search_postings_project_term", "project_id", "term"),
+    )
@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from app.core.database import Base
+
+
+class StorageBlob(Base):
+    """Content-addressed S3 object shared by every document with its hash."""
+
+    __tablename__ = "storage_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    s3_key = Column(String, unique=True, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    content_encoding = Column(String, nullable=True)
+    ref_count = Column(Integer, default=1, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+from app.core.database import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class StorageDeletion(Base):
+    """Object queued for deletion by the storage garbage collector."""
+
+    __tablename__ = "storage_deletions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    s3_key = Column(String, nullable=False)
+    enqueued_at = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+    attempts = Column(Integer, default=0, nullable=False)
+    # Failed deletes are retried with backoff; rows that used up
+    # STORAGE_GC_MAX_ATTEMPTS stay in the table as dead letters.
+    next_attempt_at = Column(DateTime, default=_utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_storage_deletions_due", "attempts", "next_attempt_at"),
+    )
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+)
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class UploadSession(Base):
+    """Resumable upload backed by an S3 multipart upload."""
+
+    __tablename__ = "upload_sessions"
+
+    # Random token; it appears in URLs so it must not be guessable
+    id = Column(String(32), primary_key=True)
+    project_id = Column(
+        Integer,
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=False)
+    # Bytes received so far; always a multiple of part_size until complete
+    offset = Column(BigInteger, nullable=False, default=0)
+    part_size = Column(Integer, nullable=False)
+    s3_key = Column(String, nullable=False)
+    s3_upload_id = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=_utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    project = relationship("Project", back_populates="upload_sessions")
+    parts = relationship("UploadPart", cascade="all, delete-orphan")
+
+
+class UploadPart(Base):
+    """Part of an upload session that S3 has acknowledged."""
+
+    __tablename__ = "upload_parts"
+
+    session_id = Column(
+        String(32),
+        ForeignKey("upload_sessions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    part_number = Column(Integer, primary_key=True)
+    etag = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
@@ -1,5 +1,6 @@
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -15,11 +16,21 @@ class DocumentResponse(BaseModel):
     size: Optional[int] = Field(None, ge=0, example=1024)
     project_id: int = Field(..., ge=1, example=42)
     uploaded_at: datetime = Field(..., example="2025-01-01T12:00:00Z")
+    version: int = Field(1, ge=1, examples=[1])
 
     class Config:
         from_attributes = True
 
 
+class DocumentSort(str, Enum):
+    uploaded_at = "uploaded_at"
+    uploaded_at_desc = "-uploaded_at"
+    size = "size"
+    size_desc = "-size"
+    filename = "filename"
+    filename_desc = "-filename"
+
+
 class DocumentUpload(BaseModel):
     filename: str = Field(
         ..., min_length=1, max_length=255, example="report.pdf"
@@ -27,3 +38,30 @@ class DocumentUpload(BaseModel):
     content_type: str = Field(
         ..., pattern=r"^[\w\-]+/[\w\-]+$", example="application/pdf"
     )
+
+
+class DocumentBatchDelete(BaseModel):
+    document_ids: List[int] = Field(
+        ..., min_length=1, max_length=10_000, examples=[[1, 2, 3]]
+    )
+
+
+class DocumentBatchDeleteResult(BaseModel):
+    id: int = Field(..., examples=[1])
+    status: Literal["deleted", "not_found", "forbidden"] = Field(
+        ..., examples=["deleted"]
+    )
+
+
+class DocumentBatchDeleteResponse(BaseModel):
+    results: List[DocumentBatchDeleteResult]
+
+
+class DocumentSearchHit(BaseModel):
+    document: DocumentResponse
+    score: float = Field(..., ge=0, examples=[3.2])
+
+
+class DocumentSearchResponse(BaseModel):
+    total: int = Field(..., ge=0, examples=[1])
+    results: List[DocumentSearchHit]
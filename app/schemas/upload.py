@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(
+        ..., min_length=1, max_length=255, examples=["video.mp4"]
+    )
+    content_type: Optional[str] = Field(
+        None, max_length=100, examples=["video/mp4"]
+    )
+    size: int = Field(..., gt=0, examples=[1_073_741_824])
+
+
+class UploadSessionResponse(BaseModel):
+    id: str = Field(..., examples=["3f2b9c0d4e5f4a1b8c7d6e5f4a3b2c1d"])
+    project_id: int = Field(..., ge=1, examples=[42])
+    filename: str = Field(..., examples=["video.mp4"])
+    content_type: Optional[str] = Field(None, examples=["video/mp4"])
+    size: int = Field(..., gt=0, examples=[1_073_741_824])
+    offset: int = Field(..., ge=0, examples=[8_388_608])
+    part_size: int = Field(..., gt=0, examples=[8_388_608])
+    expires_at: datetime = Field(..., examples=["2025-01-02T12:00:00Z"])
+
+    class Config:
+        from_attributes = True
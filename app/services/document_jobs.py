@@ -0,0 +1,84 @@
+"""Background job handlers for document post-processing."""
+
+import hashlib
+from typing import Any, Dict, Iterable
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.document import Document
+from app.services.jobs import enqueue, job_handler
+from app.services.storage_codec import open_decoded
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def schedule_document_jobs(db: Session, document_ids: Iterable[int]) -> None:
+    """Queue post-upload processing for new or replaced documents."""
+    for document_id in document_ids:
+        enqueue(db, "document.postprocess", {"document_id": document_id})
+        enqueue(db, "document.index", {"document_id": document_id})
+
+
+def schedule_storage_gc(db: Session) -> None:
+    """Queue a drain of the deletion queue unless one is already waiting."""
+    enqueue(db, "storage.gc", priority=-10, unique=True)
+
+
+def _storage():
+    from app.api.documents import get_s3_service
+
+    return get_s3_service()
+
+
+@job_handler("document.postprocess")
+def postprocess_document(db: Session, payload: Dict[str, Any]) -> None:
+    """Fill in derived metadata (content hash) for an uploaded document."""
+    document = (
+        db.query(Document)
+        .filter(Document.id == payload["document_id"])
+        .first()
+    )
+    if document is None or document.content_hash:
+        return
+    s3_key = str(document.s3_key)
+    raw = _storage().open_stream(settings.S3_BUCKET_NAME, s3_key)
+    encoding = document.content_encoding
+    stream = open_decoded(raw, str(encoding) if encoding else None)
+    digest = hashlib.sha256()
+    try:
+        while chunk := stream.read(CHUNK_SIZE):
+            digest.update(chunk)
+    finally:
+        stream.close()
+        raw.close()
+    # Only record the hash if the content was not replaced meanwhile.
+    db.query(Document).filter(
+        Document.id == document.id, Document.s3_key == s3_key
+    ).update(
+        {Document.content_hash: digest.hexdigest()},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+@job_handler("document.index")
+def index_document_contents(db: Session, payload: Dict[str, Any]) -> None:
+    """Add or refresh a document in the full-text index."""
+    from app.services.search_service import index_document
+
+    document = db.get(Document, payload["document_id"])
+    if document is None:
+        return
+    if index_document(db, _storage(), document):
+        db.commit()
+
+
+@job_handler("storage.gc")
+def collect_storage(db: Session, payload: Dict[str, Any]) -> None:
+    """Drain the storage deletion queue."""
+    from app.services.storage_gc import drain_deletion_queue
+
+    batch_size = settings.STORAGE_GC_BATCH_SIZE
+    while drain_deletion_queue(db, _storage(), batch_size) >= batch_size:
+        pass
@@ -0,0 +1,253 @@
+"""
+Storage pipeline shared by the document endpoints.
+
+``store_content`` writes an upload to object storage and ``release_content``
+drops a document's reference to it; unreferenced objects are queued for the
+storage garbage collector rather than deleted inline. With ``STORAGE_DEDUP`` enabled, content
+is hashed while it is read and kept once under ``blobs/<sha256>``; the
+``storage_blobs`` table counts references so duplicate uploads skip the PUT
+and the object is only deleted when its last document goes away.
+
+A blob row whose count drops to zero stays behind as a tombstone until the
+garbage collector has deleted the object. Blob keys are deterministic, so
+an upload of the same content revives the tombstone (and re-writes the
+object) under its row lock instead of inserting a fresh row the collector
+could not see.
+"""
+
+import hashlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Sequence
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.domain.storage import S3ServiceInterface
+from app.models.document import Document
+from app.models.storage_blob import StorageBlob
+from app.services.s3_service_refactored import new_object_key
+from app.services.storage_codec import encode
+from app.services.storage_gc import enqueue_deletion
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StoredContent:
+    s3_key: str
+    size: int
+    content_hash: Optional[str] = None
+    content_encoding: Optional[str] = None
+
+
+def hash_stream(fileobj: BinaryIO) -> tuple[str, int]:
+    """Return the SHA-256 hex digest and size of a stream, then rewind it."""
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := fileobj.read(CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def blob_key(sha256: str) -> str:
+    return f"blobs/{sha256[:2]}/{sha256}"
+
+
+def _add_reference(
+    db: Session, sha256: str, revive: bool = False
+) -> Optional[StorageBlob]:
+    """
+    Count one more reference to a live blob (or, with ``revive``, to a
+    tombstone), locking its row until the caller's transaction ends.
+    """
+    live = (
+        StorageBlob.ref_count <= 0 if revive else StorageBlob.ref_count > 0
+    )
+    result = db.execute(
+        update(StorageBlob)
+        .where(StorageBlob.sha256 == sha256, live)
+        .values(ref_count=StorageBlob.ref_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:  # type: ignore[attr-defined]
+        return None
+    return (
+        db.query(StorageBlob)
+        .filter(StorageBlob.sha256 == sha256)
+        .populate_existing()
+        .one()
+    )
+
+
+def store_content(
+    db: Session,
+    s3_service: S3ServiceInterface,
+    fileobj: BinaryIO,
+    filename: str,
+    content_type: str,
+    project_id: Optional[int] = None,
+) -> StoredContent:
+    """
+    Write an upload to storage and return where it went.
+
+    ``size`` is always the original length; the stored object may be
+    smaller when ``STORAGE_COMPRESSION`` applies to the content type.
+    """
+    if not settings.STORAGE_DEDUP:
+        content = fileobj.read()
+        stored, encoding = encode(content, content_type)
+        s3_key = s3_service.upload_file(
+            stored,
+            filename,
+            content_type,
+            key=new_object_key(filename, project_id),
+            content_encoding=encoding,
+        )
+        return StoredContent(
+            s3_key=s3_key, size=len(content), content_encoding=encoding
+        )
+
+    sha256, size = hash_stream(fileobj)
+    blob = _add_reference(db, sha256)
+    if blob is not None:
+        return StoredContent(
+            str(blob.s3_key),
+            size,
+            sha256,
+            str(blob.content_encoding) if blob.content_encoding else None,
+        )
+
+    stored, encoding = encode(fileobj.read(), content_type)
+    tombstone = _add_reference(db, sha256, revive=True)
+    s3_key = s3_service.upload_file(
+        stored,
+        filename,
+        content_type,
+        key=blob_key(sha256),
+        content_encoding=encoding,
+    )
+    if tombstone is not None:
+        # The collector may already have deleted the old object; the row
+        # now counts a reference again, so it will leave this one alone.
+        tombstone.content_encoding = encoding  # type: ignore[assignment]
+        return StoredContent(s3_key, size, sha256, encoding)
+    try:
+        with db.begin_nested():
+            db.add(
+                StorageBlob(
+                    sha256=sha256,
+                    s3_key=s3_key,
+                    size=size,
+                    content_encoding=encoding,
+                    ref_count=1,
+                )
+            )
+    except IntegrityError:
+        # A concurrent upload of the same content won the insert; the
+        # object we just wrote is byte-identical, so share theirs.
+        blob = _add_reference(db, sha256) or _add_reference(
+            db, sha256, revive=True
+        )
+        if blob is None:
+            raise
+        encoding = (
+            str(blob.content_encoding) if blob.content_encoding else None
+        )
+    return StoredContent(s3_key, size, sha256, encoding)
+
+
+def drop_references(db: Session, s3_keys: Sequence[str]) -> list[str]:
+    """
+    Drop one reference for every entry of ``s3_keys``.
+
+    Returns the distinct keys that no document references any more. The
+    caller is responsible for getting those objects deleted; blob rows that
+    reach zero are kept as tombstones for the garbage collector to remove
+    together with the object.
+    """
+    counts = Counter(s3_keys)
+    blobs = (
+        db.query(StorageBlob.id, StorageBlob.s3_key)
+        .filter(StorageBlob.s3_key.in_(counts))
+        .all()
+    )
+    freed = set(counts) - {blob.s3_key for blob in blobs}
+    for blob in blobs:
+        db.execute(
+            update(StorageBlob)
+            .where(StorageBlob.id == blob.id)
+            .values(ref_count=StorageBlob.ref_count - counts[blob.s3_key])
+            .execution_options(synchronize_session=False)
+        )
+    if blobs:
+        freed.update(
+            row.s3_key
+            for row in db.query(StorageBlob.s3_key).filter(
+                StorageBlob.id.in_([blob.id for blob in blobs]),
+                StorageBlob.ref_count <= 0,
+            )
+        )
+    return sorted(freed)
+
+
+def release_contents(db: Session, s3_keys: Sequence[str]) -> list[str]:
+    """
+    Drop one reference for every entry of ``s3_keys``.
+
+    Objects that lost their last reference are queued for deletion by the
+    storage garbage collector, atomically with the caller's transaction.
+    Returns the queued keys.
+    """
+    freed = drop_references(db, s3_keys)
+    for key in freed:
+        enqueue_deletion(db, key)
+    return freed
+
+
+def release_content(db: Session, s3_key: str) -> bool:
+    """Drop one reference to ``s3_key``; True when its object was queued."""
+    return bool(release_contents(db, [s3_key]))
+
+
+def replace_content(
+    db: Session,
+    document: Document,
+    stored: StoredContent,
+    filename: str,
+    content_type: str,
+) -> bool:
+    """
+    Point ``document`` at newly stored content and bump its version.
+
+    The swap only applies if the row still has the version that was read,
+    so concurrent updates cannot both win; the loser gets False and must
+    discard its upload. The superseded object is released in the same
+    transaction, so it is only collected once the swap commits.
+    """
+    old_key = str(document.s3_key)
+    result = db.execute(
+        update(Document)
+        .where(
+            Document.id == document.id,
+            Document.version == document.version,
+        )
+        .values(
+            filename=filename,
+            s3_key=stored.s3_key,
+            content_type=content_type,
+            size=stored.size,
+            content_hash=stored.content_hash,
+            content_encoding=stored.content_encoding,
+            version=Document.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:  # type: ignore[attr-defined]
+        return False
+    release_content(db, old_key)
+    return True
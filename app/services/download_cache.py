@@ -0,0 +1,221 @@
+"""
+Read-through local disk cache for document downloads.
+
+Objects are cached by S3 key. Keys are never rewritten in place (an update
+stores the new content under a new key), so cached files never go stale
+and need no invalidation. The cache is bounded in bytes and evicts least
+recently used files, using mtime as the access clock.
+
+Several worker processes may share one directory: files are published with
+an atomic rename, readers get an open file rather than a path (so another
+worker evicting the entry cannot pull it out from under a response), and
+only one process evicts at a time (guarded by an advisory lock where
+available).
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+TMP_PREFIX = ".tmp-"
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class DiskCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._evicted_bytes = 0
+        self._approx_bytes = self._scan_total()
+
+    def _path_for(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def _entries(self) -> list[os.DirEntry]:
+        entries: list[os.DirEntry] = []
+        with os.scandir(self.directory) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as files:
+                    entries.extend(
+                        entry
+                        for entry in files
+                        if entry.is_file()
+                        and not entry.name.startswith(TMP_PREFIX)
+                    )
+        return entries
+
+    def _scan_total(self) -> int:
+        total = 0
+        for entry in self._entries():
+            try:
+                total += entry.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+    def get(self, key: str) -> Optional[BinaryIO]:
+        """Open the cached file for ``key``, or return None on a miss.
+
+        The caller owns the returned file and must close it; it stays
+        readable even if the entry is evicted meanwhile.
+        """
+        path = self._path_for(key)
+        try:
+            cached = open(path, "rb")
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return None
+        try:
+            # Touch to mark the entry as recently used.
+            os.utime(cached.fileno())
+        except OSError:
+            pass
+        with self._lock:
+            self._hits += 1
+        return cached
+
+    def put(self, key: str, content: bytes) -> str:
+        """Store ``content`` under ``key`` and return the cached file path."""
+        path = self._path_for(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._approx_bytes += len(content)
+            over_budget = self._approx_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+        return str(path)
+
+    def fetch(self, key: str, loader: Callable[[], bytes]) -> BinaryIO:
+        """Open the cached file, loading and storing it on a miss."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        content = loader()
+        path = self.put(key, content)
+        try:
+            return open(path, "rb")
+        except FileNotFoundError:
+            # Evicted before we got to it; serve what was just loaded.
+            return io.BytesIO(content)
+
+    def evict(self) -> int:
+        """Remove least recently used files until under budget."""
+        lock_file = open(self.directory / ".evict.lock", "a")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Another worker is already evicting.
+                    return 0
+            return self._evict_locked()
+        finally:
+            lock_file.close()
+
+    def _evict_locked(self) -> int:
+        stats = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            stats.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in stats)
+        removed = 0
+        removed_bytes = 0
+        for _, size, path in sorted(stats):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            else:
+                removed += 1
+                removed_bytes += size
+            total -= size
+        with self._lock:
+            self._approx_bytes = total
+            self._evictions += removed
+            self._evicted_bytes += removed_bytes
+        if removed:
+            logger.info(
+                "Download cache evicted %d file(s), %d bytes",
+                removed,
+                removed_bytes,
+            )
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "evicted_bytes": self._evicted_bytes,
+                "approx_bytes": self._approx_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def iter_file(cached: BinaryIO) -> Iterator[bytes]:
+    """Yield the contents of ``cached`` in chunks, then close it."""
+    with cached:
+        while chunk := cached.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+_cache: Optional[DiskCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_download_cache() -> Optional[DiskCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _cache
+    from app.core.config import settings
+
+    if not settings.DOWNLOAD_CACHE_DIR:
+        return None
+    with _cache_lock:
+        if (
+            _cache is None
+            or _cache.directory != Path(settings.DOWNLOAD_CACHE_DIR)
+            or _cache.max_bytes != settings.DOWNLOAD_CACHE_MAX_BYTES
+        ):
+            _cache = DiskCache(
+                settings.DOWNLOAD_CACHE_DIR,
+                settings.DOWNLOAD_CACHE_MAX_BYTES,
+            )
+        return _cache
@@ -0,0 +1,582 @@
+"""
+Transactional outbox for invitation emails and the worker that sends it.
+
+Requests never send email themselves: ``enqueue_invite`` adds a row to
+``email_outbox`` in the same transaction as the change that triggered it,
+so a message exists exactly when that change was committed and is not
+lost if the process restarts. Dispatcher workers claim due rows in
+batches (``EMAIL_BATCH_SIZE``), hand each batch to the transport as one
+call (one SES ``SendBulkTemplatedEmail`` for up to 50 recipients), pace
+sends to the account's SES sending rate and reschedule throttled or
+transient failures with jittered exponential backoff.
+
+Workers run as a thread inside the API process (``EMAIL_POLL_INTERVAL``)
+or as separate processes via ``python -m app.cli send-emails``. Pacing is
+per process, so the rate is split evenly over ``EMAIL_DISPATCHERS``: set
+it to the number of processes that send at the same time.
+
+``SESTransport`` holds the process's one pooled SES client.
+``RecordingTransport`` is the local stand-in used with ``USE_MOCK_EMAIL``
+and in tests: it prints and records messages instead of sending them.
+"""
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.services.ses_email_service import (
+    INVITE_SUBJECT,
+    INVITE_TEXT,
+    invite_html,
+)
+
+logger = logging.getLogger(__name__)
+
+# Whole-request SES errors worth retrying.
+RETRYABLE_ERRORS = {
+    "Throttling",
+    "ThrottlingException",
+    "ServiceUnavailable",
+    "InternalFailure",
+    "RequestTimeout",
+}
+# Per-destination statuses of a bulk send worth retrying.
+RETRYABLE_STATUSES = {"AccountThrottled", "TransientFailure", "Failed"}
+# Named in place of an unknown inviter
+DEFAULT_INVITER = "A project member"
+
+
+@dataclass(frozen=True)
+class InviteEmail:
+    to: str
+    project_name: str
+    join_link: str
+    inviter: str = ""
+
+
+class SendError(Exception):
+    """Why one message was not sent, and whether trying again may help."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class EmailTransport(ABC):
+    """Delivers batches of invitation emails."""
+
+    #: Most messages ``send_invites`` accepts in one call.
+    max_batch = 1
+
+    @abstractmethod
+    def send_invites(
+        self, emails: Sequence[InviteEmail]
+    ) -> List[Optional[SendError]]:
+        """Send ``emails``; return None or the error for each, in order."""
+
+    def max_send_rate(self) -> Optional[float]:
+        """Recipients per second the provider allows, if it has a limit."""
+        return None
+
+
+class RecordingTransport(EmailTransport):
+    """Records and prints messages instead of sending them."""
+
+    max_batch = 50
+
+    def __init__(self):
+        self.sent: List[InviteEmail] = []
+        self.batches: List[int] = []
+        self._lock = threading.Lock()
+
+    def send_invites(
+        self, emails: Sequence[InviteEmail]
+    ) -> List[Optional[SendError]]:
+        with self._lock:
+            self.sent.extend(emails)
+            self.batches.append(len(emails))
+        for email in emails:
+            print(
+                f"Mock email: {email.inviter} invited you to {email.project_name}"
+            )
+            print(f"Sent to: {email.to}")
+            print(f"Join link: {email.join_link}")
+        return [None] * len(emails)
+
+
+def invite_template(name: str) -> dict:
+    """SES template of the invitation email.
+
+    The subject and text parts use triple braces so SES does not
+    HTML-escape the link; the HTML part uses double braces so it does.
+    """
+    return {
+        "TemplateName": name,
+        "SubjectPart": INVITE_SUBJECT.format(
+            project_name="{{{project_name}}}"
+        ),
+        "TextPart": INVITE_TEXT.format(
+            project_name="{{{project_name}}}",
+            join_link="{{{join_link}}}",
+            inviter="{{{inviter}}}",
+        ),
+        "HtmlPart": invite_html(
+            "{{project_name}}", "{{join_link}}", "{{inviter}}"
+        ),
+    }
+
+
+class SESTransport(EmailTransport):
+    """Sends invitations as SES bulk templated emails."""
+
+    max_batch = 50  # SendBulkTemplatedEmail destination limit
+
+    def __init__(
+        self,
+        sender_email: str,
+        template_name: str,
+        aws_region: str = "us-east-1",
+        aws_access_key_id: Optional[str] = None,
+        aws_secret_access_key: Optional[str] = None,
+        client=None,
+    ):
+        self.sender_email = sender_email
+        self.template_name = template_name
+        if client is None:
+            import boto3
+            from botocore.config import Config
+
+            client_kwargs = {"region_name": aws_region}
+            if aws_access_key_id and aws_secret_access_key:
+                client_kwargs["aws_access_key_id"] = aws_access_key_id
+                client_kwargs["aws_secret_access_key"] = (
+                    aws_secret_access_key
+                )
+            client = boto3.client(
+                "ses",
+                config=Config(
+                    connect_timeout=5,
+                    read_timeout=30,
+                    # The dispatcher retries with its own backoff.
+                    retries={"mode": "standard", "max_attempts": 1},
+                    tcp_keepalive=True,
+                ),
+                **client_kwargs,
+            )
+        self.client = client
+        self._template_ready = False
+
+    def ensure_template(self) -> None:
+        """Create or refresh the SES template once per process."""
+        if self._template_ready:
+            return
+        from botocore.exceptions import ClientError
+
+        template = invite_template(self.template_name)
+        try:
+            self.client.create_template(Template=template)
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code not in ("AlreadyExists", "TemplateNameAlreadyExists"):
+                raise
+            self.client.update_template(Template=template)
+        self._template_ready = True
+
+    def send_invites(
+        self, emails: Sequence[InviteEmail]
+    ) -> List[Optional[SendError]]:
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            self.ensure_template()
+            response = self.client.send_bulk_templated_email(
+                Source=self.sender_email,
+                Template=self.template_name,
+                DefaultTemplateData=json.dumps(
+                    {
+                        "project_name": "",
+                        "join_link": "",
+                        "inviter": DEFAULT_INVITER,
+                    }
+                ),
+                Destinations=[
+                    {
+                        "Destination": {"ToAddresses": [email.to]},
+                        "ReplacementTemplateData": json.dumps(
+                            {
+                                "project_name": email.project_name,
+                                "join_link": email.join_link,
+                                "inviter": email.inviter or DEFAULT_INVITER,
+                            }
+                        ),
+                    }
+                    for email in emails
+                ],
+            )
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "TemplateDoesNotExist":
+                self._template_ready = False
+            error = SendError(
+                f"{code}: {e.response['Error'].get('Message', '')}",
+                retryable=code in RETRYABLE_ERRORS
+                or code == "TemplateDoesNotExist",
+            )
+            return [error] * len(emails)
+        except BotoCoreError as e:
+            return [SendError(str(e), retryable=True)] * len(emails)
+
+        statuses = response.get("Status") or []
+        results: List[Optional[SendError]] = []
+        for index in range(len(emails)):
+            # A destination without a status entry was accepted.
+            status = statuses[index] if index < len(statuses) else {}
+            code = status.get("Status", "Success")
+            if code == "Success":
+                results.append(None)
+            else:
+                results.append(
+                    SendError(
+                        f"{code}: {status.get('Error', '')}",
+                        retryable=code in RETRYABLE_STATUSES,
+                    )
+                )
+        return results
+
+    def max_send_rate(self) -> Optional[float]:
+        try:
+            return float(self.client.get_send_quota()["MaxSendRate"]) or None
+        except Exception:
+            logger.warning(
+                "Could not read the SES send quota", exc_info=True
+            )
+            return None
+
+
+class RateLimiter:
+    """
+    Paces sends to ``rate`` recipients per second.
+
+    Each call reserves ``n / rate`` seconds of the schedule, so a batch
+    larger than one second's quota waits for its share rather than
+    bursting past the limit.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = clock()
+
+    def acquire(self, n: int = 1) -> float:
+        """Wait until ``n`` recipients may be sent; return the wait."""
+        with self._lock:
+            now = self._clock()
+            start = max(self._next, now)
+            self._next = start + n / self.rate
+        wait = start - now
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+def send_rate_limiter(
+    transport: EmailTransport,
+    max_send_rate: float = 0,
+    dispatchers: int = 1,
+) -> Optional[RateLimiter]:
+    """
+    This process's limiter: its share of the send rate, or None if unknown.
+
+    ``max_send_rate`` falls back to the transport's (SES) account rate.
+    """
+    rate = max_send_rate or transport.max_send_rate()
+    if not rate:
+        return None
+    return RateLimiter(rate / max(1, dispatchers))
+
+
+def retry_delay(attempts: int, base: float, ceiling: float) -> float:
+    """Exponential backoff with jitter, capped at ``ceiling``."""
+    delay = min(ceiling, base * 2 ** max(attempts - 1, 0))
+    return random.uniform(delay / 2, delay)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue_invite(db: Session, email: InviteEmail) -> EmailOutbox:
+    """Queue ``email``; it becomes visible to workers when the caller commits."""
+    row = EmailOutbox(
+        kind="invite",
+        recipient=email.to,
+        payload=json.dumps(
+            {
+                "project_name": email.project_name,
+                "join_link": email.join_link,
+                "inviter": email.inviter,
+            }
+        ),
+        max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    )
+    db.add(row)
+    return row
+
+
+def _invite(row: EmailOutbox) -> InviteEmail:
+    return InviteEmail(to=str(row.recipient), **json.loads(str(row.payload)))
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(EmailOutbox.status == "pending", EmailOutbox.send_after <= now),
+        and_(
+            EmailOutbox.status == "sending", EmailOutbox.locked_until < now
+        ),
+    )
+
+
+def claim_emails(
+    db: Session, worker_id: str, limit: int = 50
+) -> List[EmailOutbox]:
+    """
+    Claim up to ``limit`` due emails for ``worker_id`` and commit the claim.
+
+    Candidates are read with ``FOR UPDATE SKIP LOCKED`` on PostgreSQL, so
+    concurrent workers take disjoint batches. The claim itself is one
+    conditional UPDATE, which is what keeps SQLite (which has no row locks
+    and ignores the clause) from handing a row to two workers. Claims
+    expire after ``EMAIL_LEASE_SECONDS``, so rows of a worker that died
+    mid-send are picked up again.
+    """
+    now = _utcnow()
+    candidates = [
+        row.id
+        for row in db.query(EmailOutbox.id)
+        .filter(_claimable(now))
+        .order_by(EmailOutbox.send_after, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ]
+    if not candidates:
+        db.commit()
+        return []
+    locked_until = now + timedelta(seconds=settings.EMAIL_LEASE_SECONDS)
+    db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(candidates), _claimable(now))
+        .values(
+            status="sending",
+            locked_by=worker_id,
+            locked_until=locked_until,
+            attempts=EmailOutbox.attempts + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return (
+        db.query(EmailOutbox)
+        .filter(
+            EmailOutbox.id.in_(candidates),
+            EmailOutbox.status == "sending",
+            EmailOutbox.locked_by == worker_id,
+            EmailOutbox.locked_until == locked_until,
+        )
+        .order_by(EmailOutbox.send_after, EmailOutbox.id)
+        .all()
+    )
+
+
+def send_claimed(
+    db: Session,
+    rows: List[EmailOutbox],
+    transport: EmailTransport,
+    limiter: Optional[RateLimiter] = None,
+) -> int:
+    """Send claimed rows as one batch, record the outcomes, return sent."""
+    if limiter is not None:
+        limiter.acquire(len(rows))
+    try:
+        results = transport.send_invites([_invite(row) for row in rows])
+    except Exception as e:
+        logger.exception("Email transport failed")
+        error = SendError(f"{type(e).__name__}: {e}", retryable=True)
+        results = [error] * len(rows)
+
+    now = _utcnow()
+    sent = 0
+    for row, result in zip(rows, results):
+        row.locked_by = None  # type: ignore[assignment]
+        row.locked_until = None  # type: ignore[assignment]
+        if result is None:
+            row.status = "sent"  # type: ignore[assignment]
+            row.sent_at = now  # type: ignore[assignment]
+            sent += 1
+            continue
+        row.last_error = str(result)  # type: ignore[assignment]
+        attempts = int(row.attempts)  # type: ignore[arg-type]
+        if result.retryable and attempts < int(row.max_attempts):  # type: ignore[arg-type]
+            row.status = "pending"  # type: ignore[assignment]
+            row.send_after = now + timedelta(  # type: ignore[assignment]
+                seconds=retry_delay(
+                    attempts,
+                    settings.EMAIL_RETRY_BASE_DELAY,
+                    settings.EMAIL_RETRY_MAX_DELAY,
+                )
+            )
+        else:
+            row.status = "failed"  # type: ignore[assignment]
+            logger.error(
+                "Could not send email %s to %s: %s",
+                row.id,
+                row.recipient,
+                result,
+            )
+    db.commit()
+    return sent
+
+
+def dispatch_pending(
+    db: Session,
+    transport: EmailTransport,
+    worker_id: str = "inline",
+    batch_size: int = 50,
+    limit: int = 1000,
+    limiter: Optional[RateLimiter] = None,
+) -> int:
+    """Send due emails until none are left (or ``limit``); return the count."""
+    batch_size = max(1, min(batch_size, transport.max_batch))
+    processed = 0
+    while processed < limit:
+        rows = claim_emails(
+            db, worker_id, min(batch_size, limit - processed)
+        )
+        if not rows:
+            break
+        send_claimed(db, rows, transport, limiter)
+        processed += len(rows)
+    return processed
+
+
+class EmailDispatcher(threading.Thread):
+    """Daemon thread that claims outbox batches and sends them."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        transport: EmailTransport,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        linger: float = 0.05,
+        max_send_rate: float = 0,
+        dispatchers: int = 1,
+        name: str = "email-dispatcher",
+    ):
+        super().__init__(name=name, daemon=True)
+        self.session_factory = session_factory
+        self.transport = transport
+        self.batch_size = max(1, min(batch_size, transport.max_batch))
+        self.poll_interval = poll_interval
+        self.linger = linger
+        self.max_send_rate = max_send_rate
+        self.dispatchers = dispatchers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{name}"
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        # Queried here rather than in __init__: it is a network call.
+        limiter = send_rate_limiter(
+            self.transport, self.max_send_rate, self.dispatchers
+        )
+        while not self._stop_event.is_set():
+            busy = False
+            db = self.session_factory()
+            try:
+                rows = claim_emails(db, self.worker_id, self.batch_size)
+                if rows:
+                    busy = True
+                    send_claimed(db, rows, self.transport, limiter)
+            except Exception:
+                logger.exception(
+                    "Email dispatcher %s poll failed", self.name
+                )
+            finally:
+                db.close()
+            if not busy and self._wake.wait(self.poll_interval):
+                # Woken by a new email: give the rest of a burst a moment
+                # to commit so it goes out in the same batch.
+                self._stop_event.wait(self.linger)
+            self._wake.clear()
+
+    def wake(self) -> None:
+        """Poll now instead of at the next interval."""
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        self._wake.set()
+        self.join(timeout)
+
+
+def build_transport() -> EmailTransport:
+    if settings.USE_MOCK_EMAIL:
+        return RecordingTransport()
+    return SESTransport(
+        sender_email=settings.SES_SENDER_EMAIL,
+        template_name=settings.SES_INVITE_TEMPLATE,
+        aws_region=settings.SES_AWS_REGION,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+    )
+
+
+_dispatcher: Optional[EmailDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def start_email_dispatcher(
+    session_factory: Callable[[], Session],
+) -> EmailDispatcher:
+    """Start this process's dispatcher thread unless it is running."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None or not _dispatcher.is_alive():
+            _dispatcher = EmailDispatcher(
+                session_factory,
+                build_transport(),
+                batch_size=settings.EMAIL_BATCH_SIZE,
+                poll_interval=settings.EMAIL_POLL_INTERVAL,
+                linger=settings.EMAIL_BATCH_LINGER_SECONDS,
+                max_send_rate=settings.EMAIL_MAX_SEND_RATE,
+                dispatchers=settings.EMAIL_DISPATCHERS,
+            )
+            _dispatcher.start()
+        return _dispatcher
+
+
+def wake_email_dispatcher() -> None:
+    """Nudge this process's dispatcher, if any, after queueing email."""
+    dispatcher = _dispatcher
+    if dispatcher is not None:
+        dispatcher.wake()
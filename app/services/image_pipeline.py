@@ -0,0 +1,414 @@
+"""
+Decode-once image rendition pipeline.
+
+The source is decoded a single time, at the smallest resolution that still
+covers the largest requested rendition: for JPEGs ``Image.draft`` lets
+libjpeg scale by 1/2, 1/4 or 1/8 while decoding, so a 24 MP photo destined
+for a 1600 px rendition never materializes at full size. Renditions are
+then produced largest first, each resized from the previous one.
+
+Passing an :class:`ImageBudget` turns on guarded mode: the object is
+streamed into a spooled temporary file rather than held as bytes, and the
+header dimensions are checked before any pixel data is decoded, so
+oversized uploads and decompression bombs are rejected cheaply.
+
+Renditions can also carry modern-format variants (WebP, AVIF). Their
+encoder quality is binary-searched for the lowest setting that still meets
+a PSNR target against the resized image (or the highest within a byte
+budget), and a variant is only kept when it beats the base rendition. A
+JSON manifest of what was written lets the API pick the smallest format a
+client accepts without listing the bucket.
+
+Only the standard library and Pillow are used so the module can be shipped
+inside the Lambda package next to ``lambda_function.py``.
+"""
+
+import io
+import math
+import tempfile
+import warnings
+from dataclasses import dataclass
+from typing import (
+    IO,
+    Any,
+    BinaryIO,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from PIL import Image, ImageChops, ImageOps, ImageStat
+
+DEFAULT_RENDITIONS_SPEC = "thumb:150x150,medium:800x800,large:1600x1600"
+
+# Formats renditions keep; anything else is re-encoded as JPEG
+PASSTHROUGH_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+CONTENT_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+    "AVIF": "image/avif",
+}
+EXTENSIONS = {
+    "JPEG": "jpg",
+    "PNG": "png",
+    "WEBP": "webp",
+    "GIF": "gif",
+    "AVIF": "avif",
+}
+# Smallest first; encoders missing from this Pillow build are skipped
+MODERN_FORMATS = ("AVIF", "WEBP")
+
+
+# Streamed sources above this size spill from memory to disk
+SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+class ImageTooLarge(ValueError):
+    """The image is over its byte or pixel budget and was not decoded."""
+
+
+@dataclass(frozen=True)
+class ImageBudget:
+    max_bytes: int = 100 * 1024 * 1024
+    # Header dimensions; Pillow refuses anything above 2x its own
+    # MAX_IMAGE_PIXELS regardless.
+    max_source_pixels: int = 150_000_000
+    # Pixels actually decoded, after JPEG draft reduction. Peak memory is
+    # roughly this times the bytes per pixel (3 for RGB).
+    max_decoded_pixels: int = 40_000_000
+
+
+@dataclass(frozen=True)
+class QualityTarget:
+    """
+    Goal of the variant quality search: the lowest quality reaching
+    ``min_psnr`` (dB) or, without one, the highest within ``max_bytes``.
+    """
+
+    min_psnr: Optional[float] = 40.0
+    max_bytes: Optional[int] = None
+    min_quality: int = 30
+    max_quality: int = 90
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    max_width: int
+    max_height: int
+    format: Optional[str] = None  # None = keep the source format
+    quality: int = 85
+    variants: Tuple[str, ...] = ()  # extra formats, e.g. ("AVIF", "WEBP")
+
+
+@dataclass
+class RenderedImage:
+    name: str
+    data: bytes
+    width: int
+    height: int
+    format: str
+    variant: bool = False
+    quality: Optional[int] = None
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES.get(self.format, "application/octet-stream")
+
+
+def parse_renditions(spec: str) -> Tuple[Rendition, ...]:
+    """Parse ``"thumb:150x150,medium:800x800"`` into renditions."""
+    renditions = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, box = item.partition(":")
+        width, _, height = box.lower().partition("x")
+        if not name or not width.isdigit() or not height.isdigit():
+            raise ValueError(f"Invalid rendition spec: {item!r}")
+        renditions.append(Rendition(name, int(width), int(height)))
+    if not renditions:
+        raise ValueError("At least one rendition is required")
+    return tuple(renditions)
+
+
+def parse_formats(spec: str) -> Tuple[str, ...]:
+    """Parse ``"avif,webp"`` into the formats this Pillow can encode."""
+    formats = tuple(
+        part.strip().upper() for part in spec.split(",") if part.strip()
+    )
+    unknown = [f for f in formats if f not in CONTENT_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown image formats: {', '.join(unknown)}")
+    return tuple(f for f in formats if can_encode(f))
+
+
+def can_encode(image_format: str) -> bool:
+    Image.init()
+    return image_format in Image.SAVE
+
+
+def rendition_key(
+    name: str, key: str, image_format: Optional[str] = None
+) -> str:
+    """Key of a rendition of ``key``; variants add their extension."""
+    base = f"resized/{name}/{key}"
+    return f"{base}.{EXTENSIONS[image_format]}" if image_format else base
+
+
+def output_key(image: RenderedImage, key: str) -> str:
+    """Where a rendered image of ``key`` is stored."""
+    return rendition_key(
+        image.name, key, image.format if image.variant else None
+    )
+
+
+def manifest_key(key: str) -> str:
+    return f"resized/{key}.renditions.json"
+
+
+def build_manifest(key: str, rendered: Sequence[RenderedImage]) -> dict:
+    """Describe every stored rendition of ``key``, grouped by name."""
+    manifest: Dict[str, List[Dict[str, Any]]] = {}
+    for image in rendered:
+        manifest.setdefault(image.name, []).append(
+            {
+                "key": output_key(image, key),
+                "format": image.format,
+                "content_type": image.content_type,
+                "bytes": len(image.data),
+                "width": image.width,
+                "height": image.height,
+                "variant": image.variant,
+            }
+        )
+    return {"source": key, "renditions": manifest}
+
+
+def fit_within(
+    size: Tuple[int, int], box: Tuple[int, int]
+) -> Tuple[int, int]:
+    """Largest size with the aspect ratio of ``size`` inside ``box``."""
+    width, height = size
+    scale = min(box[0] / width, box[1] / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def spool(
+    stream: BinaryIO, max_bytes: int, memory_bytes: int = SPOOL_MEMORY_BYTES
+) -> IO[bytes]:
+    """
+    Copy ``stream`` into a spooled temporary file, rewound for reading.
+
+    Raises :class:`ImageTooLarge` as soon as more than ``max_bytes`` have
+    been read.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=memory_bytes)
+    total = 0
+    while chunk := stream.read(SPOOL_CHUNK_BYTES):
+        total += len(chunk)
+        if total > max_bytes:
+            spooled.close()
+            raise ImageTooLarge(f"Image is over {max_bytes} bytes")
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+
+def _check_pixels(size: Tuple[int, int], limit: int, what: str) -> None:
+    if size[0] * size[1] > limit:
+        raise ImageTooLarge(
+            f"{what} size {size[0]}x{size[1]} is over {limit} pixels"
+        )
+
+
+def decode(
+    source: Union[bytes, IO[bytes]],
+    max_box: Tuple[int, int],
+    budget: Optional[ImageBudget] = None,
+) -> Image.Image:
+    """
+    Decode ``source`` just large enough to cover ``max_box``.
+
+    Applies the EXIF orientation. The returned image is fully loaded. With
+    a ``budget`` the header and reduced dimensions are checked first.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        with warnings.catch_warnings():
+            if budget is not None:
+                # Our own limits apply instead.
+                warnings.simplefilter(
+                    "ignore", Image.DecompressionBombWarning
+                )
+            image: Image.Image = Image.open(source)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e)) from e
+    if budget is not None:
+        _check_pixels(image.size, budget.max_source_pixels, "Image")
+    source_format = image.format
+    if image.format == "JPEG":
+        # Rotated photos have their stored axes swapped.
+        orientation = image.getexif().get(0x0112, 1)
+        box = max_box[::-1] if orientation in (5, 6, 7, 8) else max_box
+        image.draft("RGB", fit_within(image.size, box))
+    if budget is not None:
+        _check_pixels(image.size, budget.max_decoded_pixels, "Decoded")
+    image.load()
+    image = ImageOps.exif_transpose(image)
+    image.format = source_format
+    return image
+
+
+# Encoder effort for the final output and for the quality search probes,
+# whose quality-to-size curve is close enough at a fraction of the cost.
+ENCODER_OPTIONS = {"AVIF": {"speed": 8}, "WEBP": {"method": 4}}
+PROBE_OPTIONS = {"AVIF": {"speed": 10}, "WEBP": {"method": 2}}
+
+
+def _encode(
+    image: Image.Image, image_format: str, quality: int, probe: bool = False
+) -> bytes:
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    options = {"quality": quality} if image_format != "PNG" else {}
+    options.update(
+        (PROBE_OPTIONS if probe else ENCODER_OPTIONS).get(image_format, {})
+    )
+    image.save(buffer, format=image_format, optimize=True, **options)
+    return buffer.getvalue()
+
+
+def psnr(reference: Image.Image, candidate: Image.Image) -> float:
+    """Peak signal-to-noise ratio of ``candidate`` in dB."""
+    stat = ImageStat.Stat(ImageChops.difference(reference, candidate))
+    mse = sum(rms * rms for rms in stat.rms) / len(stat.rms)
+    return math.inf if mse == 0 else 10 * math.log10(255**2 / mse)
+
+
+def encode_tuned(
+    image: Image.Image, image_format: str, target: QualityTarget
+) -> Tuple[bytes, int]:
+    """Binary-search the encoder quality toward ``target``."""
+    has_alpha = "A" in image.getbands() or "transparency" in image.info
+    reference = image.convert("RGBA" if has_alpha else "RGB")
+    min_psnr, max_bytes = target.min_psnr, target.max_bytes
+    low, high = target.min_quality, target.max_quality
+    # Where the search ends up when the target cannot be met
+    quality = high if min_psnr is not None else low
+    while (min_psnr is not None or max_bytes is not None) and low <= high:
+        probe = (low + high) // 2
+        data = _encode(reference, image_format, probe, probe=True)
+        if min_psnr is not None:
+            decoded = Image.open(io.BytesIO(data)).convert(reference.mode)
+            if psnr(reference, decoded) >= min_psnr:
+                quality, high = probe, probe - 1
+            else:
+                low = probe + 1
+        elif max_bytes is not None and len(data) <= max_bytes:
+            quality, low = probe, probe + 1
+        else:
+            high = probe - 1
+    return _encode(reference, image_format, quality), quality
+
+
+def render(
+    image: Image.Image,
+    renditions: Sequence[Rendition],
+    target: Optional[QualityTarget] = None,
+) -> List[RenderedImage]:
+    """
+    Produce every rendition from one decoded image.
+
+    Each rendition comes first in the result, followed by whichever of
+    its variants came out smaller than it.
+    """
+    source_format = image.format or "JPEG"
+    target = target or QualityTarget()
+    results: Dict[str, List[RenderedImage]] = {}
+    current = image
+    ordered = sorted(
+        renditions, key=lambda r: r.max_width * r.max_height, reverse=True
+    )
+    for rendition in ordered:
+        # Sized from the source so rounding does not drift down the chain.
+        size = fit_within(
+            image.size, (rendition.max_width, rendition.max_height)
+        )
+        if size != current.size:
+            current = current.resize(
+                size, Image.Resampling.LANCZOS, reducing_gap=3.0
+            )
+        image_format = rendition.format or (
+            source_format if source_format in PASSTHROUGH_FORMATS else "JPEG"
+        )
+        base = RenderedImage(
+            name=rendition.name,
+            data=_encode(current, image_format, rendition.quality),
+            width=current.width,
+            height=current.height,
+            format=image_format,
+        )
+        results[rendition.name] = [base]
+        for variant_format in rendition.variants:
+            if variant_format == image_format or not can_encode(
+                variant_format
+            ):
+                continue
+            data, quality = encode_tuned(current, variant_format, target)
+            if len(data) < len(base.data):
+                results[rendition.name].append(
+                    RenderedImage(
+                        name=rendition.name,
+                        data=data,
+                        width=current.width,
+                        height=current.height,
+                        format=variant_format,
+                        variant=True,
+                        quality=quality,
+                    )
+                )
+    return [
+        image
+        for rendition in renditions
+        for image in results[rendition.name]
+    ]
+
+
+def render_renditions(
+    source: Union[bytes, IO[bytes]],
+    renditions: Sequence[Rendition],
+    budget: Optional[ImageBudget] = None,
+    target: Optional[QualityTarget] = None,
+) -> List[RenderedImage]:
+    """Decode ``source`` once and return the requested renditions."""
+    max_box = (
+        max(r.max_width for r in renditions),
+        max(r.max_height for r in renditions),
+    )
+    return render(decode(source, max_box, budget), renditions, target)
+
+
+def render_object(
+    body: BinaryIO,
+    renditions: Sequence[Rendition],
+    budget: ImageBudget,
+    content_length: Optional[int] = None,
+    target: Optional[QualityTarget] = None,
+) -> List[RenderedImage]:
+    """
+    Guarded rendering of a streamed object, e.g. an S3 ``Body``.
+
+    Peak memory is bounded by the spool buffer plus the decoded-pixel
+    budget, whatever the size of the upload.
+    """
+    if content_length is not None and content_length > budget.max_bytes:
+        raise ImageTooLarge(f"Image is over {budget.max_bytes} bytes")
+    with spool(body, budget.max_bytes) as source:
+        return render_renditions(source, renditions, budget, target)
@@ -0,0 +1,337 @@
+"""
+In-process background job queue backed by the ``jobs`` table.
+
+Handlers are registered per job kind with ``@job_handler("kind")``. Workers
+claim due jobs in priority order and hold them for a visibility timeout;
+a job whose worker died becomes claimable again once that timeout passes,
+or is marked failed if it has no attempts left. Outcomes are recorded only
+while the worker still holds the lease. Failed jobs are retried with
+exponential backoff and jitter until ``max_attempts`` is reached, and
+finished jobs are deleted after ``JOB_RETENTION_DAYS``.
+
+Workers run as threads inside the API process (``JOB_WORKERS``) or as
+separate processes via ``python -m app.cli run-jobs``.
+"""
+
+import importlib
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Session, Dict[str, Any]], None]
+
+# How often each worker deletes finished jobs past their retention.
+PURGE_INTERVAL_SECONDS = 3600.0
+
+# Modules whose import registers job handlers.
+HANDLER_MODULES = (
+    "app.services.document_jobs",
+    "app.services.upload_sessions",
+)
+
+_handlers: Dict[str, JobHandler] = {}
+_handlers_loaded = False
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register the decorated function as the handler for ``kind``."""
+
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+
+    return register
+
+
+def load_handlers() -> None:
+    global _handlers_loaded
+    if not _handlers_loaded:
+        for module in HANDLER_MODULES:
+            importlib.import_module(module)
+        _handlers_loaded = True
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    priority: int = 0,
+    delay: float = 0.0,
+    unique: bool = False,
+) -> Optional[Job]:
+    """
+    Add a job; it becomes visible to workers when the caller commits.
+
+    With ``unique`` the job is skipped (and None returned) if an identical
+    job is already waiting, which keeps bursts of triggers cheap.
+    """
+    body = json.dumps(payload or {}, sort_keys=True)
+    if unique:
+        exists = (
+            db.query(Job.id)
+            .filter(
+                Job.kind == kind, Job.payload == body, Job.status == "queued"
+            )
+            .first()
+        )
+        if exists is not None:
+            return None
+    job = Job(
+        kind=kind,
+        payload=body,
+        priority=priority,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_after=_utcnow() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    return job
+
+
+def _lease_expired(now: datetime):
+    return and_(Job.status == "running", Job.locked_until < now)
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(_lease_expired(now), Job.attempts < Job.max_attempts),
+    )
+
+
+def _fail_exhausted(db: Session, now: datetime) -> int:
+    """Mark jobs whose final attempt's lease expired as failed."""
+    result = db.execute(
+        update(Job)
+        .where(_lease_expired(now), Job.attempts >= Job.max_attempts)
+        .values(
+            status="failed",
+            locked_by=None,
+            locked_until=None,
+            last_error="Lease expired during the final attempt",
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    count = int(result.rowcount)  # type: ignore[attr-defined]
+    if count:
+        logger.error("%d job(s) failed permanently on lease expiry", count)
+    return count
+
+
+def claim_jobs(db: Session, worker_id: str, limit: int = 1) -> List[Job]:
+    """
+    Claim up to ``limit`` due jobs for ``worker_id`` and commit the claim.
+
+    Candidates are read with ``FOR UPDATE SKIP LOCKED`` where supported; each
+    claim is a conditional UPDATE, so two workers can never hold one job.
+    """
+    now = _utcnow()
+    _fail_exhausted(db, now)
+    candidates = [
+        row.id
+        for row in db.query(Job.id)
+        .filter(_claimable(now))
+        .order_by(Job.priority.desc(), Job.run_after, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ]
+    claimed = []
+    locked_until = now + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT)
+    for job_id in candidates:
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_until=locked_until,
+                attempts=Job.attempts + 1,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:  # type: ignore[attr-defined]
+            claimed.append(job_id)
+    db.commit()
+    if not claimed:
+        return []
+    return (
+        db.query(Job)
+        .filter(Job.id.in_(claimed))
+        .order_by(Job.priority.desc(), Job.run_after, Job.id)
+        .all()
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at JOB_RETRY_MAX_DELAY."""
+    ceiling = min(
+        settings.JOB_RETRY_MAX_DELAY,
+        settings.JOB_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0),
+    )
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _record_outcome(
+    db: Session, job_id: int, owner: Optional[str], **values: Any
+) -> bool:
+    """Apply ``values`` to the job if ``owner`` still holds its lease."""
+    result = db.execute(
+        update(Job)
+        .where(
+            Job.id == job_id, Job.status == "running", Job.locked_by == owner
+        )
+        .values(locked_until=None, updated_at=_utcnow(), **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount != 1:  # type: ignore[attr-defined]
+        logger.warning(
+            "Job %s lease was lost by %s; outcome not recorded",
+            job_id,
+            owner,
+        )
+        return False
+    return True
+
+
+def run_job(db: Session, job: Job) -> bool:
+    """Run one claimed job, record the outcome and return success."""
+    load_handlers()
+    job_id, kind = int(job.id), str(job.kind)  # type: ignore[arg-type]
+    owner = str(job.locked_by) if job.locked_by else None
+    attempts = int(job.attempts)  # type: ignore[arg-type]
+    max_attempts = int(job.max_attempts)  # type: ignore[arg-type]
+    handler = _handlers.get(kind)
+    # Undo only the handler's own uncommitted work on failure.
+    savepoint = db.begin_nested()
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for {kind!r}")
+        handler(db, json.loads(str(job.payload)))
+    except Exception as e:
+        if savepoint.is_active:
+            savepoint.rollback()
+        else:
+            db.rollback()
+        error = f"{type(e).__name__}: {e}"
+        if attempts >= max_attempts:
+            logger.exception("Job %s (%s) failed permanently", job_id, kind)
+            outcome: Dict[str, Any] = {"status": "failed"}
+        else:
+            logger.warning(
+                "Job %s (%s) failed, will retry: %s", job_id, kind, e
+            )
+            outcome = {
+                "status": "queued",
+                "run_after": _utcnow()
+                + timedelta(seconds=retry_delay(attempts)),
+            }
+        _record_outcome(
+            db, job_id, owner, locked_by=None, last_error=error, **outcome
+        )
+        return False
+    if savepoint.is_active:
+        savepoint.commit()
+    return _record_outcome(db, job_id, owner, status="done")
+
+
+def purge_finished_jobs(
+    db: Session, retention_days: Optional[float] = None
+) -> int:
+    """Delete jobs that finished more than ``retention_days`` ago."""
+    if retention_days is None:
+        retention_days = settings.JOB_RETENTION_DAYS
+    cutoff = _utcnow() - timedelta(days=retention_days)
+    result = db.execute(
+        delete(Job)
+        .where(Job.status == "done", Job.updated_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    count = int(result.rowcount)  # type: ignore[attr-defined]
+    if count:
+        logger.info("Purged %d finished job(s)", count)
+    return count
+
+
+def run_pending(
+    db: Session, worker_id: str = "inline", limit: int = 100
+) -> int:
+    """Run due jobs until none are left (or ``limit``); return the count."""
+    processed = 0
+    while processed < limit:
+        jobs = claim_jobs(db, worker_id, limit=min(10, limit - processed))
+        if not jobs:
+            break
+        for job in jobs:
+            run_job(db, job)
+            processed += 1
+    return processed
+
+
+class JobWorker(threading.Thread):
+    """Daemon thread that polls for jobs and runs them."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        poll_interval: float = 1.0,
+        batch_size: int = 1,
+        name: Optional[str] = None,
+    ):
+        name = name or f"job-worker-{id(self):x}"
+        super().__init__(name=name, daemon=True)
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{name}"
+        self._stop_event = threading.Event()
+        self._next_purge = 0.0
+
+    def _purge_if_due(self, db: Session) -> None:
+        if settings.JOB_RETENTION_DAYS <= 0:
+            return
+        if time.monotonic() < self._next_purge:
+            return
+        self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+        purge_finished_jobs(db)
+
+    def run(self) -> None:
+        load_handlers()
+        while not self._stop_event.is_set():
+            busy = False
+            db = self.session_factory()
+            try:
+                self._purge_if_due(db)
+                for job in claim_jobs(db, self.worker_id, self.batch_size):
+                    busy = True
+                    run_job(db, job)
+            except Exception:
+                logger.exception("Job worker %s poll failed", self.name)
+            finally:
+                db.close()
+            if not busy:
+                self._stop_event.wait(self.poll_interval)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        self.join(timeout)
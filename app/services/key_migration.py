@@ -0,0 +1,110 @@
+"""
+Move existing objects onto the ``documents/{project_id}/...`` key scheme.
+
+Objects are copied server-side to a key derived from the old one, so a
+re-run after a crash copies to the same place instead of leaking objects.
+Each document's pointer is swapped with a compare-and-set on the old key,
+and the old object is handed to the storage GC once the batch commits.
+Migrated documents no longer match the selection, which makes the command
+resumable. Content-addressed ``blobs/`` keys are shared across projects
+and are left alone.
+"""
+
+import logging
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import and_, not_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.domain.storage import S3ServiceInterface
+from app.models.document import Document
+from app.models.search_index import SearchDocument
+from app.services.document_jobs import schedule_storage_gc
+from app.services.s3_service_refactored import project_object_key
+from app.services.storage_gc import enqueue_deletion
+
+logger = logging.getLogger(__name__)
+
+
+def _pending(after_id: int):
+    return and_(
+        Document.id > after_id,
+        not_(Document.s3_key.startswith("documents/")),
+        not_(Document.s3_key.startswith("blobs/")),
+    )
+
+
+def migrate_keys(
+    db: Session,
+    s3_service: S3ServiceInterface,
+    batch_size: int = 100,
+    max_per_second: float = 0.0,
+    limit: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> int:
+    """
+    Migrate documents in ID order; commits per batch, returns the count.
+
+    ``max_per_second`` throttles copies (0 = unthrottled).
+    """
+    migrated = 0
+    last_id = 0
+    interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+    next_copy = time.monotonic()
+    while limit is None or migrated < limit:
+        size = (
+            batch_size
+            if limit is None
+            else min(batch_size, limit - migrated)
+        )
+        rows = (
+            db.query(Document.id, Document.project_id, Document.s3_key)
+            .filter(_pending(last_id))
+            .order_by(Document.id)
+            .limit(size)
+            .all()
+        )
+        if not rows:
+            break
+        for row in rows:
+            last_id = row.id
+            old_key = str(row.s3_key)
+            new_key = project_object_key(row.project_id, old_key)
+            if interval:
+                delay = next_copy - time.monotonic()
+                if delay > 0:
+                    sleep(delay)
+                next_copy = max(next_copy, time.monotonic()) + interval
+            try:
+                s3_service.copy_file(
+                    settings.S3_BUCKET_NAME, old_key, new_key
+                )
+            except Exception:
+                logger.exception("Could not copy %s, skipping", old_key)
+                continue
+            swapped = (
+                db.query(Document)
+                .filter(Document.id == row.id, Document.s3_key == old_key)
+                .update(
+                    {Document.s3_key: new_key}, synchronize_session=False
+                )
+            )
+            if not swapped:
+                # Replaced while we copied; the copy is garbage now.
+                enqueue_deletion(db, new_key)
+                continue
+            # Same content, so keep the search index from re-indexing it.
+            db.query(SearchDocument).filter(
+                SearchDocument.document_id == row.id,
+                SearchDocument.s3_key == old_key,
+            ).update(
+                {SearchDocument.s3_key: new_key}, synchronize_session=False
+            )
+            enqueue_deletion(db, old_key)
+            migrated += 1
+        schedule_storage_gc(db)
+        db.commit()
+        logger.info("Migrated %d object key(s) so far", migrated)
+    return migrated
@@ -1,26 +1,85 @@
-import io
 import os
+import threading
 
 import boto3
-from PIL import Image
+from botocore.config import Config
+
+from app.services.image_pipeline import (
+    ImageBudget,
+    Rendition,
+    parse_renditions,
+    render_object,
+)
+
+# Every invocation of this function is image work, so Pillow and boto3 are
+# imported up front, during the init phase. The client is created once per
+# execution environment and reused by warm invocations.
+_s3_client = None
+_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    global _s3_client
+    if _s3_client is None:
+        with _client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client(
+                    "s3",
+                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
+                    aws_secret_access_key=os.getenv(
+                        "AWS_SECRET_ACCESS_KEY", "test"
+                    ),
+                    region_name=os.getenv("AWS_REGION", "us-east-1"),
+                    config=Config(
+                        connect_timeout=2,
+                        read_timeout=10,
+                        retries={"mode": "standard", "max_attempts": 3},
+                        tcp_keepalive=True,
+                    ),
+                )
+    return _s3_client
 
 
 def lambda_handler(event, context):
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
-        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test"),
-        region_name=os.getenv("AWS_REGION", "us-east-1"),
-    )
+    """
+    Resize ``event["key"]`` into one or more renditions.
+
+    ``size`` produces a single ``resized/{key}`` image fitted into that
+    box; ``renditions`` (e.g. "thumb:150x150,medium:800x800") produces
+    ``resized/{name}/{key}`` for each entry from a single decode.
+
+    The object is streamed rather than buffered and checked against
+    ``ImageBudget`` limits before decoding; oversized images raise
+    ``ImageTooLarge``.
+    """
+    s3 = get_s3_client()
     bucket = event["bucket"]
     key = event["key"]
-    size = event.get("size", (128, 128))
+    if "renditions" in event:
+        renditions = parse_renditions(event["renditions"])
+        keys = {r.name: f"resized/{r.name}/{key}" for r in renditions}
+    else:
+        size = tuple(event.get("size", (128, 128)))
+        renditions = (Rendition("resized", size[0], size[1], format="JPEG"),)
+        keys = {"resized": f"resized/{key}"}
+
     response = s3.get_object(Bucket=bucket, Key=key)
-    image = Image.open(io.BytesIO(response["Body"].read()))
-    image = image.resize(size)
-    out_buffer = io.BytesIO()
-    image.save(out_buffer, format="JPEG")
-    out_buffer.seek(0)
-    resized_key = f"resized/{key}"
-    s3.put_object(Bucket=bucket, Key=resized_key, Body=out_buffer)
-    return {"resized_key": resized_key, "size": size}
+    rendered = render_object(
+        response["Body"],
+        renditions,
+        ImageBudget(),
+        content_length=response.get("ContentLength"),
+    )
+    for image in rendered:
+        s3.put_object(
+            Bucket=bucket,
+            Key=keys[image.name],
+            Body=image.data,
+            ContentType=image.content_type,
+        )
+    first = rendered[0]
+    return {
+        "resized_key": keys[first.name],
+        "size": (first.width, first.height),
+        "renditions": keys,
+    }
@@ -0,0 +1,227 @@
+"""
+On-demand image previews.
+
+Previews are rendered with the decode-once pipeline in guarded mode on a
+bounded thread pool (Pillow releases the GIL while decoding, resizing and
+encoding) and cached in two tiers, both keyed by (s3_key, width, height,
+format):
+
+* a process-wide LRU bounded in bytes, and
+* the storage backend itself, under ``previews/{s3_key}/``, so other
+  workers and restarts reuse earlier renders. Document keys are immutable,
+  so neither tier needs invalidation; the storage GC deletes an object's
+  stored previews together with the object.
+
+Requested sizes are snapped up to a small fixed ladder, which bounds the
+number of distinct renders per image and lets the GC enumerate them.
+
+Concurrent misses for the same preview are coalesced: the first request
+renders it and the others wait for that result.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.domain.storage import S3ServiceInterface
+from app.services.image_pipeline import (
+    CONTENT_TYPES,
+    EXTENSIONS,
+    ImageBudget,
+    Rendition,
+    render_object,
+)
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_FORMATS = {"jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+
+# Bounding-box sizes previews are rendered at; requests are rounded up.
+PREVIEW_SIZES = (64, 128, 256, 512, 1024, 1600)
+
+PreviewKey = Tuple[str, int, int, str]
+
+
+@dataclass(frozen=True)
+class Preview:
+    data: bytes
+    format: str
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES[self.format]
+
+
+def preview_sizes(max_dimension: int) -> Tuple[int, ...]:
+    """The ladder of preview sizes up to and including ``max_dimension``."""
+    sizes = {size for size in PREVIEW_SIZES if size < max_dimension}
+    return tuple(sorted(sizes | {max_dimension}))
+
+
+def snap_size(size: int, max_dimension: int) -> int:
+    """Round ``size`` up to the next preview size."""
+    return next(
+        (s for s in preview_sizes(max_dimension) if s >= size), max_dimension
+    )
+
+
+def preview_key(s3_key: str, width: int, height: int, fmt: str) -> str:
+    """Storage key of a rendered preview."""
+    return f"previews/{s3_key}/{width}x{height}.{EXTENSIONS[fmt]}"
+
+
+def stored_preview_keys(s3_key: str, max_dimension: int) -> List[str]:
+    """Every key a stored preview of ``s3_key`` can have."""
+    sizes = preview_sizes(max_dimension)
+    return [
+        preview_key(s3_key, width, height, fmt)
+        for width in sizes
+        for height in sizes
+        for fmt in PREVIEW_FORMATS.values()
+    ]
+
+
+class PreviewService:
+    def __init__(
+        self,
+        storage: S3ServiceInterface,
+        bucket: str,
+        workers: int,
+        max_bytes: int,
+        store: bool = True,
+    ):
+        self.storage = storage
+        self.bucket = bucket
+        self.max_bytes = max_bytes
+        self.store = store
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="preview"
+        )
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[PreviewKey, Preview]" = OrderedDict()
+        self._cached_bytes = 0
+        self._inflight: Dict[PreviewKey, "Future[Preview]"] = {}
+        self._hits = 0
+        self._renders = 0
+
+    def get(self, s3_key: str, width: int, height: int, fmt: str) -> Preview:
+        """Return the preview, rendering it at most once across callers."""
+        key = (s3_key, width, height, fmt)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return cached
+            pending = self._inflight.get(key)
+            if pending is None:
+                future: "Future[Preview]" = Future()
+                self._inflight[key] = future
+        if pending is not None:
+            return pending.result()
+
+        try:
+            preview = self._load(key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(preview)
+            self._remember(key, preview)
+            return preview
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _load(self, key: PreviewKey) -> Preview:
+        s3_key, width, height, fmt = key
+        stored_key = preview_key(*key)
+        if self.store:
+            try:
+                data = self.storage.download_file(self.bucket, stored_key)
+            except Exception:
+                data = b""
+            if data:
+                return Preview(data, fmt)
+
+        preview = self._pool.submit(self._render, key).result()
+        if self.store:
+            try:
+                self.storage.upload_file(
+                    preview.data,
+                    stored_key,
+                    preview.content_type,
+                    key=stored_key,
+                )
+            except Exception:
+                # The LRU still serves it; the next miss renders again.
+                logger.exception("Could not store preview %s", stored_key)
+        return preview
+
+    def _render(self, key: PreviewKey) -> Preview:
+        s3_key, width, height, fmt = key
+        with self._lock:
+            self._renders += 1
+        source = self.storage.open_stream(self.bucket, s3_key)
+        try:
+            [image] = render_object(
+                source,
+                [Rendition("preview", width, height, format=fmt)],
+                ImageBudget(),
+            )
+        finally:
+            source.close()
+        return Preview(image.data, fmt)
+
+    def _remember(self, key: PreviewKey, preview: Preview) -> None:
+        size = len(preview.data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = preview
+            self._cached_bytes += size
+            while self._cached_bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted.data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "renders": self._renders,
+                "entries": len(self._cache),
+                "cached_bytes": self._cached_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+_service: Optional[PreviewService] = None
+_service_lock = threading.Lock()
+
+
+def get_preview_service(storage: S3ServiceInterface) -> PreviewService:
+    """Return the process-wide preview service for ``storage``."""
+    global _service
+    from app.core.config import settings
+
+    with _service_lock:
+        if _service is None or _service.storage is not storage:
+            if _service is not None:
+                _service.shutdown()
+            _service = PreviewService(
+                storage,
+                settings.S3_BUCKET_NAME,
+                workers=settings.PREVIEW_WORKERS or os.cpu_count() or 1,
+                max_bytes=settings.PREVIEW_CACHE_MAX_BYTES,
+                store=settings.PREVIEW_STORE,
+            )
+        return _service
@@ -0,0 +1,141 @@
+"""
+Per-project storage counters kept in the ``project_report`` table.
+
+Uploads, updates and deletes adjust ``document_count`` and ``total_size``
+with a single UPDATE statement, so the quota check is constant-time and
+the row lock taken by the UPDATE serialises concurrent uploads to the
+same project.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.document import Document
+from app.models.project import Project
+from app.models.project_report import ProjectReport
+
+
+def _project_totals(db: Session, project_id: int) -> tuple[int, int]:
+    count, total = (
+        db.query(
+            func.count(Document.id),
+            func.coalesce(func.sum(Document.size), 0),
+        )
+        .filter(Document.project_id == project_id)
+        .one()
+    )
+    return int(count), int(total)
+
+
+def ensure_report(db: Session, project_id: int) -> ProjectReport:
+    """
+    Return the report row for a project, creating it if missing.
+
+    A missing row is seeded from the project's current documents so that
+    projects created before the counters existed start out correct.
+    """
+    report = (
+        db.query(ProjectReport)
+        .filter(ProjectReport.project_id == project_id)
+        .first()
+    )
+    if report is not None:
+        return report
+
+    count, total = _project_totals(db, project_id)
+    report = ProjectReport(
+        project_id=project_id, document_count=count, total_size=total
+    )
+    try:
+        with db.begin_nested():
+            db.add(report)
+    except IntegrityError:
+        # Another request created the row first; use theirs.
+        report = (
+            db.query(ProjectReport)
+            .filter(ProjectReport.project_id == project_id)
+            .one()
+        )
+    return report
+
+
+def adjust_usage(
+    db: Session,
+    project_id: int,
+    size_delta: int,
+    count_delta: int = 0,
+    limit: Optional[int] = None,
+) -> bool:
+    """
+    Atomically apply a size/count delta to a project's counters.
+
+    When ``limit`` is given and the delta grows the project, the UPDATE
+    only matches if the new total stays within the limit. Returns False
+    when the quota would be exceeded, True otherwise. The change becomes
+    visible when the caller commits, and is undone by a rollback.
+    """
+    ensure_report(db, project_id)
+    stmt = (
+        update(ProjectReport)
+        .where(ProjectReport.project_id == project_id)
+        .values(
+            total_size=ProjectReport.total_size + size_delta,
+            document_count=ProjectReport.document_count + count_delta,
+            last_updated=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if limit is not None and size_delta > 0:
+        stmt = stmt.where(ProjectReport.total_size + size_delta <= limit)
+    result = db.execute(stmt)
+    return bool(result.rowcount == 1)  # type: ignore[attr-defined]
+
+
+def get_usage(db: Session, project_id: int) -> int:
+    """Return the stored total size of a project in bytes."""
+    total = (
+        db.query(ProjectReport.total_size)
+        .filter(ProjectReport.project_id == project_id)
+        .scalar()
+    )
+    return int(total or 0)
+
+
+def reconcile_project_reports(
+    db: Session, project_id: Optional[int] = None
+) -> int:
+    """
+    Rebuild report counters from the documents table.
+
+    Reconciles a single project when ``project_id`` is given, otherwise
+    every project. Commits and returns the number of reports written.
+    """
+    query = db.query(Project.id)
+    if project_id is not None:
+        query = query.filter(Project.id == project_id)
+    project_ids = [row.id for row in query.all()]
+
+    totals = dict.fromkeys(project_ids, (0, 0))
+    aggregates = db.query(
+        Document.project_id,
+        func.count(Document.id),
+        func.coalesce(func.sum(Document.size), 0),
+    )
+    if project_id is not None:
+        aggregates = aggregates.filter(Document.project_id == project_id)
+    for pid, count, total in aggregates.group_by(Document.project_id):
+        if pid in totals:
+            totals[pid] = (int(count), int(total))
+
+    now = datetime.now(timezone.utc)
+    for pid, (count, total) in totals.items():
+        report = ensure_report(db, pid)
+        report.document_count = count  # type: ignore[assignment]
+        report.total_size = total  # type: ignore[assignment]
+        report.last_updated = now  # type: ignore[assignment]
+    db.commit()
+    return len(totals)
@@ -0,0 +1,66 @@
+"""
+Content negotiation over the image renditions written by the S3 Lambda.
+
+The Lambda stores each rendition in the source format plus smaller
+WebP/AVIF variants, and a manifest listing them with their sizes. The
+smallest entry the client's ``Accept`` header allows is served; the base
+rendition is the fallback everyone gets.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from app.domain.storage import S3ServiceInterface
+from app.services.image_pipeline import manifest_key
+
+# Only served to clients that list them: a browser sending "image/*" or
+# "*/*" does not promise it can decode these.
+NEGOTIATED_TYPES = {"image/avif", "image/webp"}
+
+
+def accepted_types(accept: Optional[str]) -> Dict[str, float]:
+    """Media types named in an Accept header with their q values."""
+    types = {}
+    for part in (accept or "").split(","):
+        media_type, *params = part.strip().split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type:
+            types[media_type.strip().lower()] = quality
+    return types
+
+
+def choose_rendition(
+    entries: List[Dict[str, Any]], accept: Optional[str]
+) -> Dict[str, Any]:
+    """Smallest manifest entry acceptable to the client."""
+    types = accepted_types(accept)
+    candidates = [
+        entry
+        for entry in entries
+        if not entry["variant"]
+        or (
+            entry["content_type"] in NEGOTIATED_TYPES
+            and types.get(entry["content_type"], 0) > 0
+        )
+    ]
+    return min(candidates, key=lambda entry: entry["bytes"])
+
+
+def load_manifest(
+    storage: S3ServiceInterface, bucket: str, key: str
+) -> Optional[Dict[str, Any]]:
+    """The rendition manifest of ``key``, or None if not rendered yet."""
+    try:
+        manifest: Dict[str, Any] = json.loads(
+            storage.download_file(bucket, manifest_key(key))
+        )
+    except Exception:
+        return None
+    return manifest
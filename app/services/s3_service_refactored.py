@@ -1,60 +1,140 @@
 import os
+import threading
+from typing import Any, BinaryIO, Dict, Optional, Sequence, Tuple
 
 import boto3
+from botocore.config import Config
 
 from app.domain.storage import S3ServiceInterface
 
+DELETE_BATCH_SIZE = 1000
+
+_client: Optional[Any] = None
+_client_lock = threading.Lock()
+
+
+def project_object_key(project_id: int, name: str) -> str:
+    """
+    Key of ``name`` under ``documents/{project_id}/{xx}/``.
+
+    ``xx`` is taken from the name (a UUID) so keys spread evenly over
+    the prefix while a project's objects still share one prefix.
+    """
+    return f"documents/{project_id}/{name[:2]}/{name}"
+
+
+def new_object_key(filename: str, project_id: Optional[int] = None) -> str:
+    """
+    Return a fresh, unique storage key that keeps the file extension.
+
+    With ``STORAGE_KEY_SCHEME = "project"`` and a project, the key lives
+    under the project's prefix; otherwise at the bucket root.
+    """
+    import uuid
+
+    from app.core.config import settings
+
+    file_extension = filename.split(".")[-1] if "." in filename else ""
+    name = uuid.uuid4().hex
+    if file_extension:
+        name = f"{name}.{file_extension}"
+    if settings.STORAGE_KEY_SCHEME == "project" and project_id is not None:
+        return project_object_key(project_id, name)
+    return name
+
+
+def _build_client():
+    """
+    Build an S3 client that prefers the AWS task/instance role when no explicit
+    credentials are provided. Only inject access key/secret if present in env.
+    This avoids breaking on ECS where IAM roles should be used.
+    """
+    from app.core.config import settings
+
+    region_name = os.environ.get("AWS_REGION", "us-east-1")
+    client_kwargs = {
+        "service_name": "s3",
+        "region_name": region_name,
+        "config": Config(
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            connect_timeout=settings.S3_CONNECT_TIMEOUT,
+            read_timeout=settings.S3_READ_TIMEOUT,
+            retries={
+                "mode": settings.S3_RETRY_MODE,
+                "max_attempts": settings.S3_MAX_ATTEMPTS,
+            },
+            tcp_keepalive=settings.S3_TCP_KEEPALIVE,
+        ),
+    }
+
+    # Only pass creds if explicitly provided (and not dummy defaults)
+    aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID")
+    aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
+    if (
+        aws_access_key_id
+        and aws_secret_access_key
+        and aws_access_key_id != "test"
+        and aws_secret_access_key != "test"
+    ):
+        client_kwargs["aws_access_key_id"] = aws_access_key_id
+        client_kwargs["aws_secret_access_key"] = aws_secret_access_key
+
+    return boto3.client(**client_kwargs)
+
+
+def get_s3_client():
+    """
+    Return the process-wide S3 client, creating it on first use.
+
+    boto3 clients are thread-safe, so a single instance (and its urllib3
+    connection pool) is shared by every request handled by this process.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def reset_s3_client() -> None:
+    """Drop the cached client so the next call builds a fresh one."""
+    global _client
+    with _client_lock:
+        _client = None
+
 
 class S3Service(S3ServiceInterface):
     def _get_client(self):
-        """
-        Build an S3 client that prefers the AWS task/instance role when no explicit
-        credentials are provided. Only inject access key/secret if present in env.
-        This avoids breaking on ECS where IAM roles should be used.
-        """
-        region_name = os.environ.get("AWS_REGION", "us-east-1")
-        client_kwargs = {
-            "service_name": "s3",
-            "region_name": region_name,
-        }
+        return get_s3_client()
 
-        # Only pass creds if explicitly provided (and not dummy defaults)
-        aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID")
-        aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
-        if (
-            aws_access_key_id
-            and aws_secret_access_key
-            and aws_access_key_id != "test"
-            and aws_secret_access_key != "test"
-        ):
-            client_kwargs["aws_access_key_id"] = aws_access_key_id
-            client_kwargs["aws_secret_access_key"] = aws_secret_access_key
-
-        return boto3.client(**client_kwargs)
-
-    def upload_file(  # type: ignore[override]
-        self, content: bytes, filename: str, content_type: str
+    def upload_file(
+        self,
+        content: bytes,
+        filename: str,
+        content_type: str,
+        key: Optional[str] = None,
+        content_encoding: Optional[str] = None,
     ) -> str:
-        """Upload file content to S3 bucket."""
-        import uuid
+        """
+        Upload file content to S3 bucket.
 
+        A unique key is generated from the filename unless ``key`` is given.
+        """
         from app.core.config import settings
 
         s3 = self._get_client()
-        # Generate unique S3 key
-        file_extension = filename.split(".")[-1] if "." in filename else ""
-        s3_key = (
-            f"{uuid.uuid4()}.{file_extension}"
-            if file_extension
-            else str(uuid.uuid4())
-        )
+        s3_key = key or new_object_key(filename)
 
-        s3.put_object(
-            Bucket=settings.S3_BUCKET_NAME,
-            Key=s3_key,
-            Body=content,
-            ContentType=content_type,
-        )
+        put_kwargs = {
+            "Bucket": settings.S3_BUCKET_NAME,
+            "Key": s3_key,
+            "Body": content,
+            "ContentType": content_type,
+        }
+        if content_encoding:
+            put_kwargs["ContentEncoding"] = content_encoding
+        s3.put_object(**put_kwargs)
         return s3_key
 
     def download_file(self, bucket: str, key: str) -> bytes:
@@ -65,11 +145,99 @@ class S3Service(S3ServiceInterface):
             raise TypeError("download_file must return bytes")
         return body
 
+    def open_stream(self, bucket: str, key: str) -> BinaryIO:
+        s3 = self._get_client()
+        response = s3.get_object(Bucket=bucket, Key=key)
+        body: BinaryIO = response["Body"]
+        return body
+
     def delete_file(self, bucket: str, key: str) -> bool:
         s3 = self._get_client()
         s3.delete_object(Bucket=bucket, Key=key)
         return True
 
+    def delete_files(
+        self, bucket: str, keys: Sequence[str]
+    ) -> Dict[str, str]:
+        """Delete keys with DeleteObjects, 1000 per request (the S3 maximum)."""
+        s3 = self._get_client()
+        failed = {}
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            end = start + DELETE_BATCH_SIZE
+            chunk = keys[start:end]
+            response = s3.delete_objects(
+                Bucket=bucket,
+                Delete={
+                    "Objects": [{"Key": key} for key in chunk],
+                    "Quiet": True,
+                },
+            )
+            for error in response.get("Errors", []):
+                failed[error["Key"]] = (
+                    f"{error.get('Code')}: {error.get('Message')}"
+                )
+        return failed
+
+    def create_multipart_upload(
+        self, bucket: str, key: str, content_type: str
+    ) -> str:
+        s3 = self._get_client()
+        response = s3.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type
+        )
+        upload_id: str = response["UploadId"]
+        return upload_id
+
+    def upload_part(
+        self,
+        bucket: str,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        body: bytes,
+    ) -> str:
+        s3 = self._get_client()
+        response = s3.upload_part(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        etag: str = response["ETag"]
+        return etag
+
+    def complete_multipart_upload(
+        self,
+        bucket: str,
+        key: str,
+        upload_id: str,
+        parts: Sequence[Tuple[int, str]],
+    ) -> None:
+        s3 = self._get_client()
+        s3.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": number, "ETag": etag}
+                    for number, etag in parts
+                ]
+            },
+        )
+
+    def abort_multipart_upload(
+        self, bucket: str, key: str, upload_id: str
+    ) -> None:
+        s3 = self._get_client()
+        s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+
+    def copy_file(self, bucket: str, source_key: str, dest_key: str) -> None:
+        """Server-side copy; large objects are copied in parts."""
+        s3 = self._get_client()
+        s3.copy({"Bucket": bucket, "Key": source_key}, bucket, dest_key)
+
     def list_files(self, bucket: str, prefix: str = "") -> list[str]:
         s3 = self._get_client()
         response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
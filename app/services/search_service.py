@@ -0,0 +1,197 @@
+"""
+Built-in full-text index over document contents.
+
+Postings live in ``search_postings`` (one row per document and term) and
+per-document lengths in ``search_documents``, so the index works the same
+on SQLite and PostgreSQL. Documents are (re)indexed by a background job
+whenever their content changes; results are ranked with BM25, scored and
+paged in SQL.
+"""
+
+import math
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import Float, case, cast, delete, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.domain.storage import S3ServiceInterface
+from app.models.document import Document
+from app.models.search_index import SearchDocument, SearchPosting
+from app.services.storage_codec import decode
+from app.services.text_extraction import extract_text, is_indexable, tokenize
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def remove_from_index(db: Session, document_ids: Iterable[int]) -> None:
+    ids = list(document_ids)
+    if not ids:
+        return
+    db.execute(
+        delete(SearchPosting)
+        .where(SearchPosting.document_id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(SearchDocument)
+        .where(SearchDocument.document_id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def remove_project_from_index(db: Session, project_id: int) -> None:
+    db.execute(
+        delete(SearchPosting)
+        .where(SearchPosting.project_id == project_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(SearchDocument)
+        .where(SearchDocument.project_id == project_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def index_document(
+    db: Session, s3_service: S3ServiceInterface, document: Document
+) -> bool:
+    """
+    Rebuild the postings of one document if its content changed.
+
+    Returns True when the index changed: the document was (re)indexed, or
+    its old postings were dropped because the new content is no longer
+    indexable.
+    """
+    state = db.get(SearchDocument, document.id)
+    if state is not None and state.s3_key == document.s3_key:
+        return False
+    content_type = (
+        str(document.content_type) if document.content_type else None
+    )
+    encoding = (
+        str(document.content_encoding) if document.content_encoding else None
+    )
+    if not is_indexable(content_type, str(document.filename)) or (
+        int(document.size or 0) > settings.SEARCH_MAX_DOCUMENT_BYTES
+    ):
+        if state is None:
+            return False
+        # Stale postings would keep matching the replaced content.
+        db.expunge(state)
+        remove_from_index(db, [int(document.id)])
+        return True
+
+    content = decode(
+        s3_service.download_file(
+            settings.S3_BUCKET_NAME, str(document.s3_key)
+        ),
+        encoding,
+    )
+    text = extract_text(content, content_type, str(document.filename))
+    terms = Counter(tokenize(text or ""))
+
+    remove_from_index(db, [int(document.id)])
+    db.add(
+        SearchDocument(
+            document_id=document.id,
+            project_id=document.project_id,
+            s3_key=document.s3_key,
+            term_count=sum(terms.values()),
+        )
+    )
+    db.add_all(
+        SearchPosting(
+            document_id=document.id,
+            project_id=document.project_id,
+            term=term,
+            frequency=frequency,
+        )
+        for term, frequency in terms.items()
+    )
+    return True
+
+
+def search_documents(
+    db: Session, project_id: int, query: str, limit: int, offset: int
+) -> Tuple[int, List[Tuple[Document, float]]]:
+    """Return the total hit count and one page of (document, score)."""
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return 0, []
+
+    total_docs, avg_length = (
+        db.query(
+            func.count(SearchDocument.document_id),
+            func.avg(SearchDocument.term_count),
+        )
+        .filter(SearchDocument.project_id == project_id)
+        .one()
+    )
+    if not total_docs:
+        return 0, []
+    avg_length = float(avg_length or 1) or 1.0
+
+    # Only the per-term IDF is computed here; scoring, ranking and
+    # paging run in the database over the matching postings.
+    document_frequency: dict[str, int] = {
+        row.term: row.df
+        for row in db.query(
+            SearchPosting.term,
+            func.count(SearchPosting.document_id).label("df"),
+        )
+        .filter(
+            SearchPosting.project_id == project_id,
+            SearchPosting.term.in_(terms),
+        )
+        .group_by(SearchPosting.term)
+    }
+    if not document_frequency:
+        return 0, []
+    idf = case(
+        {
+            term: math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        },
+        value=SearchPosting.term,
+        else_=0.0,
+    )
+    frequency = cast(SearchPosting.frequency, Float)
+    norm = BM25_K1 * (
+        1
+        - BM25_B
+        + BM25_B * cast(SearchDocument.term_count, Float) / avg_length
+    )
+    ranked = (
+        db.query(
+            SearchPosting.document_id.label("document_id"),
+            func.sum(
+                idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            ).label("score"),
+        )
+        .join(
+            SearchDocument,
+            SearchDocument.document_id == SearchPosting.document_id,
+        )
+        .filter(
+            SearchPosting.project_id == project_id,
+            SearchPosting.term.in_(list(document_frequency)),
+        )
+        .group_by(SearchPosting.document_id)
+        .subquery()
+    )
+    hits = (
+        db.query(Document, ranked.c.score)
+        .join(ranked, ranked.c.document_id == Document.id)
+        .filter(Document.project_id == project_id)
+    )
+    total = hits.count()
+    page = (
+        hits.order_by(ranked.c.score.desc(), Document.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return total, [(document, float(score)) for document, score in page]
@@ -1,72 +1,16 @@
 """
-AWS SES Email Service for sending project invitation emails.
+Content of the project invitation email.
+
+The outbox dispatcher (app.services.email_dispatcher) turns these into the
+SES template that invitations are sent with.
 """
 
 # flake8: noqa: E501
 
-import logging
-from typing import Optional
-
-import boto3
-from botocore.exceptions import ClientError
-
-logger = logging.getLogger(__name__)
-
-
-class SESEmailService:
-    """Service for sending emails via AWS SES."""
-
-    def __init__(
-        self,
-        sender_email: str,
-        aws_region: str = "us-east-1",
-        aws_access_key_id: Optional[str] = None,
-        aws_secret_access_key: Optional[str] = None,
-    ):
-        """
-        Initialize SES email service.
-
-        Args:
-            sender_email: Verified sender email address in SES
-            aws_region: AWS region for SES
-            aws_access_key_id: AWS access key (optional if using IAM role)
-            aws_secret_access_key: AWS secret key (optional if using IAM role)
-        """
-        self.sender_email = sender_email
-        self.aws_region = aws_region
-
-        # Initialize SES client
-        client_kwargs = {"region_name": aws_region}
-        if aws_access_key_id and aws_secret_access_key:
-            client_kwargs["aws_access_key_id"] = aws_access_key_id
-            client_kwargs["aws_secret_access_key"] = aws_secret_access_key
-
-        self.ses_client = boto3.client("ses", **client_kwargs)
-
-    def send_invite_email(
-        self, to_email: str, join_link: str, project_name: str = "Project"
-    ) -> bool:
-        """
-        Send project invitation email via AWS SES.
+INVITE_SUBJECT = "You've been invited to join {project_name}"
 
-        Args:
-            to_email: Recipient email address
-            join_link: URL link to join the project
-            project_name: Name of the project being shared
-
-        Returns:
-            True if email sent successfully, False otherwise
-        """
-        subject = f"You've been invited to join {project_name}"
-
-        # HTML email body
-        html_body = self._generate_html_email(
-            to_email, join_link, project_name
-        )
-
-        # Plain text email body (fallback)
-        text_body = f"""
-You've been invited to join {project_name}!
+INVITE_TEXT = """
+{inviter} has invited you to join {project_name}!
 
 Click the link below to accept the invitation:
 {join_link}
@@ -74,56 +18,12 @@ Click the link below to accept the invitation:
 This invitation link will expire in 7 days.
 
 If you didn't expect this invitation, you can safely ignore this email.
-        """.strip()
-
-        try:
-            response = self.ses_client.send_email(
-                Source=self.sender_email,
-                Destination={"ToAddresses": [to_email]},
-                Message={
-                    "Subject": {"Data": subject, "Charset": "UTF-8"},
-                    "Body": {
-                        "Text": {"Data": text_body, "Charset": "UTF-8"},
-                        "Html": {"Data": html_body, "Charset": "UTF-8"},
-                    },
-                },
-            )
-            logger.info(
-                f"Email sent successfully to {to_email}. "
-                f"Message ID: {response['MessageId']}"
-            )
-            return True
-
-        except ClientError as e:
-            error_code = e.response["Error"]["Code"]
-            error_message = e.response["Error"]["Message"]
-            logger.error(
-                f"Failed to send email to {to_email}. "
-                f"Error: {error_code} - {error_message}"
-            )
-            return False
+""".strip()
 
-        except Exception as e:
-            logger.error(
-                f"Unexpected error sending email to {to_email}: {e}"
-            )
-            return False
 
-    def _generate_html_email(
-        self, to_email: str, join_link: str, project_name: str
-    ) -> str:
-        """
-        Generate HTML email template for project invitation.
-
-        Args:
-            to_email: Recipient email
-            join_link: Join URL
-            project_name: Project name
-
-        Returns:
-            HTML string for email body
-        """
-        return f"""  <!-- noqa -->
+def invite_html(project_name: str, join_link: str, inviter: str) -> str:
+    """HTML body of a project invitation; the arguments are not escaped."""
+    return f"""  <!-- noqa -->
 <!DOCTYPE html>
 <html>
 <head>
@@ -150,7 +50,7 @@ If you didn't expect this invitation, you can safely ignore this email.
                                 Hello,
                             </p>
                             <p style="font-size: 16px; color: #333333; line-height: 1.6; margin: 0 0 20px 0;">  <!-- noqa -->
-                                You've been invited to collaborate on <strong>{project_name}</strong>.  <!-- noqa -->
+                                {inviter} has invited you to collaborate on <strong>{project_name}</strong>.  <!-- noqa -->
                             </p>
                             <p style="font-size: 16px; color: #333333; line-height: 1.6; margin: 0 0 30px 0;">  <!-- noqa -->
                                 Click the button below to accept the invitation and get started:  <!-- noqa -->
@@ -193,25 +93,4 @@ If you didn't expect this invitation, you can safely ignore this email.
     </table>
 </body>
 </html>
-        """.strip()
-
-    def verify_email_address(self, email: str) -> bool:
-        """
-        Verify an email address in AWS SES (for development/testing).
-
-        Args:
-            email: Email address to verify
-
-        Returns:
-            True if verification initiated successfully
-        """
-        try:
-            self.ses_client.verify_email_identity(EmailAddress=email)
-            logger.info(
-                f"Verification email sent to {email}. "
-                "Check inbox to complete verification."
-            )
-            return True
-        except ClientError as e:
-            logger.error(f"Failed to verify email {email}: {e}")
-            return False
+    """.strip()
@@ -0,0 +1,134 @@
+"""
+Optional compression of documents at rest.
+
+``encode`` compresses content whose type is known to compress well, when the
+configured codec (``STORAGE_COMPRESSION``: ``gzip`` or ``zstd``) actually
+saves enough space. The codec name doubles as the HTTP ``Content-Encoding``
+value, so stored bytes can be sent unchanged to clients that accept it.
+zstd needs the optional ``zstandard`` package; without it gzip is used.
+"""
+
+import gzip
+import logging
+from typing import BinaryIO, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/csv",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/x-yaml",
+    "application/yaml",
+    "application/rtf",
+    "image/svg+xml",
+}
+COMPRESSIBLE_PREFIXES = (
+    "text/",
+    "application/vnd.openxmlformats-officedocument.",
+    "application/vnd.oasis.opendocument.",
+)
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return (
+        media_type in COMPRESSIBLE_TYPES
+        or media_type.startswith(COMPRESSIBLE_PREFIXES)
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+
+def _configured_codec() -> Optional[str]:
+    codec = settings.STORAGE_COMPRESSION.lower()
+    if codec == ZSTD and _zstandard() is None:
+        logger.warning("zstandard is not installed, falling back to gzip")
+        return GZIP
+    return codec if codec in (GZIP, ZSTD) else None
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == ZSTD:
+        compressed: bytes = _zstandard().ZstdCompressor().compress(content)
+        return compressed
+    return gzip.compress(content, mtime=0)
+
+
+def encode(
+    content: bytes, content_type: Optional[str]
+) -> tuple[bytes, Optional[str]]:
+    """
+    Return the bytes to store and their encoding (None when uncompressed).
+    """
+    codec = _configured_codec()
+    if (
+        codec is None
+        or len(content) < settings.STORAGE_COMPRESSION_MIN_SIZE
+        or not is_compressible(content_type)
+    ):
+        return content, None
+    compressed = compress(content, codec)
+    if (
+        len(compressed)
+        > len(content) * settings.STORAGE_COMPRESSION_MAX_RATIO
+    ):
+        return content, None
+    return compressed, codec
+
+
+def decode(data: bytes, encoding: Optional[str]) -> bytes:
+    if not encoding:
+        return data
+    if encoding == ZSTD:
+        decompressor = _zstandard().ZstdDecompressor().decompressobj()
+        decoded: bytes = decompressor.decompress(data)
+        return decoded
+    if encoding == GZIP:
+        return gzip.decompress(data)
+    raise ValueError(f"Unknown content encoding: {encoding}")
+
+
+def open_decoded(stream: BinaryIO, encoding: Optional[str]) -> BinaryIO:
+    """Wrap a readable stream so reads return decoded bytes."""
+    if not encoding:
+        return stream
+    if encoding == ZSTD:
+        reader: BinaryIO = (
+            _zstandard().ZstdDecompressor().stream_reader(stream)
+        )
+        return reader
+    if encoding == GZIP:
+        return gzip.GzipFile(fileobj=stream, mode="rb")  # type: ignore[return-value]
+    raise ValueError(f"Unknown content encoding: {encoding}")
+
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    """Check an Accept-Encoding header for ``encoding`` with a q above 0."""
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if name not in (encoding, "*"):
+            continue
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
@@ -0,0 +1,221 @@
+"""
+Background garbage collection of superseded storage objects.
+
+Requests never delete objects themselves: they insert the key into
+``storage_deletions`` in the same transaction that stops referencing it.
+A worker drains the queue in batches with a multi-object delete, skipping
+any key that is still referenced (e.g. re-uploaded deduplicated content).
+Blob rows are locked from that check until the commit, and a deduplicated
+object is deleted together with its zero-reference tombstone row and any
+previews stored for it.
+Keys that fail to delete are retried with exponential backoff, so they do
+not hold up the rest of the queue, and are left in place as dead letters
+once ``STORAGE_GC_MAX_ATTEMPTS`` is used up.
+"""
+
+import logging
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.domain.storage import S3ServiceInterface
+from app.models.document import Document
+from app.models.storage_blob import StorageBlob
+from app.models.storage_deletion import StorageDeletion
+from app.services.previews import stored_preview_keys
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, capped at STORAGE_GC_RETRY_MAX_DELAY."""
+    ceiling = min(
+        settings.STORAGE_GC_RETRY_MAX_DELAY,
+        settings.STORAGE_GC_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0),
+    )
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def enqueue_deletion(db: Session, s3_key: str) -> None:
+    """Queue ``s3_key`` for deletion when the caller's transaction commits."""
+    db.add(StorageDeletion(s3_key=s3_key))
+
+
+def _referenced_keys(
+    db: Session, keys: set[str]
+) -> tuple[set[str], set[str]]:
+    """
+    Split ``keys`` into referenced keys and blob tombstones.
+
+    Blob rows are locked until the caller commits, so an upload cannot
+    revive a tombstone between this check and the object's deletion.
+    """
+    referenced = {
+        row.s3_key
+        for row in db.query(Document.s3_key).filter(
+            Document.s3_key.in_(keys)
+        )
+    }
+    tombstones = set()
+    for blob in (
+        db.query(StorageBlob.s3_key, StorageBlob.ref_count)
+        .filter(StorageBlob.s3_key.in_(keys))
+        .order_by(StorageBlob.id)
+        .with_for_update()
+    ):
+        if blob.ref_count > 0:
+            referenced.add(blob.s3_key)
+        else:
+            tombstones.add(blob.s3_key)
+    return referenced, tombstones - referenced
+
+
+def _delete_previews(s3_service: S3ServiceInterface, keys: set[str]) -> None:
+    """Best-effort removal of the stored previews of deleted objects."""
+    preview_keys = [
+        preview
+        for key in sorted(keys)
+        for preview in stored_preview_keys(
+            key, settings.PREVIEW_MAX_DIMENSION
+        )
+    ]
+    if not preview_keys:
+        return
+    try:
+        failed = s3_service.delete_files(
+            settings.S3_BUCKET_NAME, preview_keys
+        )
+    except Exception:
+        logger.exception("Storage GC could not delete previews")
+        return
+    if failed:
+        logger.warning(
+            "Storage GC failed to delete %d preview(s)", len(failed)
+        )
+
+
+def drain_deletion_queue(
+    db: Session, s3_service: S3ServiceInterface, batch_size: int = 1000
+) -> int:
+    """
+    Process one batch of the queue and return how many rows were cleared.
+
+    Cleared rows are either deleted from storage or dropped because the key
+    is referenced again. Only rows that are due are claimed, with
+    ``FOR UPDATE SKIP LOCKED`` so several workers can drain concurrently on
+    PostgreSQL. Failed keys are rescheduled with backoff, recording their
+    attempt count and error, until they run out of attempts.
+    """
+    rows = (
+        db.query(StorageDeletion)
+        .filter(
+            StorageDeletion.attempts < settings.STORAGE_GC_MAX_ATTEMPTS,
+            StorageDeletion.next_attempt_at <= _utcnow(),
+        )
+        .order_by(StorageDeletion.next_attempt_at, StorageDeletion.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not rows:
+        db.commit()
+        return 0
+
+    keys = {str(row.s3_key) for row in rows}
+    live, tombstones = _referenced_keys(db, keys)
+    failed = s3_service.delete_files(
+        settings.S3_BUCKET_NAME, sorted(keys - live)
+    )
+    _delete_previews(s3_service, keys - live - set(failed))
+    # The objects are gone, so their tombstones go in the same transaction.
+    deleted_blobs = tombstones - set(failed)
+    if deleted_blobs:
+        db.execute(
+            delete(StorageBlob)
+            .where(
+                StorageBlob.s3_key.in_(deleted_blobs),
+                StorageBlob.ref_count <= 0,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    cleared = 0
+    for row in rows:
+        error = failed.get(str(row.s3_key))
+        if error is not None:
+            attempts = int(row.attempts or 0) + 1
+            row.attempts = attempts  # type: ignore[assignment]
+            row.last_error = error  # type: ignore[assignment]
+            if attempts >= settings.STORAGE_GC_MAX_ATTEMPTS:
+                logger.error(
+                    "Storage GC gave up on %s after %d attempts: %s",
+                    row.s3_key,
+                    attempts,
+                    error,
+                )
+            else:
+                row.next_attempt_at = _utcnow() + timedelta(  # type: ignore[assignment]
+                    seconds=retry_delay(attempts)
+                )
+            continue
+        cleared += 1
+        db.delete(row)
+    db.commit()
+    if failed:
+        logger.warning(
+            "Storage GC failed to delete %d object(s)", len(failed)
+        )
+    return cleared
+
+
+class StorageGCWorker(threading.Thread):
+    """Daemon thread that drains the deletion queue periodically."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        s3_service: S3ServiceInterface,
+        interval: float,
+        batch_size: int = 1000,
+    ):
+        super().__init__(name="storage-gc", daemon=True)
+        self.session_factory = session_factory
+        self.s3_service = s3_service
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Storage GC pass failed")
+            self._stop_event.wait(self.interval)
+
+    def drain(self) -> int:
+        total = 0
+        db = self.session_factory()
+        try:
+            while not self._stop_event.is_set():
+                cleared = drain_deletion_queue(
+                    db, self.s3_service, self.batch_size
+                )
+                total += cleared
+                if cleared < self.batch_size:
+                    break
+        finally:
+            db.close()
+        return total
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        self.join(timeout)
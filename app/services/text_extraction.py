@@ -0,0 +1,66 @@
+"""
+Plain-text extraction for full-text indexing.
+
+Text, markdown, CSV and JSON are decoded directly. PDFs are supported when
+the optional ``pypdf`` package is installed; other types yield no text.
+"""
+
+import io
+import logging
+import re
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+TEXT_TYPES = {
+    "application/json",
+    "application/csv",
+    "application/x-ndjson",
+    "application/xml",
+}
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown", ".csv", ".json", ".log")
+PDF_TYPE = "application/pdf"
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+
+
+def is_indexable(content_type: Optional[str], filename: str = "") -> bool:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in TEXT_TYPES
+        or media_type == PDF_TYPE
+        or filename.lower().endswith(TEXT_EXTENSIONS + (".pdf",))
+    )
+
+
+def _extract_pdf(content: bytes) -> Optional[str]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.info("pypdf is not installed, skipping PDF text extraction")
+        return None
+    reader = PdfReader(io.BytesIO(content))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_text(
+    content: bytes, content_type: Optional[str], filename: str = ""
+) -> Optional[str]:
+    """Return the document's text, or None if the type is not supported."""
+    if not is_indexable(content_type, filename):
+        return None
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type == PDF_TYPE or filename.lower().endswith(".pdf"):
+        return _extract_pdf(content)
+    return content.decode("utf-8", errors="replace")
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """Yield lower-cased word tokens suitable for the inverted index."""
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if MIN_TOKEN_LENGTH <= len(token) <= MAX_TOKEN_LENGTH:
+            yield token
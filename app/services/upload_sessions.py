@@ -0,0 +1,207 @@
+"""
+Resumable uploads on top of S3 multipart uploads.
+
+A session fixes the total size and a part size up front. Every chunk must
+start at the session's current offset and, except for the last one, be
+exactly one part long, so chunk N maps onto multipart part N + 1 and a
+client that lost its connection resumes by re-sending only the part that
+was not acknowledged. Idle sessions expire and are aborted by the
+``uploads.expire`` job.
+"""
+
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.domain.storage import S3ServiceInterface
+from app.models.document import Document
+from app.models.upload_session import UploadPart, UploadSession, _utcnow
+from app.services.jobs import enqueue, job_handler
+from app.services.s3_service_refactored import new_object_key
+
+EXPIRE_BATCH_SIZE = 100
+
+
+def _expiry():
+    return _utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+def schedule_expiry(db: Session) -> None:
+    """Make sure a sweep runs once the newest sessions could have expired."""
+    enqueue(
+        db,
+        "uploads.expire",
+        priority=-10,
+        delay=settings.UPLOAD_SESSION_TTL_SECONDS + 60,
+        unique=True,
+    )
+
+
+def create_session(
+    db: Session,
+    s3_service: S3ServiceInterface,
+    project_id: int,
+    user_id: int,
+    filename: str,
+    content_type: str,
+    size: int,
+) -> UploadSession:
+    s3_key = new_object_key(filename, project_id)
+    upload_id = s3_service.create_multipart_upload(
+        settings.S3_BUCKET_NAME, s3_key, content_type
+    )
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        project_id=project_id,
+        user_id=user_id,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        offset=0,
+        part_size=settings.UPLOAD_PART_SIZE,
+        s3_key=s3_key,
+        s3_upload_id=upload_id,
+        expires_at=_expiry(),
+    )
+    db.add(session)
+    schedule_expiry(db)
+    return session
+
+
+def expected_chunk_size(session: UploadSession) -> int:
+    return min(int(session.part_size), int(session.size - session.offset))
+
+
+def get_live_session(
+    db: Session, session_id: str, lock: bool = False
+) -> Optional[UploadSession]:
+    """Load an unexpired session; ``lock`` serializes writers on the row."""
+    query = db.query(UploadSession).filter(
+        UploadSession.id == session_id,
+        UploadSession.expires_at > _utcnow(),
+    )
+    if lock:
+        # Refresh an instance loaded earlier in this session as well.
+        query = query.with_for_update().populate_existing()
+    return query.first()
+
+
+def append_chunk(
+    db: Session,
+    s3_service: S3ServiceInterface,
+    session: UploadSession,
+    chunk: bytes,
+) -> None:
+    """
+    Store ``chunk`` as the part at the session's offset and advance it.
+
+    The caller has checked the offset and chunk length under the row lock.
+    """
+    part_number = int(session.offset) // int(session.part_size) + 1
+    etag = s3_service.upload_part(
+        settings.S3_BUCKET_NAME,
+        str(session.s3_key),
+        str(session.s3_upload_id),
+        part_number,
+        chunk,
+    )
+    db.merge(
+        UploadPart(
+            session_id=session.id,
+            part_number=part_number,
+            etag=etag,
+            size=len(chunk),
+        )
+    )
+    setattr(session, "offset", int(session.offset) + len(chunk))
+    setattr(session, "expires_at", _expiry())
+
+
+def complete_session(
+    db: Session, s3_service: S3ServiceInterface, session: UploadSession
+) -> Document:
+    """Assemble the parts and replace the session with a Document."""
+    parts = (
+        db.query(UploadPart.part_number, UploadPart.etag)
+        .filter(UploadPart.session_id == session.id)
+        .order_by(UploadPart.part_number)
+        .all()
+    )
+    s3_service.complete_multipart_upload(
+        settings.S3_BUCKET_NAME,
+        str(session.s3_key),
+        str(session.s3_upload_id),
+        [(row.part_number, row.etag) for row in parts],
+    )
+    document = Document(
+        filename=session.filename,
+        s3_key=session.s3_key,
+        content_type=session.content_type,
+        size=int(session.size),
+        project_id=session.project_id,
+    )
+    db.add(document)
+    _delete_session(db, str(session.id))
+    return document
+
+
+def abort_session(
+    db: Session, s3_service: S3ServiceInterface, session: UploadSession
+) -> None:
+    try:
+        s3_service.abort_multipart_upload(
+            settings.S3_BUCKET_NAME,
+            str(session.s3_key),
+            str(session.s3_upload_id),
+        )
+    except Exception:
+        # Already gone; S3 lifecycle rules are the backstop for the rest.
+        pass
+    _delete_session(db, str(session.id))
+
+
+def _delete_session(db: Session, session_id: str) -> None:
+    db.query(UploadPart).filter(UploadPart.session_id == session_id).delete(
+        synchronize_session=False
+    )
+    db.query(UploadSession).filter(UploadSession.id == session_id).delete(
+        synchronize_session=False
+    )
+
+
+def expire_sessions(
+    db: Session,
+    s3_service: S3ServiceInterface,
+    batch_size: int = EXPIRE_BATCH_SIZE,
+) -> int:
+    """Abort sessions past their expiry; commits and returns the count."""
+    expired = 0
+    while True:
+        sessions = (
+            db.query(UploadSession)
+            .filter(UploadSession.expires_at <= _utcnow())
+            .order_by(UploadSession.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for session in sessions:
+            abort_session(db, s3_service, session)
+        db.commit()
+        expired += len(sessions)
+        if len(sessions) < batch_size:
+            return expired
+
+
+@job_handler("uploads.expire")
+def expire_upload_sessions(db: Session, payload: Dict[str, Any]) -> None:
+    """Abort expired sessions and re-arm the sweep while any remain."""
+    from app.api.documents import get_s3_service
+
+    expire_sessions(db, get_s3_service())
+    if db.query(UploadSession.id).first() is not None:
+        schedule_expiry(db)
+        db.commit()
@@ -0,0 +1,145 @@
+"""
+Streamed ZIP archives of a project's documents.
+
+The archive is produced on the fly: ``zipfile`` writes into a sink that is
+drained after every chunk, so nothing larger than one read chunk per entry
+is held in memory. Entries are written with data descriptors (the sink is
+not seekable) and ZIP64 headers, so archives of any size are valid. Up to
+``read_ahead`` objects are opened concurrently while the current one is
+being written, hiding S3 first-byte latency.
+"""
+
+import io
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    IO,
+    BinaryIO,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    Optional,
+    cast,
+)
+
+from app.services.storage_codec import is_compressible, open_decoded
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class ArchiveEntry:
+    name: str
+    s3_key: str
+    content_type: Optional[str] = None
+    content_encoding: Optional[str] = None
+    modified: Optional[datetime] = None
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable buffer that hands out what was written."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[override]
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> Iterator[bytes]:
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            yield data
+
+
+def unique_names(names: Iterable[str]) -> Iterator[str]:
+    """Make archive member names safe and unique ("a.txt", "a (1).txt")."""
+    seen: set[str] = set()
+    for name in names:
+        name = (
+            name.replace("\\", "_").replace("/", "_").lstrip(".") or "file"
+        )
+        candidate = name
+        stem, ext = os.path.splitext(name)
+        counter = 1
+        while candidate in seen:
+            candidate = f"{stem} ({counter}){ext}"
+            counter += 1
+        seen.add(candidate)
+        yield candidate
+
+
+def _zip_info(entry: ArchiveEntry) -> zipfile.ZipInfo:
+    modified = entry.modified or datetime.now()
+    info = zipfile.ZipInfo(
+        entry.name, date_time=modified.timetuple()[:6]  # type: ignore[arg-type]
+    )
+    info.compress_type = (
+        zipfile.ZIP_DEFLATED
+        if is_compressible(entry.content_type)
+        else zipfile.ZIP_STORED
+    )
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def _close_result(future: Future) -> None:
+    if future.exception() is None:
+        future.result().close()
+
+
+def stream_zip(
+    entries: Iterable[ArchiveEntry],
+    open_entry: Callable[[ArchiveEntry], BinaryIO],
+    read_ahead: int = 4,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``entries`` chunk by chunk."""
+    sink = _Sink()
+    pending: Deque[tuple[ArchiveEntry, Future]] = deque()
+    remaining = iter(entries)
+
+    with ThreadPoolExecutor(max_workers=max(1, read_ahead)) as pool:
+
+        def schedule() -> None:
+            entry = next(remaining, None)
+            if entry is not None:
+                pending.append((entry, pool.submit(open_entry, entry)))
+
+        try:
+            for _ in range(max(1, read_ahead)):
+                schedule()
+            # ZipFile only calls write()/flush() and tell() (which it
+            # tolerates failing) on an unseekable sink.
+            with zipfile.ZipFile(cast(IO[bytes], sink), mode="w") as archive:
+                while pending:
+                    entry, future = pending.popleft()
+                    schedule()
+                    raw = future.result()
+                    source = open_decoded(raw, entry.content_encoding)
+                    try:
+                        with archive.open(
+                            _zip_info(entry), mode="w", force_zip64=True
+                        ) as member:
+                            while chunk := source.read(chunk_size):
+                                member.write(chunk)
+                                yield from sink.drain()
+                    finally:
+                        source.close()
+                        raw.close()
+                    yield from sink.drain()
+            yield from sink.drain()
+        finally:
+            # Close streams opened ahead if the client went away early.
+            for _, future in pending:
+                if not future.cancel():
+                    future.add_done_callback(_close_result)
@@ -0,0 +1,114 @@
+"""
+Benchmark: one full decode per rendition vs. the decode-once pipeline.
+
+Generates a corpus of JPEG "photos" at common camera resolutions and
+renders the default thumb/medium/large set both ways:
+
+    python -m benchmarks.bench_image_pipeline --iterations 3
+
+"decoded MP" is the size of the pixel buffer the decoder produced, which
+dominates peak memory for large sources.
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from app.services.image_pipeline import (
+    DEFAULT_RENDITIONS_SPEC,
+    parse_renditions,
+    render_renditions,
+)
+
+CORPUS = {
+    "2 MP": (1600, 1200),
+    "12 MP": (4000, 3000),
+    "24 MP": (6000, 4000),
+    "48 MP": (8000, 6000),
+}
+
+
+def _photo(size) -> bytes:
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for step in range(0, size[0], max(size[0] // 40, 1)):
+        draw.line((step, 0, size[0] - step, size[1]), fill=(200, 80, 40))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _naive(data: bytes, renditions) -> int:
+    """What the Lambdas did before: a full decode for every output."""
+    decoded = 0
+    for rendition in renditions:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        decoded = max(decoded, image.width * image.height)
+        image.thumbnail(
+            (rendition.max_width, rendition.max_height),
+            Image.Resampling.LANCZOS,
+        )
+        image.save(io.BytesIO(), format="JPEG", quality=rendition.quality)
+    return decoded
+
+
+def _pipeline(data: bytes, renditions) -> int:
+    from app.services import image_pipeline
+
+    decoded = {}
+    original_decode = image_pipeline.decode
+
+    def measured(source, box):
+        image = original_decode(source, box)
+        decoded["pixels"] = image.width * image.height
+        return image
+
+    image_pipeline.decode = measured
+    try:
+        render_renditions(data, renditions)
+    finally:
+        image_pipeline.decode = original_decode
+    return decoded["pixels"]
+
+
+def _timed(fn, iterations: int):
+    samples, pixels = [], 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        pixels = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), pixels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--renditions", default=DEFAULT_RENDITIONS_SPEC)
+    args = parser.parse_args()
+    renditions = parse_renditions(args.renditions)
+
+    print(
+        f"{'source':<8} {'naive ms':>10} {'pipeline ms':>12} {'speedup':>8}"
+        f" {'naive decoded MP':>17} {'pipeline decoded MP':>20}"
+    )
+    for label, size in CORPUS.items():
+        data = _photo(size)
+        naive_ms, naive_px = _timed(
+            lambda: _naive(data, renditions), args.iterations
+        )
+        pipe_ms, pipe_px = _timed(
+            lambda: _pipeline(data, renditions), args.iterations
+        )
+        print(
+            f"{label:<8} {naive_ms:>10.1f} {pipe_ms:>12.1f}"
+            f" {naive_ms / pipe_ms:>7.1f}x"
+            f" {naive_px / 1e6:>17.1f} {pipe_px / 1e6:>20.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark: cold-start and warm-invocation timings of the Lambda handlers.
+
+Every sample runs in a fresh interpreter, like a new execution
+environment, under moto so no AWS account is needed:
+
+    python -m benchmarks.bench_lambda_cold_start --samples 5 --warm 20
+
+"import ms" is the module load alone, measured before anything else is
+imported (boto3 included), and "heavy modules" lists what that load
+pulled in. "init ms" is the module load under moto, which has already
+imported boto3 itself, and the other columns are handler calls in the
+same process: the first includes creating clients and any lazy imports,
+warm ones reuse them.
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUCKET = "bench-bucket"
+HEAVY_MODULES = ("boto3", "botocore", "PIL")
+
+# (label, module, event kind)
+CASES = (
+    ("s3 events: document", "lambda_function", "document"),
+    ("s3 events: image", "lambda_function", "image"),
+    ("image resize", "app.services.lambda_image_resize", "resize"),
+)
+
+
+def _environment(tmp_dir: str) -> dict:
+    return {
+        **os.environ,
+        "AWS_ACCESS_KEY_ID": "test",
+        "AWS_SECRET_ACCESS_KEY": "test",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "AWS_REGION": "us-east-1",
+        "PROJECT_SIZE_DB": os.path.join(tmp_dir, "sizes.db"),
+        "PYTHONPATH": REPO_ROOT,
+    }
+
+
+def _s3_event(key: str, size: int) -> dict:
+    return {
+        "Records": [
+            {
+                "eventName": "ObjectCreated:Put",
+                "s3": {
+                    "bucket": {"name": BUCKET},
+                    "object": {"key": key, "size": size},
+                },
+            }
+        ]
+    }
+
+
+def _child_import(module: str) -> dict:
+    import importlib
+
+    start = time.perf_counter()
+    importlib.import_module(module)
+    import_ms = (time.perf_counter() - start) * 1000
+    return {
+        "import_ms": import_ms,
+        "heavy": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def _child_invoke(module: str, kind: str, warm: int) -> dict:
+    import importlib
+
+    import boto3
+    from moto import mock_s3
+    from PIL import Image
+
+    with mock_s3():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket=BUCKET)
+        buffer = io.BytesIO()
+        Image.new("RGB", (2000, 1500), color="red").save(buffer, "JPEG")
+        photo = buffer.getvalue()
+        image_key = "documents/1/ab/photo.jpg"
+        s3.put_object(Bucket=BUCKET, Key=image_key, Body=photo)
+
+        start = time.perf_counter()
+        handler = importlib.import_module(module).lambda_handler
+        init_ms = (time.perf_counter() - start) * 1000
+
+        if kind == "resize":
+            event = {"bucket": BUCKET, "key": image_key, "size": [256, 256]}
+        elif kind == "image":
+            event = _s3_event(image_key, len(photo))
+        else:
+            event = _s3_event("documents/1/cd/report.pdf", 1024)
+
+        samples = []
+        for _ in range(warm + 1):
+            start = time.perf_counter()
+            handler(event, None)
+            samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "init_ms": init_ms,
+        "first_ms": samples[0],
+        "warm_ms": statistics.median(samples[1:]),
+    }
+
+
+def _run_child(args, env) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_lambda_cold_start", *args],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    # Handlers print progress; the result is the last line.
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--warm", type=int, default=20)
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, module, *rest = args.child
+        if mode == "import":
+            result = _child_import(module)
+        else:
+            result = _child_invoke(module, rest[0], args.warm)
+        print(json.dumps(result))
+        return
+
+    print(
+        f"{'handler':<22} {'import ms':>10} {'init ms':>8} {'first ms':>9}"
+        f" {'warm ms':>8}  heavy modules"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = _environment(tmp_dir)
+        for label, module, kind in CASES:
+            imports, invokes = [], []
+            for _ in range(args.samples):
+                imports.append(
+                    _run_child(["--child", "import", module], env)
+                )
+                invokes.append(
+                    _run_child(
+                        [
+                            "--warm",
+                            str(args.warm),
+                            "--child",
+                            "invoke",
+                            module,
+                            kind,
+                        ],
+                        env,
+                    )
+                )
+
+            def median(samples, field):
+                return statistics.median(s[field] for s in samples)
+
+            print(
+                f"{label:<22} {median(imports, 'import_ms'):>10.1f}"
+                f" {median(invokes, 'init_ms'):>8.1f}"
+                f" {median(invokes, 'first_ms'):>9.1f}"
+                f" {median(invokes, 'warm_ms'):>8.1f}"
+                f"  {', '.join(imports[0]['heavy']) or '-'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Microbenchmark: per-call S3 client construction vs. the pooled client.
+
+Runs against moto so it needs no AWS account:
+
+    python -m benchmarks.bench_s3_client --iterations 200
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import boto3
+from moto import mock_s3
+
+from app.core.config import settings
+from app.services.s3_service_refactored import S3Service, reset_s3_client
+
+
+def _per_call_client_upload(content: bytes) -> None:
+    s3 = boto3.client("s3", region_name=os.environ["AWS_REGION"])
+    s3.put_object(Bucket=settings.S3_BUCKET_NAME, Key="bench", Body=content)
+
+
+def _timed(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<22} mean={statistics.mean(samples):7.3f} ms  "
+        f"p50={statistics.median(samples):7.3f} ms  p95={p95:7.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--size", type=int, default=1024)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    content = os.urandom(args.size)
+
+    with mock_s3():
+        boto3.client(
+            "s3", region_name=os.environ["AWS_REGION"]
+        ).create_bucket(Bucket=settings.S3_BUCKET_NAME)
+        reset_s3_client()
+        service = S3Service()
+        service.upload_file(
+            content, "warmup.bin", "application/octet-stream"
+        )
+
+        per_call = _timed(
+            lambda: _per_call_client_upload(content), args.iterations
+        )
+        pooled = _timed(
+            lambda: service.upload_file(
+                content, "bench.bin", "application/octet-stream"
+            ),
+            args.iterations,
+        )
+
+    _report("per-call client", per_call)
+    _report("pooled client", pooled)
+    print(
+        "speedup: "
+        f"{statistics.mean(per_call) / statistics.mean(pooled):.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
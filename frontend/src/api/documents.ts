@@ -32,6 +32,15 @@ export const documentsApi = {
     link.remove()
   },
 
+  // Object URL of a small preview rendered by the API; revoke when done
+  preview: async (documentId: number, width: number, height: number) => {
+    const response = await apiClient.get(`/document/${documentId}/preview`, {
+      params: { w: width, h: height, fmt: 'webp' },
+      responseType: 'blob'
+    })
+    return window.URL.createObjectURL(response.data)
+  },
+
   delete: async (documentId: number) => {
     await apiClient.delete(`/document/${documentId}`)
   }
@@ -1,4 +1,4 @@
-import { useState, useRef } from 'react'
+import { useState, useRef, useEffect } from 'react'
 import { useParams } from 'react-router-dom'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { projectsApi } from '../api/projects'
@@ -109,11 +109,16 @@ export const ProjectDetail = () => {
           <div style={styles.docList}>
             {documents?.map((doc) => (
               <div key={doc.id} style={styles.docCard}>
-                <div>
-                  <p style={styles.filename}>{doc.filename}</p>
-                  <p style={styles.meta}>
-                    {(doc.size / 1024).toFixed(2)} KB • {new Date(doc.uploaded_at).toLocaleDateString()}
-                  </p>
+                <div style={styles.docInfo}>
+                  {doc.content_type.startsWith('image/') && (
+                    <DocumentThumbnail documentId={doc.id} />
+                  )}
+                  <div>
+                    <p style={styles.filename}>{doc.filename}</p>
+                    <p style={styles.meta}>
+                      {(doc.size / 1024).toFixed(2)} KB • {new Date(doc.uploaded_at).toLocaleDateString()}
+                    </p>
+                  </div>
                 </div>
                 <div style={styles.docActions}>
                   <button
@@ -141,6 +146,33 @@ export const ProjectDetail = () => {
   )
 }
 
+function DocumentThumbnail({ documentId }: { documentId: number }) {
+  const [url, setUrl] = useState<string | null>(null)
+
+  useEffect(() => {
+    let objectUrl: string | null = null
+    let cancelled = false
+    documentsApi
+      .preview(documentId, 96, 96)
+      .then((previewUrl) => {
+        objectUrl = previewUrl
+        if (cancelled) URL.revokeObjectURL(previewUrl)
+        else setUrl(previewUrl)
+      })
+      .catch(() => setUrl(null))
+    return () => {
+      cancelled = true
+      if (objectUrl) URL.revokeObjectURL(objectUrl)
+    }
+  }, [documentId])
+
+  return url ? (
+    <img src={url} alt="" style={styles.thumbnail} />
+  ) : (
+    <div style={styles.thumbnail} />
+  )
+}
+
 const styles = {
   container: {
     maxWidth: '1200px',
@@ -213,6 +245,18 @@ const styles = {
     borderRadius: '4px',
     border: '1px solid #444'
   },
+  docInfo: {
+    display: 'flex',
+    alignItems: 'center',
+    gap: '0.75rem'
+  },
+  thumbnail: {
+    width: '48px',
+    height: '48px',
+    objectFit: 'cover' as const,
+    borderRadius: '4px',
+    backgroundColor: '#333'
+  },
   filename: {
     fontWeight: 'bold',
     marginBottom: '0.25rem'
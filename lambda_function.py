@@ -1,92 +1,761 @@
-import io
 import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from typing import NamedTuple, Optional
+from urllib.parse import unquote_plus
 
-import boto3
-from PIL import Image
+# boto3 and Pillow are imported on first use: removal events never touch
+# Pillow, and neither is needed to load the module.
 
-s3_client = boto3.client("s3")
+# Clients live for the life of the execution environment so warm
+# invocations reuse their connection pools. Creating a client from the
+# shared default session is not thread-safe, hence the lock.
+s3_client = None
+dynamodb_client = None
+_client_lock = threading.Lock()
+
+
+def _client_config():
+    from botocore.config import Config
+
+    return Config(
+        connect_timeout=2,
+        read_timeout=10,
+        retries={"mode": "standard", "max_attempts": 3},
+        # One connection per image worker plus the accounting thread
+        max_pool_connections=image_workers() + 1,
+        tcp_keepalive=True,
+    )
+
+
+def get_s3_client():
+    global s3_client
+    if s3_client is None:
+        import boto3
+
+        with _client_lock:
+            if s3_client is None:
+                s3_client = boto3.client("s3", config=_client_config())
+    return s3_client
+
+
+def get_dynamodb_client():
+    global dynamodb_client
+    if dynamodb_client is None:
+        import boto3
+
+        with _client_lock:
+            if dynamodb_client is None:
+                dynamodb_client = boto3.client(
+                    "dynamodb", config=_client_config()
+                )
+    return dynamodb_client
+
+
+def image_pipeline():
+    """The Pillow-backed rendition pipeline, imported on first use."""
+    try:
+        # Packaged next to this file in the Lambda zip
+        import image_pipeline as pipeline
+    except ImportError:
+        from app.services import image_pipeline as pipeline
+    return pipeline
 
 
 def lambda_handler(event, context):
     """
     AWS Lambda function for S3 event processing:
     1. Resize images when uploaded
-    2. Calculate total project file sizes
+    2. Keep running per-project size totals up to date
+
+    Accepts S3 notifications directly or wrapped in SQS messages. Image
+    work runs on a pool sized to the available vCPUs, size changes are
+    applied once per project, and records that failed either step are
+    returned as ``batchItemFailures`` so only those are redelivered.
     """
 
-    for record in event["Records"]:
-        bucket = record["s3"]["bucket"]["name"]
-        key = record["s3"]["object"]["key"]
-        # size = record["s3"]["object"]["size"]  # Unused variable removed
+    # Scheduled full reconcile: {"reconcile": {"bucket": ..., "project_id": ...}}
+    if "reconcile" in event:
+        request = event["reconcile"]
+        total_size = reconcile_project_size(
+            request["bucket"], request["project_id"]
+        )
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"total_size": total_size}),
+        }
+
+    failed = []
+    records = []
+    for item_id, s3_records in _unwrap_records(event["Records"]):
+        try:
+            for record in s3_records:
+                parsed = _parse_s3_record(record)
+                # Renditions we wrote ourselves must not trigger more work
+                if not is_generated_key(parsed.key):
+                    records.append((item_id, parsed))
+        except Exception as e:
+            print(f"Error parsing record {item_id}: {str(e)}")
+            failed.append(item_id)
+
+    images = [
+        (item_id, record)
+        for item_id, record in records
+        if record.size is not None
+        and record.key.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+    if images:
+        failed.extend(_process_images(images))
+
+    # Apply the events to the project sizes, one update per project
+    changes_by_project = {}
+    for item_id, record in records:
+        project_id = project_id_from_key(record.key)
+        if project_id is not None:
+            item_ids, changes = changes_by_project.setdefault(
+                project_id, ([], {})
+            )
+            item_ids.append(item_id)
+            changes[record.key] = record.size  # the latest event wins
+    for project_id, (item_ids, changes) in changes_by_project.items():
+        try:
+            update_project_sizes(project_id, changes)
+        except Exception as e:
+            print(f"Error updating project size: {str(e)}")
+            failed.extend(item_ids)
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps("Processing complete"),
+        "batchItemFailures": [
+            {"itemIdentifier": item_id} for item_id in dict.fromkeys(failed)
+        ],
+    }
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp")
+# Prefixes of objects this function writes itself
+GENERATED_PREFIXES = ("resized/",)
+
+
+class ObjectEvent(NamedTuple):
+    bucket: str
+    key: str
+    size: Optional[int]  # None for removal events
+    version: Optional[str]  # version ID, else ETag, when the event has one
+
+    @property
+    def marker(self):
+        """Identity of this object version for deduplication, if known."""
+        return f"{self.key}#{self.version}" if self.version else None
+
+
+def is_generated_key(key):
+    return key.startswith(GENERATED_PREFIXES)
+
+
+def image_workers():
+    """IMAGE_WORKERS if set, else one worker per vCPU."""
+    return int(os.environ.get("IMAGE_WORKERS", 0)) or os.cpu_count() or 1
 
-        # Check if it's an image
-        if key.lower().endswith((".png", ".jpg", ".jpeg", ".gif", ".bmp")):
+
+def _unwrap_records(records):
+    """Yield ``(item identifier, S3 records)`` for each delivered record."""
+    for record in records:
+        if record.get("eventSource") == "aws:sqs":
             try:
-                resize_image(bucket, key)
-            except Exception as e:
-                print(f"Error resizing image {key}: {str(e)}")
+                body = json.loads(record["body"])
+            except ValueError:
+                body = {}
+            # s3:TestEvent and other bodies without records are no-ops
+            yield record["messageId"], body.get("Records", [])
+        else:
+            yield record["s3"]["object"]["key"], [record]
+
+
+def _parse_s3_record(record):
+    obj = record["s3"]["object"]
+    removed = record.get("eventName", "").startswith("ObjectRemoved")
+    return ObjectEvent(
+        bucket=record["s3"]["bucket"]["name"],
+        key=unquote_plus(obj["key"]),
+        size=None if removed else obj.get("size", 0),
+        version=obj.get("versionId") or obj.get("eTag"),
+    )
 
-        # Calculate project size
+
+def _process_images(images):
+    """
+    Render ``(item_id, ObjectEvent)`` images on the worker pool.
+
+    Each object version is claimed in the idempotency store first, so
+    redelivered and duplicate events are skipped. Returns the item IDs
+    whose image failed.
+    """
+    store = get_idempotency_store()
+    claimed = []
+    for item_id, record in images:
         try:
-            calculate_project_size(bucket, key)
+            fresh = record.marker is None or store.claim(record.marker)
         except Exception as e:
-            print(f"Error calculating project size: {str(e)}")
+            # The store only saves work; fall back to processing.
+            print(f"Error checking idempotency of {record.key}: {str(e)}")
+            fresh = True
+        if fresh:
+            claimed.append((item_id, record))
+        else:
+            print(f"Skipping already processed image {record.key}")
+    if not claimed:
+        return []
 
-    return {"statusCode": 200, "body": json.dumps("Processing complete")}
+    failed = []
+    workers = min(len(claimed), image_workers())
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(resize_image, record.bucket, record.key): (
+                item_id,
+                record,
+            )
+            for item_id, record in claimed
+        }
+        for future in as_completed(futures):
+            item_id, record = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error resizing image {record.key}: {str(e)}")
+                failed.append(item_id)
+                outcome = store.release
+            else:
+                outcome = store.complete
+            if record.marker is not None:
+                try:
+                    outcome(record.marker)
+                except Exception as e:
+                    print(f"Error recording {record.key}: {str(e)}")
+    return failed
 
 
-def resize_image(bucket, key):
-    """Resize image to max 800x800 pixels"""
-    response = s3_client.get_object(Bucket=bucket, Key=key)
-    image_content = response["Body"].read()
+def image_budget(pipeline):
+    """Per-image limits, overridable with IMAGE_MAX_* variables."""
+    defaults = pipeline.ImageBudget()
+    return pipeline.ImageBudget(
+        max_bytes=int(os.environ.get("IMAGE_MAX_BYTES", defaults.max_bytes)),
+        max_source_pixels=int(
+            os.environ.get(
+                "IMAGE_MAX_SOURCE_PIXELS", defaults.max_source_pixels
+            )
+        ),
+        max_decoded_pixels=int(
+            os.environ.get("IMAGE_MAX_PIXELS", defaults.max_decoded_pixels)
+        ),
+    )
+
+
+def quality_target(pipeline):
+    """Variant quality goal: RENDITION_MIN_PSNR, else RENDITION_MAX_BYTES."""
+    max_bytes = os.environ.get("RENDITION_MAX_BYTES")
+    min_psnr = os.environ.get("RENDITION_MIN_PSNR")
+    if max_bytes and not min_psnr:
+        return pipeline.QualityTarget(
+            min_psnr=None, max_bytes=int(max_bytes)
+        )
+    if min_psnr:
+        return pipeline.QualityTarget(min_psnr=float(min_psnr))
+    return pipeline.QualityTarget()
+
 
-    image = Image.open(io.BytesIO(image_content))
+def resize_image(bucket, key):
+    """
+    Write every configured rendition of an image in one pass.
 
-    # Resize if larger than 800x800
-    if image.width > 800 or image.height > 800:
-        image.thumbnail((800, 800), Image.Resampling.LANCZOS)
+    The source is decoded once (reduced on decode for JPEGs); renditions
+    come from the RENDITIONS environment variable, e.g.
+    "thumb:150x150,medium:800x800,large:1600x1600". The object is streamed
+    to a spooled file and images over the budget (see image_budget) are
+    skipped without being decoded.
 
-        buffer = io.BytesIO()
-        image_format = image.format or "JPEG"
-        image.save(buffer, format=image_format)
-        buffer.seek(0)
+    Each rendition also gets the RENDITION_FORMATS variants ("avif,webp"
+    by default) that come out smaller, stored next to it with the format's
+    extension. A manifest listing everything is written last, so readers
+    never see a partial set.
+    """
+    if is_generated_key(key):
+        raise ValueError(f"Refusing to resize generated object {key}")
+    pipeline = image_pipeline()
+    s3 = get_s3_client()
+    variants = pipeline.parse_formats(
+        os.environ.get("RENDITION_FORMATS", "avif,webp")
+    )
+    renditions = [
+        replace(rendition, variants=variants)
+        for rendition in pipeline.parse_renditions(
+            os.environ.get("RENDITIONS", pipeline.DEFAULT_RENDITIONS_SPEC)
+        )
+    ]
+    response = s3.get_object(Bucket=bucket, Key=key)
+    try:
+        rendered = pipeline.render_object(
+            response["Body"],
+            renditions,
+            image_budget(pipeline),
+            content_length=response.get("ContentLength"),
+            target=quality_target(pipeline),
+        )
+    except pipeline.ImageTooLarge as e:
+        # Permanent: retrying would only repeat the rejection.
+        response["Body"].close()
+        print(f"Skipping image {key}: {e}")
+        return []
 
-        # Upload resized image
-        resized_key = f"resized/{key}"
-        s3_client.put_object(
+    manifest = pipeline.build_manifest(key, rendered)
+    written = []
+    for image in rendered:
+        resized_key = pipeline.output_key(image, key)
+        s3.put_object(
             Bucket=bucket,
             Key=resized_key,
-            Body=buffer,
-            ContentType=response["ContentType"],
+            Body=image.data,
+            ContentType=image.content_type,
+        )
+        written.append(resized_key)
+    s3.put_object(
+        Bucket=bucket,
+        Key=pipeline.manifest_key(key),
+        Body=json.dumps(manifest).encode(),
+        ContentType="application/json",
+    )
+    print(f"Renditions uploaded: {', '.join(written)}")
+    return written
+
+
+MAX_SIZE_MB = 100
+
+
+class SqliteSizeStore:
+    """
+    Local stand-in for the project size table.
+
+    Keeps the size of every tracked object so removal events, which carry
+    no size, can be applied as negative deltas.
+    """
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS project_sizes (
+                project_id TEXT PRIMARY KEY,
+                total_size INTEGER NOT NULL,
+                object_count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS object_sizes (
+                key TEXT PRIMARY KEY,
+                project_id TEXT NOT NULL,
+                size INTEGER NOT NULL
+            );
+            """
         )
-        print(f"Resized image uploaded: {resized_key}")
 
+    def apply(self, project_id, key, size):
+        """Record ``key`` at ``size`` (None = removed); return the total."""
+        return self.apply_many(project_id, {key: size})
 
-def calculate_project_size(bucket, key):
-    """Calculate total size of all files in a project"""
-    # Extract project ID from key (assuming format: documents/{uuid}/{filename})
+    def apply_many(self, project_id, changes):
+        """Apply ``{key: size or None}`` in one transaction."""
+        db = self.connection
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            size_delta = count_delta = 0
+            for key, size in changes.items():
+                row = db.execute(
+                    "SELECT size FROM object_sizes WHERE key = ?", (key,)
+                ).fetchone()
+                old_size = row[0] if row else None
+                if size is None:
+                    db.execute(
+                        "DELETE FROM object_sizes WHERE key = ?", (key,)
+                    )
+                else:
+                    db.execute(
+                        "INSERT OR REPLACE INTO object_sizes "
+                        "VALUES (?, ?, ?)",
+                        (key, project_id, size),
+                    )
+                size_delta += (size or 0) - (old_size or 0)
+                count_delta += (size is not None) - (old_size is not None)
+            db.execute(
+                "INSERT OR IGNORE INTO project_sizes VALUES (?, 0, 0)",
+                (project_id,),
+            )
+            db.execute(
+                "UPDATE project_sizes SET total_size = total_size + ?, "
+                "object_count = object_count + ? WHERE project_id = ?",
+                (size_delta, count_delta, project_id),
+            )
+            total = self.total(project_id)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return total
+
+    def reset(self, project_id, objects):
+        """Replace a project's tracked objects with ``{key: size}``."""
+        db = self.connection
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "DELETE FROM object_sizes WHERE project_id = ?",
+                (project_id,),
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO object_sizes VALUES (?, ?, ?)",
+                [(key, project_id, size) for key, size in objects.items()],
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO project_sizes VALUES (?, ?, ?)",
+                (project_id, sum(objects.values()), len(objects)),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return sum(objects.values())
+
+    def total(self, project_id):
+        row = self.connection.execute(
+            "SELECT total_size FROM project_sizes WHERE project_id = ?",
+            (project_id,),
+        ).fetchone()
+        return row[0] if row else 0
+
+
+class DynamoSizeStore:
+    """
+    DynamoDB table keyed by ``pk``: ``project#<id>`` items hold the running
+    totals and ``object#<key>`` items the size of each tracked object.
+    """
+
+    MAX_RETRIES = 5
+    # A transaction holds at most 100 items; one is the project total.
+    MAX_TRANSACTION_OBJECTS = 99
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self.client = get_dynamodb_client()
+
+    def _object_size(self, key):
+        item = self.client.get_item(
+            TableName=self.table_name,
+            Key={"pk": {"S": f"object#{key}"}},
+            ConsistentRead=True,
+        ).get("Item")
+        return int(item["object_size"]["N"]) if item else None
+
+    def apply(self, project_id, key, size):
+        return self.apply_many(project_id, {key: size})
+
+    def apply_many(self, project_id, changes):
+        """
+        Apply ``{key: size or None}`` with one transaction per chunk.
+
+        Each transaction writes the changed objects conditionally on the
+        sizes just read plus a single ``ADD`` to the project total.
+        """
+        items = list(changes.items())
+        for start in range(0, len(items), self.MAX_TRANSACTION_OBJECTS):
+            end = start + self.MAX_TRANSACTION_OBJECTS
+            self._apply_chunk(project_id, items[start:end])
+        return self.total(project_id)
+
+    def _object_write(self, project_id, key, size, old_size):
+        if old_size is None:
+            condition = {"ConditionExpression": "attribute_not_exists(pk)"}
+        else:
+            condition = {
+                "ConditionExpression": "object_size = :old",
+                "ExpressionAttributeValues": {":old": {"N": str(old_size)}},
+            }
+        object_key = {"pk": {"S": f"object#{key}"}}
+        if size is None:
+            return {
+                "Delete": {
+                    "TableName": self.table_name,
+                    "Key": object_key,
+                    **condition,
+                }
+            }
+        return {
+            "Put": {
+                "TableName": self.table_name,
+                "Item": {
+                    **object_key,
+                    "project_id": {"S": project_id},
+                    "object_size": {"N": str(size)},
+                },
+                **condition,
+            }
+        }
+
+    def _apply_chunk(self, project_id, items):
+        for _ in range(self.MAX_RETRIES):
+            writes = []
+            size_delta = count_delta = 0
+            for key, size in items:
+                old_size = self._object_size(key)
+                if size == old_size:
+                    continue  # redelivered event, or removing an unknown key
+                writes.append(
+                    self._object_write(project_id, key, size, old_size)
+                )
+                size_delta += (size or 0) - (old_size or 0)
+                count_delta += (size is not None) - (old_size is not None)
+            if not writes:
+                return
+            try:
+                self.client.transact_write_items(
+                    TransactItems=[
+                        *writes,
+                        {
+                            "Update": {
+                                "TableName": self.table_name,
+                                "Key": {
+                                    "pk": {"S": f"project#{project_id}"}
+                                },
+                                "UpdateExpression": (
+                                    "ADD total_size :size, object_count :count"
+                                ),
+                                "ExpressionAttributeValues": {
+                                    ":size": {"N": str(size_delta)},
+                                    ":count": {"N": str(count_delta)},
+                                },
+                            }
+                        },
+                    ]
+                )
+            except self.client.exceptions.TransactionCanceledException:
+                # A concurrent event changed an object first; re-read them.
+                continue
+            return
+        raise RuntimeError(
+            f"Too much contention updating sizes of project {project_id}"
+        )
+
+    def reset(self, project_id, objects):
+        paginator = self.client.get_paginator("scan")
+        stale = [
+            item["pk"]["S"]
+            for page in paginator.paginate(
+                TableName=self.table_name,
+                FilterExpression="project_id = :project",
+                ExpressionAttributeValues={":project": {"S": project_id}},
+                ProjectionExpression="pk",
+            )
+            for item in page.get("Items", [])
+        ]
+        for pk in stale:
+            self.client.delete_item(
+                TableName=self.table_name, Key={"pk": {"S": pk}}
+            )
+        for key, size in objects.items():
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    "pk": {"S": f"object#{key}"},
+                    "project_id": {"S": project_id},
+                    "object_size": {"N": str(size)},
+                },
+            )
+        total = sum(objects.values())
+        self.client.put_item(
+            TableName=self.table_name,
+            Item={
+                "pk": {"S": f"project#{project_id}"},
+                "total_size": {"N": str(total)},
+                "object_count": {"N": str(len(objects))},
+            },
+        )
+        return total
+
+    def total(self, project_id):
+        item = self.client.get_item(
+            TableName=self.table_name,
+            Key={"pk": {"S": f"project#{project_id}"}},
+            ConsistentRead=True,
+        ).get("Item")
+        return int(item["total_size"]["N"]) if item else 0
+
+
+_size_store = None
+
+
+def get_size_store():
+    """DynamoDB when PROJECT_SIZE_TABLE is set, else a local SQLite file."""
+    global _size_store
+    if _size_store is None:
+        table_name = os.environ.get("PROJECT_SIZE_TABLE")
+        if table_name:
+            _size_store = DynamoSizeStore(table_name)
+        else:
+            _size_store = SqliteSizeStore(
+                os.environ.get("PROJECT_SIZE_DB", "/tmp/project_sizes.db")
+            )
+    return _size_store
+
+
+def project_id_from_key(key):
+    """Project ID of a ``documents/{project}/...`` key, else None."""
     parts = key.split("/")
-    if len(parts) >= 2 and parts[0] == "documents":
-        project_prefix = f"{parts[0]}/{parts[1]}/"
+    if len(parts) >= 3 and parts[0] == "documents":
+        return parts[1]
+    return None
 
-        total_size = 0
-        paginator = s3_client.get_paginator("list_objects_v2")
 
-        for page in paginator.paginate(Bucket=bucket, Prefix=project_prefix):
-            if "Contents" in page:
-                for obj in page["Contents"]:
-                    total_size += obj["Size"]
+def update_project_size(key, size):
+    """
+    Apply one object event to its project's stored total.
+
+    ``size`` is the object's new size, or None when it was removed. Costs
+    a constant number of store operations regardless of project size.
+    """
+    project_id = project_id_from_key(key)
+    if project_id is None:
+        return 0
+    return update_project_sizes(project_id, {key: size})
+
+
+def update_project_sizes(project_id, changes):
+    """Apply a batch of ``{key: size or None}`` changes to one project."""
+    total_size = get_size_store().apply_many(project_id, changes)
+    size_mb = total_size / (1024 * 1024)
+    print(f"Project {project_id} total size: {size_mb:.2f} MB")
+    if size_mb > MAX_SIZE_MB:
+        print(f"WARNING: Project {project_id} exceeds size limit!")
+    return total_size
+
+
+def reconcile_project_size(bucket, project_id):
+    """Rebuild a project's total from a full listing of its prefix."""
+    objects = {}
+    paginator = get_s3_client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(
+        Bucket=bucket, Prefix=f"documents/{project_id}/"
+    ):
+        for obj in page.get("Contents", []):
+            objects[obj["Key"]] = obj["Size"]
+    total_size = get_size_store().reset(str(project_id), objects)
+    print(f"Project {project_id} reconciled: {total_size} bytes")
+    return total_size
+
+
+# How long a claimed event blocks duplicates while it is being processed,
+# and how long a completed one is remembered.
+CLAIM_TIMEOUT_SECONDS = 15 * 60
+PROCESSED_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+class SqliteIdempotencyStore:
+    """Local stand-in for the processed-event items of the size table."""
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS processed_events (
+                marker TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+
+    def claim(self, marker, now=None):
+        """True if ``marker`` is new (or its earlier claim lapsed)."""
+        now = time.time() if now is None else now
+        cursor = self.connection.execute(
+            "INSERT INTO processed_events VALUES (?, ?) "
+            "ON CONFLICT (marker) DO UPDATE SET expires_at = excluded.expires_at "
+            "WHERE processed_events.expires_at <= ?",
+            (marker, now + CLAIM_TIMEOUT_SECONDS, now),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, marker):
+        self.connection.execute(
+            "UPDATE processed_events SET expires_at = ? WHERE marker = ?",
+            (time.time() + PROCESSED_TTL_SECONDS, marker),
+        )
+
+    def release(self, marker):
+        self.connection.execute(
+            "DELETE FROM processed_events WHERE marker = ?", (marker,)
+        )
+
+
+class DynamoIdempotencyStore:
+    """
+    ``event#<key>#<version>`` items in the size table. ``expires_at`` is the
+    table's TTL attribute; expired items may linger until DynamoDB removes
+    them, so claims compare it explicitly.
+    """
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self.client = get_dynamodb_client()
+
+    def _key(self, marker):
+        return {"pk": {"S": f"event#{marker}"}}
+
+    def claim(self, marker, now=None):
+        now = int(time.time() if now is None else now)
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    **self._key(marker),
+                    "expires_at": {"N": str(now + CLAIM_TIMEOUT_SECONDS)},
+                },
+                ConditionExpression=(
+                    "attribute_not_exists(pk) OR expires_at <= :now"
+                ),
+                ExpressionAttributeValues={":now": {"N": str(now)}},
+            )
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+    def complete(self, marker):
+        expires_at = int(time.time()) + PROCESSED_TTL_SECONDS
+        self.client.put_item(
+            TableName=self.table_name,
+            Item={**self._key(marker), "expires_at": {"N": str(expires_at)}},
+        )
+
+    def release(self, marker):
+        self.client.delete_item(
+            TableName=self.table_name, Key=self._key(marker)
+        )
 
-        # Store size in S3 metadata or DynamoDB
-        size_mb = total_size / (1024 * 1024)
-        print(f"Project {parts[1]} total size: {size_mb:.2f} MB")
 
-        # Optional: Check size limit (e.g., 100 MB)
-        MAX_SIZE_MB = 100
-        if size_mb > MAX_SIZE_MB:
-            print(f"WARNING: Project {parts[1]} exceeds size limit!")
-            # Could trigger notification or prevent further uploads
+_idempotency_store = None
 
-        return total_size
 
-    return 0
+def get_idempotency_store():
+    """Same backend selection as :func:`get_size_store`."""
+    global _idempotency_store
+    if _idempotency_store is None:
+        table_name = os.environ.get("PROJECT_SIZE_TABLE")
+        if table_name:
+            _idempotency_store = DynamoIdempotencyStore(table_name)
+        else:
+            _idempotency_store = SqliteIdempotencyStore(
+                os.environ.get("PROJECT_SIZE_DB", "/tmp/project_sizes.db")
+            )
+    return _idempotency_store
@@ -10,6 +10,7 @@ mkdir %TEMP_DIR%
 
 REM Copy Lambda function
 copy lambda_function.py %TEMP_DIR%\
+copy app\services\image_pipeline.py %TEMP_DIR%\
 
 REM Install dependencies in the package directory
 echo Installing dependencies...
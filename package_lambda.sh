@@ -1,5 +1,6 @@
 #!/bin/bash
 # Script to package Lambda function for deployment
+set -e
 
 echo "📦 Packaging Lambda function..."
 
@@ -10,6 +11,7 @@ mkdir -p $TEMP_DIR
 
 # Copy Lambda function
 cp lambda_function.py $TEMP_DIR/
+cp app/services/image_pipeline.py $TEMP_DIR/
 
 # Install dependencies in the package directory
 echo "📥 Installing dependencies..."
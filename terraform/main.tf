@@ -254,6 +254,29 @@ resource "aws_s3_bucket_public_access_block" "documents" {
   restrict_public_buckets = true
 }
 
+# On-demand previews are a cache: re-rendered on request once expired
+resource "aws_s3_bucket_lifecycle_configuration" "documents" {
+  bucket     = aws_s3_bucket.documents.id
+  depends_on = [aws_s3_bucket_versioning.documents]
+
+  rule {
+    id     = "expire-previews"
+    status = "Enabled"
+
+    filter {
+      prefix = "previews/"
+    }
+
+    expiration {
+      days = 30
+    }
+
+    noncurrent_version_expiration {
+      noncurrent_days = 1
+    }
+  }
+}
+
 # RDS PostgreSQL Database
 resource "aws_db_subnet_group" "main" {
   name       = "project-management-db-subnet-group"
@@ -349,7 +372,11 @@ resource "aws_iam_role_policy" "ecs_task_role_policy" {
         Effect = "Allow"
         Action = [
           "ses:SendEmail",
-          "ses:SendRawEmail"
+          "ses:SendRawEmail",
+          "ses:SendBulkTemplatedEmail",
+          "ses:CreateTemplate",
+          "ses:UpdateTemplate",
+          "ses:GetSendQuota"
         ]
         Resource = "*"
       }
@@ -573,11 +600,61 @@ resource "aws_iam_role_policy" "lambda_s3_policy" {
           "s3:PutObject"
         ]
         Resource = "${aws_s3_bucket.documents.arn}/*"
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:ListBucket"
+        ]
+        Resource = aws_s3_bucket.documents.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:Scan"
+        ]
+        Resource = aws_dynamodb_table.project_sizes.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:GetQueueAttributes"
+        ]
+        Resource = aws_sqs_queue.document_events.arn
       }
     ]
   })
 }
 
+# Running per-project storage totals maintained by the Lambda
+resource "aws_dynamodb_table" "project_sizes" {
+  name         = "project-management-project-sizes"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "pk"
+
+  attribute {
+    name = "pk"
+    type = "S"
+  }
+
+  # Processed-event markers used to skip duplicate image deliveries
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Name        = "project-management-project-sizes"
+    Environment = var.environment
+  }
+}
+
 # Lambda Function
 resource "aws_lambda_function" "image_processor" {
   filename      = "../lambda_function.zip"
@@ -590,7 +667,8 @@ resource "aws_lambda_function" "image_processor" {
 
   environment {
     variables = {
-      S3_BUCKET = aws_s3_bucket.documents.id
+      S3_BUCKET          = aws_s3_bucket.documents.id
+      PROJECT_SIZE_TABLE = aws_dynamodb_table.project_sizes.name
     }
   }
 
@@ -618,7 +696,60 @@ resource "aws_s3_bucket_notification" "bucket_notification" {
     filter_prefix       = "images/"
   }
 
-  depends_on = [aws_lambda_permission.allow_s3]
+  queue {
+    queue_arn     = aws_sqs_queue.document_events.arn
+    events        = ["s3:ObjectCreated:*", "s3:ObjectRemoved:*"]
+    filter_prefix = "documents/"
+  }
+
+  depends_on = [
+    aws_lambda_permission.allow_s3,
+    aws_sqs_queue_policy.document_events,
+  ]
+}
+
+# Document events are queued so the Lambda receives them in batches and
+# only the records it reports as failed are redelivered
+resource "aws_sqs_queue" "document_events_dlq" {
+  name                      = "project-management-document-events-dlq"
+  message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue" "document_events" {
+  name                       = "project-management-document-events"
+  visibility_timeout_seconds = 360
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.document_events_dlq.arn
+    maxReceiveCount     = 5
+  })
+}
+
+resource "aws_sqs_queue_policy" "document_events" {
+  queue_url = aws_sqs_queue.document_events.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect    = "Allow"
+        Principal = { Service = "s3.amazonaws.com" }
+        Action    = "sqs:SendMessage"
+        Resource  = aws_sqs_queue.document_events.arn
+        Condition = {
+          ArnEquals = { "aws:SourceArn" = aws_s3_bucket.documents.arn }
+        }
+      }
+    ]
+  })
+}
+
+resource "aws_lambda_event_source_mapping" "document_events" {
+  event_source_arn                   = aws_sqs_queue.document_events.arn
+  function_name                      = aws_lambda_function.image_processor.arn
+  batch_size                         = 50
+  maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
 }
 
 # SES Email Identity (needs manual verification)
@@ -1,3 +1,4 @@
+import io
 import os
 
 import pytest
@@ -9,6 +10,7 @@ from sqlalchemy.pool import StaticPool
 
 from app.core.database import Base, get_db
 from app.main import app
+from app.services.s3_service_refactored import reset_s3_client
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
@@ -22,8 +24,10 @@ def aws_mocks():
     os.environ["AWS_ACCESS_KEY_ID"] = "test"
     os.environ["AWS_SECRET_ACCESS_KEY"] = "test"
     os.environ["AWS_REGION"] = "us-east-1"
+    reset_s3_client()
     with mock_s3():
         yield
+    reset_s3_client()
     if old_endpoint is not None:
         os.environ["S3_ENDPOINT_URL"] = old_endpoint
 
@@ -153,19 +157,31 @@ def test_project(client, auth_headers):
 
 
 @pytest.fixture
-def test_document(client, auth_headers, test_project, ensure_s3_bucket):
-    import io
+def upload_documents(client, auth_headers, ensure_s3_bucket):
+    """Return a helper posting ``(name, content, content_type)`` files.
 
-    def upload():
-        files = [
-            ("files", ("file1.txt", io.BytesIO(b"data1"), "text/plain")),
-        ]
+    The helper asserts the response status (201 unless ``expect`` says
+    otherwise) and returns the response; ``headers`` defaults to the
+    ``auth_headers`` user.
+    """
+
+    def upload(project_id, *files, headers=None, expect=201):
         response = client.post(
-            f"/project/{test_project['id']}/documents",
-            files=files,
-            headers=auth_headers,
+            f"/project/{project_id}/documents",
+            files=[
+                ("files", (name, io.BytesIO(content), content_type))
+                for name, content, content_type in files
+            ],
+            headers=headers or auth_headers,
         )
-        assert response.status_code == 201
-        return response.json()[0]
+        assert response.status_code == expect
+        return response
+
+    return upload
 
-    return upload()
+
+@pytest.fixture
+def test_document(upload_documents, test_project):
+    return upload_documents(
+        test_project["id"], ("file1.txt", b"data1", "text/plain")
+    ).json()[0]
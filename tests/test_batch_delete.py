@@ -0,0 +1,92 @@
+"""Tests for the batch document delete endpoint."""
+
+import boto3
+from fastapi import status
+
+from app.models.project_report import ProjectReport
+from app.models.storage_deletion import StorageDeletion
+from app.services.s3_service_refactored import S3Service
+from app.services.storage_gc import drain_deletion_queue
+
+
+def _files(count):
+    return [
+        (f"f{i}.txt", b"x" * (i + 1), "text/plain") for i in range(count)
+    ]
+
+
+def _other_user_document(client, upload_documents):
+    client.post(
+        "/auth",
+        json={
+            "login": "outsider",
+            "email": "outsider@example.com",
+            "password": "password123",
+            "repeat_password": "password123",
+        },
+    )
+    token = client.post(
+        "/login", json={"login": "outsider", "password": "password123"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    project = client.post(
+        "/projects", json={"name": "Private"}, headers=headers
+    ).json()
+    return upload_documents(
+        project["id"], *_files(1), headers=headers
+    ).json()[0]["id"]
+
+
+def test_batch_delete_reports_per_id(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    ensure_s3_bucket,
+    upload_documents,
+):
+    """Test deletable, missing and foreign IDs each get their own result."""
+    response = upload_documents(test_project["id"], *_files(3))
+    mine = [doc["id"] for doc in response.json()]
+    foreign = _other_user_document(client, upload_documents)
+
+    response = client.post(
+        "/documents/batch-delete",
+        json={"document_ids": mine + [foreign, 99999]},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    results = {r["id"]: r["status"] for r in response.json()["results"]}
+    assert results == {
+        **{doc_id: "deleted" for doc_id in mine},
+        foreign: "forbidden",
+        99999: "not_found",
+    }
+
+    # Objects are queued in the delete's transaction and removed by the GC.
+    assert db_session.query(StorageDeletion).count() == 3
+    assert drain_deletion_queue(db_session, S3Service()) == 3
+    s3 = boto3.client("s3", region_name="us-east-1")
+    remaining = s3.list_objects_v2(Bucket=ensure_s3_bucket)["Contents"]
+    assert len(remaining) == 1  # only the outsider's document is left
+    for doc_id in mine:
+        response = client.get(f"/document/{doc_id}", headers=auth_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    db_session.expire_all()
+    report = (
+        db_session.query(ProjectReport)
+        .filter(ProjectReport.project_id == test_project["id"])
+        .one()
+    )
+    assert (report.document_count, report.total_size) == (0, 0)
+
+
+def test_batch_delete_rejects_empty_list(client, auth_headers):
+    """Test at least one ID is required."""
+    response = client.post(
+        "/documents/batch-delete",
+        json={"document_ids": []},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,185 @@
+"""Tests for content-addressed deduplicated storage."""
+
+import hashlib
+import io
+
+import boto3
+import pytest
+from fastapi import status
+
+from app.models.storage_blob import StorageBlob
+from app.services.document_store import blob_key
+from app.services.s3_service_refactored import S3Service
+from app.services.storage_gc import drain_deletion_queue
+
+
+@pytest.fixture
+def dedup(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.STORAGE_DEDUP", True)
+
+
+def _pdf(data, name="spec.pdf"):
+    return (name, data, "application/pdf")
+
+
+def _objects(bucket):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    return [
+        obj["Key"]
+        for obj in s3.list_objects_v2(Bucket=bucket).get("Contents", [])
+    ]
+
+
+def test_duplicate_upload_shares_one_object(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    ensure_s3_bucket,
+    dedup,
+    upload_documents,
+):
+    """Test identical uploads are stored once with a reference count."""
+    data = b"%PDF-1.4 same bytes"
+    first = upload_documents(test_project["id"], _pdf(data)).json()[0]
+    second = upload_documents(
+        test_project["id"], _pdf(data, "b.pdf")
+    ).json()[0]
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert _objects(ensure_s3_bucket) == [blob_key(sha256)]
+    blob = db_session.query(StorageBlob).filter_by(sha256=sha256).one()
+    assert blob.ref_count == 2
+
+    for doc in (first, second):
+        response = client.get(f"/document/{doc['id']}", headers=auth_headers)
+        assert response.content == data
+
+
+def test_object_deleted_with_last_reference(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    ensure_s3_bucket,
+    dedup,
+    upload_documents,
+):
+    """Test the blob survives until its final document is deleted."""
+    data = b"shared logo"
+    first = upload_documents(test_project["id"], _pdf(data)).json()[0]
+    second = upload_documents(test_project["id"], _pdf(data)).json()[0]
+
+    client.delete(f"/document/{first['id']}", headers=auth_headers)
+    drain_deletion_queue(db_session, S3Service())
+    assert len(_objects(ensure_s3_bucket)) == 1
+    response = client.get(f"/document/{second['id']}", headers=auth_headers)
+    assert response.content == data
+
+    client.delete(f"/document/{second['id']}", headers=auth_headers)
+    drain_deletion_queue(db_session, S3Service())
+    assert _objects(ensure_s3_bucket) == []
+    db_session.expire_all()
+    assert db_session.query(StorageBlob).count() == 0
+
+
+def test_update_to_same_content_keeps_object(
+    client,
+    auth_headers,
+    test_project,
+    ensure_s3_bucket,
+    dedup,
+    upload_documents,
+):
+    """Test replacing a document with identical bytes keeps the blob."""
+    data = b"unchanged"
+    doc = upload_documents(test_project["id"], _pdf(data)).json()[0]
+    file = ("file", ("again.pdf", io.BytesIO(data), "application/pdf"))
+    response = client.put(
+        f"/document/{doc['id']}", files=[file], headers=auth_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    response = client.get(f"/document/{doc['id']}", headers=auth_headers)
+    assert response.content == data
+
+
+def test_project_delete_releases_blobs(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    ensure_s3_bucket,
+    dedup,
+    upload_documents,
+):
+    """Test deleting a project drops its references and queues orphans."""
+    data = b"shared across projects"
+    other = client.post(
+        "/projects", json={"name": "Other"}, headers=auth_headers
+    ).json()
+    upload_documents(test_project["id"], _pdf(data))
+    upload_documents(other["id"], _pdf(data))
+    upload_documents(other["id"], _pdf(b"only in other"))
+
+    response = client.delete(f"/project/{other['id']}", headers=auth_headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    drain_deletion_queue(db_session, S3Service())
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert _objects(ensure_s3_bucket) == [blob_key(sha256)]
+    db_session.expire_all()
+    [blob] = db_session.query(StorageBlob).all()
+    assert (blob.sha256, blob.ref_count) == (sha256, 1)
+
+
+def test_reupload_between_release_and_drain_keeps_object(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    ensure_s3_bucket,
+    dedup,
+    upload_documents,
+):
+    """Test re-uploaded content revives its tombstone and survives GC."""
+    data = b"deleted then uploaded again"
+    sha256 = hashlib.sha256(data).hexdigest()
+    first = upload_documents(test_project["id"], _pdf(data)).json()[0]
+    client.delete(f"/document/{first['id']}", headers=auth_headers)
+    db_session.expire_all()
+    tombstone = db_session.query(StorageBlob).filter_by(sha256=sha256).one()
+    assert tombstone.ref_count == 0
+
+    second = upload_documents(test_project["id"], _pdf(data)).json()[0]
+    drain_deletion_queue(db_session, S3Service())
+
+    assert _objects(ensure_s3_bucket) == [blob_key(sha256)]
+    db_session.expire_all()
+    [blob] = db_session.query(StorageBlob).all()
+    assert (blob.id, blob.ref_count) == (tombstone.id, 1)
+    response = client.get(f"/document/{second['id']}", headers=auth_headers)
+    assert response.content == data
+
+
+def test_reupload_after_drain_rewrites_object(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    ensure_s3_bucket,
+    dedup,
+    upload_documents,
+):
+    """Test content uploaded again after collection is stored anew."""
+    data = b"collected then uploaded again"
+    first = upload_documents(test_project["id"], _pdf(data)).json()[0]
+    client.delete(f"/document/{first['id']}", headers=auth_headers)
+    drain_deletion_queue(db_session, S3Service())
+    assert _objects(ensure_s3_bucket) == []
+    db_session.expire_all()
+    assert db_session.query(StorageBlob).count() == 0
+
+    second = upload_documents(test_project["id"], _pdf(data)).json()[0]
+    drain_deletion_queue(db_session, S3Service())
+    response = client.get(f"/document/{second['id']}", headers=auth_headers)
+    assert response.content == data
@@ -0,0 +1,110 @@
+"""Tests for filtered and sorted document listings."""
+
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import text
+
+from app.models.document import Document
+
+
+@pytest.fixture
+def listed_project(client, auth_headers, test_project, ensure_s3_bucket):
+    files = [
+        ("files", ("report.pdf", io.BytesIO(b"x" * 50), "application/pdf")),
+        ("files", ("logo.png", io.BytesIO(b"x" * 10), "image/png")),
+        ("files", ("photo.jpeg", io.BytesIO(b"x" * 30), "image/jpeg")),
+        ("files", ("report_100%.txt", io.BytesIO(b"x" * 5), "text/plain")),
+    ]
+    response = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=files,
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return test_project["id"]
+
+
+def _names(client, auth_headers, project_id, **params):
+    response = client.get(
+        f"/project/{project_id}/documents",
+        params=params,
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return [doc["filename"] for doc in response.json()]
+
+
+def test_filter_by_content_type_prefix(client, auth_headers, listed_project):
+    """Test content type prefix filtering."""
+    names = _names(
+        client, auth_headers, listed_project, content_type="image/"
+    )
+    assert names == ["logo.png", "photo.jpeg"]
+
+
+def test_filter_by_size_range_and_sort(client, auth_headers, listed_project):
+    """Test size bounds combined with a descending size sort."""
+    names = _names(
+        client,
+        auth_headers,
+        listed_project,
+        min_size=10,
+        max_size=50,
+        sort="-size",
+    )
+    assert names == ["report.pdf", "photo.jpeg", "logo.png"]
+
+
+def test_filename_prefix_is_escaped(client, auth_headers, listed_project):
+    """Test LIKE wildcards in the prefix are matched literally."""
+    assert _names(
+        client, auth_headers, listed_project, filename_prefix="report"
+    ) == ["report.pdf", "report_100%.txt"]
+    assert _names(
+        client, auth_headers, listed_project, filename_prefix="report_"
+    ) == ["report_100%.txt"]
+
+
+def test_filter_by_upload_date(
+    client, auth_headers, listed_project, db_session
+):
+    """Test uploaded_at range filtering."""
+    old = datetime(2020, 1, 1)
+    db_session.query(Document).filter(
+        Document.filename == "logo.png"
+    ).update({Document.uploaded_at: old})
+    db_session.commit()
+    cutoff = (old + timedelta(days=1)).isoformat()
+    assert _names(
+        client, auth_headers, listed_project, uploaded_before=cutoff
+    ) == ["logo.png"]
+    assert "logo.png" not in _names(
+        client, auth_headers, listed_project, uploaded_after=cutoff
+    )
+
+
+def test_pagination(client, auth_headers, listed_project):
+    """Test limit and offset page through a sorted listing."""
+    names = _names(
+        client,
+        auth_headers,
+        listed_project,
+        sort="filename",
+        limit=2,
+        offset=1,
+    )
+    assert names == ["photo.jpeg", "report.pdf"]
+
+
+def test_filters_use_indexes(db_session):
+    """Test the listing filters are served by composite indexes."""
+    plan = db_session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT id FROM documents "
+            "WHERE project_id = 1 AND size >= 10 ORDER BY size"
+        )
+    ).fetchall()
+    assert "ix_documents_project_size" in str(plan)
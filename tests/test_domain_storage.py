@@ -4,8 +4,15 @@ from app.domain.storage import S3ServiceInterface
 
 
 class DummyS3Service(S3ServiceInterface):
-    def upload_file(self, file_path, bucket, key):
-        return f"s3://{bucket}/{key}"
+    def upload_file(
+        self,
+        content,
+        filename,
+        content_type,
+        key=None,
+        content_encoding=None,
+    ):
+        return key or filename
 
     def download_file(self, bucket, key):
         return b"content"
@@ -16,6 +23,21 @@ class DummyS3Service(S3ServiceInterface):
     def list_files(self, bucket, prefix=""):
         return [f"{prefix}file1", f"{prefix}file2"]
 
+    def copy_file(self, bucket, source_key, dest_key):
+        pass
+
+    def create_multipart_upload(self, bucket, key, content_type):
+        return "upload-id"
+
+    def upload_part(self, bucket, key, upload_id, part_number, body):
+        return f"etag-{part_number}"
+
+    def complete_multipart_upload(self, bucket, key, upload_id, parts):
+        pass
+
+    def abort_multipart_upload(self, bucket, key, upload_id):
+        pass
+
 
 @pytest.fixture
 def s3_service():
@@ -23,8 +45,9 @@ def s3_service():
 
 
 def test_upload_file(s3_service):
-    url = s3_service.upload_file("path", "bucket", "key")
-    assert url == "s3://bucket/key"
+    assert s3_service.upload_file(b"data", "a.txt", "text/plain") == "a.txt"
+    key = s3_service.upload_file(b"data", "a.txt", "text/plain", key="k")
+    assert key == "k"
 
 
 def test_download_file(s3_service):
@@ -39,3 +62,16 @@ def test_delete_file(s3_service):
 def test_list_files(s3_service):
     files = s3_service.list_files("bucket", "prefix/")
     assert files == ["prefix/file1", "prefix/file2"]
+
+
+def test_storage_operations_are_abstract():
+    """Test a backend must implement copy and multipart operations."""
+
+    class Incomplete(S3ServiceInterface):
+        upload_file = DummyS3Service.upload_file
+        download_file = DummyS3Service.download_file
+        delete_file = DummyS3Service.delete_file
+        list_files = DummyS3Service.list_files
+
+    with pytest.raises(TypeError, match="copy_file"):
+        Incomplete()
@@ -0,0 +1,97 @@
+"""Tests for the local disk download cache."""
+
+import os
+import time
+
+import pytest
+from fastapi import status
+
+from app.services.download_cache import DiskCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path / "cache"), max_bytes=10)
+
+
+def test_fetch_loads_once(cache):
+    """Test a miss loads from the source and later reads hit the file."""
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return b"abc"
+
+    with cache.fetch("docs/a.txt", loader) as first:
+        assert first.read() == b"abc"
+    with cache.fetch("docs/a.txt", loader) as second:
+        assert second.read() == b"abc"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used(cache):
+    """Test the oldest entries are evicted to stay within the byte budget."""
+    old = cache.put("old", b"1234")
+    past = time.time() - 60
+    os.utime(old, (past, past))
+    recent = cache.put("recent", b"5678")
+    cache.put("new", b"90ab")
+
+    assert not os.path.exists(old)
+    assert os.path.exists(recent)
+    assert cache.get("old") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_open_entry_survives_eviction(cache):
+    """Test a reader keeps its data when the entry is evicted under it."""
+    cache.put("key", b"1234")
+    with cache.get("key") as cached:
+        cache.max_bytes = 0
+        cache.evict()
+        assert cache.get("key") is None
+        assert cached.read() == b"1234"
+
+
+def test_fetch_falls_back_when_evicted_on_put(cache):
+    """Test an entry too large to keep is still returned to the caller."""
+    with cache.fetch("big", lambda: b"0123456789abcdef") as cached:
+        assert cached.read() == b"0123456789abcdef"
+    assert cache.get("big") is None
+
+
+def test_shared_directory_between_instances(tmp_path):
+    """Test a second worker sees entries written by the first."""
+    directory = str(tmp_path / "shared")
+    DiskCache(directory, 100).put("key", b"data")
+    other = DiskCache(directory, 100)
+    with other.get("key") as cached:
+        assert cached.read() == b"data"
+    assert other.stats()["approx_bytes"] == 4
+
+
+def test_download_served_from_cache(
+    client,
+    auth_headers,
+    test_document,
+    ensure_s3_bucket,
+    monkeypatch,
+    tmp_path,
+):
+    """Test repeated downloads are answered from the disk cache."""
+    monkeypatch.setattr(
+        "app.core.config.settings.DOWNLOAD_CACHE_DIR", str(tmp_path)
+    )
+    for _ in range(2):
+        response = client.get(
+            f"/document/{test_document['id']}", headers=auth_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b"data1"
+        assert "attachment" in response.headers["content-disposition"]
+        assert response.headers["content-length"] == "5"
+    stats = client.get("/health").json()["download_cache"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["approx_bytes"] == 5
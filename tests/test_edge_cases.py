@@ -177,6 +177,7 @@ def test_health_check(client):
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
     assert data["status"] == "healthy"
+    assert "download_cache" not in data
 
 
 def test_root_endpoint(client):
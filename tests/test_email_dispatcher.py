@@ -0,0 +1,242 @@
+"""Tests for the email outbox and its batched dispatcher."""
+
+import time
+from datetime import timedelta
+
+import boto3
+from moto import mock_ses
+from sqlalchemy.orm import sessionmaker
+
+from app.models.email_outbox import EmailOutbox
+from app.models.invite_token import InviteToken
+from app.services.email_dispatcher import (
+    EmailDispatcher,
+    EmailTransport,
+    InviteEmail,
+    RateLimiter,
+    RecordingTransport,
+    SendError,
+    SESTransport,
+    _utcnow,
+    claim_emails,
+    dispatch_pending,
+    enqueue_invite,
+    send_rate_limiter,
+)
+
+
+def _emails(count):
+    return [
+        InviteEmail(f"user{i}@example.com", "Project", f"http://x/{i}")
+        for i in range(count)
+    ]
+
+
+def _queue(db_session, count):
+    rows = [enqueue_invite(db_session, email) for email in _emails(count)]
+    db_session.commit()
+    return rows
+
+
+def test_outbox_is_sent_in_batches(db_session):
+    """Test queued emails go out in batches of batch_size and are marked."""
+    rows = _queue(db_session, 5)
+    transport = RecordingTransport()
+
+    assert dispatch_pending(db_session, transport, batch_size=2) == 5
+    assert transport.batches == [2, 2, 1]
+    assert transport.sent == _emails(5)
+    for row in rows:
+        db_session.refresh(row)
+        assert (row.status, row.attempts) == ("sent", 1)
+        assert row.sent_at is not None
+    assert dispatch_pending(db_session, transport) == 0
+
+
+class FlakyTransport(EmailTransport):
+    max_batch = 50
+
+    def __init__(self, failures, retryable=True):
+        self.failures = failures
+        self.retryable = retryable
+        self.calls = []
+
+    def send_invites(self, emails):
+        self.calls.append([email.to for email in emails])
+        if len(self.calls) <= self.failures:
+            # Only the first message of the batch fails.
+            error = SendError("Throttling", retryable=self.retryable)
+            return [error] + [None] * (len(emails) - 1)
+        return [None] * len(emails)
+
+
+def test_failed_email_is_rescheduled_with_backoff(db_session, monkeypatch):
+    """Test a transient failure reschedules only the affected row."""
+    monkeypatch.setattr("app.core.config.settings.EMAIL_MAX_ATTEMPTS", 2)
+    first, second = _queue(db_session, 2)
+    transport = FlakyTransport(failures=2)
+
+    assert dispatch_pending(db_session, transport) == 2
+    db_session.refresh(first)
+    db_session.refresh(second)
+    assert (first.status, first.attempts) == ("pending", 1)
+    assert first.send_after > _utcnow()
+    assert "Throttling" in first.last_error
+    assert second.status == "sent"
+    assert dispatch_pending(db_session, transport) == 0
+
+    first.send_after = _utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    dispatch_pending(db_session, transport)
+    db_session.refresh(first)
+    assert (first.status, first.attempts) == ("failed", 2)
+    assert transport.calls == [
+        ["user0@example.com", "user1@example.com"],
+        ["user0@example.com"],
+    ]
+
+
+def test_permanent_failure_is_not_retried(db_session):
+    """Test a non-retryable error fails the row on the first attempt."""
+    [row] = _queue(db_session, 1)
+    dispatch_pending(db_session, FlakyTransport(failures=1, retryable=False))
+    db_session.refresh(row)
+    assert (row.status, row.attempts) == ("failed", 1)
+
+
+def test_expired_claim_is_reclaimed(db_session):
+    """Test rows held by a dead worker are claimable after the lease."""
+    _queue(db_session, 2)
+    claimed = claim_emails(db_session, "dead-worker", limit=10)
+    assert len(claimed) == 2
+    assert claim_emails(db_session, "other") == []
+
+    for row in claimed:
+        row.locked_until = _utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    reclaimed = claim_emails(db_session, "other")
+    assert [row.id for row in reclaimed] == [row.id for row in claimed]
+    assert {row.attempts for row in reclaimed} == {2}
+
+
+def test_dispatcher_thread_sends_when_woken(db_session):
+    """Test the worker thread picks up committed rows on wake()."""
+    rows = _queue(db_session, 3)
+    transport = RecordingTransport()
+    dispatcher = EmailDispatcher(
+        sessionmaker(bind=db_session.get_bind()),
+        transport,
+        poll_interval=60,
+        linger=0,
+    )
+    dispatcher.start()
+    try:
+        dispatcher.wake()
+        deadline = time.monotonic() + 5
+        while len(transport.sent) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        dispatcher.stop(timeout=5)
+
+    assert transport.batches == [3]
+    for row in rows:
+        db_session.refresh(row)
+        assert row.status == "sent"
+
+
+def test_rate_limiter_paces_recipients():
+    """Test each batch waits for the previous one's share of the rate."""
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(10, clock=lambda: now[0], sleep=sleep)
+    assert limiter.acquire(20) == 0
+    assert limiter.acquire(5) == 2.0
+    now[0] += 10
+    assert limiter.acquire(1) == 0
+    assert waits == [2.0]
+
+
+def test_dispatch_pending_is_rate_limited(db_session):
+    """Test the one-shot drain paces batches like the dispatcher thread."""
+    _queue(db_session, 5)
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(2, clock=lambda: now[0], sleep=sleep)
+    sent = dispatch_pending(
+        db_session, RecordingTransport(), batch_size=2, limiter=limiter
+    )
+    assert sent == 5
+    assert waits == [1.0, 1.0]
+
+
+def test_send_rate_is_shared_between_dispatchers():
+    """Test each dispatcher paces itself to its share of the rate."""
+    transport = RecordingTransport()
+    assert send_rate_limiter(transport) is None
+    assert send_rate_limiter(transport, 14, dispatchers=4).rate == 3.5
+    assert send_rate_limiter(transport, 14, dispatchers=0).rate == 14
+
+
+@mock_ses
+def test_ses_transport_sends_one_bulk_call():
+    """Test SES delivery uses the template and one call per batch."""
+    client = boto3.client("ses", region_name="us-east-1")
+    client.verify_email_identity(EmailAddress="noreply@example.com")
+    transport = SESTransport(
+        "noreply@example.com", "project-invite", client=client
+    )
+
+    assert transport.send_invites(_emails(3)) == [None, None, None]
+    assert transport.send_invites(_emails(2)) == [None, None]
+
+    template = client.get_template(TemplateName="project-invite")["Template"]
+    assert "{{{join_link}}}" in template["TextPart"]
+    assert "{{{inviter}}} has invited you" in template["TextPart"]
+    assert "{{inviter}} has invited you" in template["HtmlPart"]
+    assert client.get_send_quota()["SentLast24Hours"] == 5
+    assert transport.max_send_rate()
+
+
+@mock_ses
+def test_ses_transport_reports_rejections():
+    """Test an unverified sender fails every message permanently."""
+    client = boto3.client("ses", region_name="us-east-1")
+    transport = SESTransport(
+        "unverified@example.com", "project-invite", client=client
+    )
+
+    errors = transport.send_invites(_emails(2))
+    assert [error.retryable for error in errors] == [False, False]
+    assert "MessageRejected" in str(errors[0])
+
+
+def test_share_project_writes_outbox_row(
+    client, auth_headers, test_project, db_session
+):
+    """Test sharing commits the email with the token instead of sending."""
+    response = client.get(
+        f"/project/{test_project['id']}/share?with_email=new@example.com",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+
+    [row] = db_session.query(EmailOutbox).all()
+    assert (row.recipient, row.status) == ("new@example.com", "pending")
+    assert db_session.query(InviteToken).count() == 1
+
+    transport = RecordingTransport()
+    assert dispatch_pending(db_session, transport) == 1
+    [email] = transport.sent
+    assert email.project_name == test_project["name"]
+    assert email.join_link == response.json()["join_link"]
+    assert email.inviter == "testuser@example.com"
@@ -0,0 +1,107 @@
+"""Tests for the decode-once image rendition pipeline."""
+
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from app.services.image_pipeline import (
+    ImageBudget,
+    ImageTooLarge,
+    Rendition,
+    decode,
+    fit_within,
+    parse_renditions,
+    render_object,
+    render_renditions,
+    spool,
+)
+
+
+def _image_bytes(size, image_format="JPEG", mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, color="red").save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def test_parse_renditions():
+    assert parse_renditions("thumb:150x150, large:1600x900") == (
+        Rendition("thumb", 150, 150),
+        Rendition("large", 1600, 900),
+    )
+    with pytest.raises(ValueError):
+        parse_renditions("thumb:150")
+
+
+def test_jpeg_is_reduced_on_decode():
+    """Test draft mode decodes a large JPEG at a fraction of its size."""
+    image = decode(_image_bytes((4000, 3000)), (800, 800))
+    assert image.size == (1000, 750)  # 1/4 scale still covers 800x600
+
+
+def test_renditions_from_one_decode():
+    """Test every rendition is fitted to its box and keeps the format."""
+    rendered = render_renditions(
+        _image_bytes((3000, 2000)),
+        parse_renditions("thumb:150x150,medium:800x800,large:1600x1600"),
+    )
+    assert [(r.name, r.width, r.height, r.format) for r in rendered] == [
+        ("thumb", 150, 100, "JPEG"),
+        ("medium", 800, 533, "JPEG"),
+        ("large", 1600, 1067, "JPEG"),
+    ]
+    assert Image.open(io.BytesIO(rendered[0].data)).size == (150, 100)
+
+
+def test_small_and_transparent_sources():
+    """Test images are never upscaled and alpha survives as PNG."""
+    [rendered] = render_renditions(
+        _image_bytes((64, 32), "PNG", "RGBA"), [Rendition("thumb", 150, 150)]
+    )
+    assert (rendered.width, rendered.height) == (64, 32)
+    assert rendered.content_type == "image/png"
+    assert fit_within((64, 32), (16, 16)) == (16, 8)
+
+
+def _png_claiming(width, height):
+    """A tiny PNG whose header claims ``width`` x ``height``."""
+    data = bytearray(_image_bytes((1, 1), "PNG"))
+    ihdr = struct.pack(">II", width, height) + bytes(data[24:29])
+    data[16:29] = ihdr
+    data[29:33] = struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+    return bytes(data)
+
+
+def test_budget_rejects_bombs_from_the_header():
+    """Test huge header dimensions are refused before any decoding."""
+    for size in ((13_000, 12_000), (50_000, 50_000)):
+        with pytest.raises(ImageTooLarge):
+            decode(_png_claiming(*size), (800, 800), ImageBudget())
+
+
+def test_budget_counts_reduced_pixels():
+    """Test large JPEGs fit via draft while other formats must fit whole."""
+    budget = ImageBudget(max_decoded_pixels=1_000_000)
+    image = decode(_image_bytes((4000, 3000)), (800, 800), budget)
+    assert image.size == (1000, 750)
+    with pytest.raises(ImageTooLarge):
+        decode(_image_bytes((1600, 1200), "PNG"), (800, 800), budget)
+
+
+def test_render_object_streams_within_byte_budget():
+    """Test streamed sources are spooled and capped in bytes."""
+    data = _image_bytes((400, 300))
+    [rendered] = render_object(
+        io.BytesIO(data), [Rendition("thumb", 100, 100)], ImageBudget()
+    )
+    assert (rendered.width, rendered.height) == (100, 75)
+    with pytest.raises(ImageTooLarge):
+        render_object(
+            io.BytesIO(data),
+            [Rendition("thumb", 100, 100)],
+            ImageBudget(max_bytes=len(data) - 1),
+        )
+    with pytest.raises(ImageTooLarge):
+        spool(io.BytesIO(b"x" * 10), max_bytes=5)
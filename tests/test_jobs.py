@@ -0,0 +1,160 @@
+"""Tests for the background job queue."""
+
+import hashlib
+import io
+from datetime import timedelta
+
+import pytest
+
+from app.models.document import Document
+from app.models.job import Job
+from app.services import jobs
+
+calls = []
+
+
+@jobs.job_handler("test.record")
+def _record(db, payload):
+    calls.append(payload["n"])
+
+
+@jobs.job_handler("test.explode")
+def _explode(db, payload):
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    calls.clear()
+
+
+def test_jobs_run_in_priority_order(db_session):
+    """Test higher priority jobs are claimed first."""
+    jobs.enqueue(db_session, "test.record", {"n": 1})
+    jobs.enqueue(db_session, "test.record", {"n": 2}, priority=5)
+    jobs.enqueue(db_session, "test.record", {"n": 3}, delay=3600)
+    db_session.commit()
+
+    assert jobs.run_pending(db_session) == 2
+    assert calls == [2, 1]
+    statuses = [job.status for job in db_session.query(Job).order_by(Job.id)]
+    assert statuses == ["done", "done", "queued"]
+
+
+def test_failed_job_is_retried_with_backoff(db_session, monkeypatch):
+    """Test failures are rescheduled until max_attempts, then marked failed."""
+    monkeypatch.setattr("app.core.config.settings.JOB_MAX_ATTEMPTS", 2)
+    job = jobs.enqueue(db_session, "test.explode")
+    db_session.commit()
+
+    assert jobs.run_pending(db_session) == 1
+    db_session.refresh(job)
+    assert (job.status, job.attempts) == ("queued", 1)
+    assert "boom" in job.last_error
+    assert job.run_after > jobs._utcnow()
+
+    job.run_after = jobs._utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    jobs.run_pending(db_session)
+    db_session.refresh(job)
+    assert (job.status, job.attempts) == ("failed", 2)
+
+
+def test_expired_lock_is_reclaimed(db_session):
+    """Test a job held by a dead worker is claimable after its timeout."""
+    jobs.enqueue(db_session, "test.record", {"n": 7})
+    db_session.commit()
+    [job] = jobs.claim_jobs(db_session, "dead-worker")
+    assert jobs.claim_jobs(db_session, "other") == []
+
+    job.locked_until = jobs._utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    [reclaimed] = jobs.claim_jobs(db_session, "other")
+    assert reclaimed.id == job.id
+    assert reclaimed.attempts == 2
+
+
+def test_expired_final_attempt_is_failed(db_session, monkeypatch):
+    """Test an expired lease with no attempts left fails instead of rerunning."""
+    monkeypatch.setattr("app.core.config.settings.JOB_MAX_ATTEMPTS", 1)
+    jobs.enqueue(db_session, "test.record", {"n": 8})
+    db_session.commit()
+    [job] = jobs.claim_jobs(db_session, "dead-worker")
+
+    job.locked_until = jobs._utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    assert jobs.claim_jobs(db_session, "other") == []
+    db_session.refresh(job)
+    assert (job.status, job.locked_by) == ("failed", None)
+    assert "Lease expired" in job.last_error
+    assert calls == []
+
+
+def test_outcome_dropped_after_lease_is_lost(db_session):
+    """Test a worker whose job was reclaimed cannot overwrite its state."""
+    jobs.enqueue(db_session, "test.record", {"n": 9})
+    db_session.commit()
+    [job] = jobs.claim_jobs(db_session, "slow-worker")
+    db_session.expunge(job)
+    db_session.query(Job).filter(Job.id == job.id).update(
+        {"locked_until": jobs._utcnow() - timedelta(seconds=1)}
+    )
+    db_session.commit()
+    [reclaimed] = jobs.claim_jobs(db_session, "other")
+
+    assert jobs.run_job(db_session, job) is False
+    db_session.refresh(reclaimed)
+    assert (reclaimed.status, reclaimed.locked_by) == ("running", "other")
+
+    assert jobs.run_job(db_session, reclaimed) is True
+    db_session.refresh(reclaimed)
+    assert reclaimed.status == "done"
+
+
+def test_purge_deletes_old_finished_jobs(db_session):
+    """Test only done jobs older than the retention window are deleted."""
+    for n in range(3):
+        jobs.enqueue(db_session, "test.record", {"n": n})
+    jobs.enqueue(db_session, "test.explode")
+    db_session.commit()
+    jobs.run_pending(db_session)
+    old, recent, _, pending = db_session.query(Job).order_by(Job.id).all()
+    for job in (old, pending):
+        job.updated_at = jobs._utcnow() - timedelta(days=10)
+    db_session.commit()
+    old_id, kept = old.id, {recent.id, pending.id}
+
+    assert jobs.purge_finished_jobs(db_session, retention_days=7) == 1
+    remaining = {job.id for job in db_session.query(Job)}
+    assert old_id not in remaining
+    assert kept <= remaining
+
+
+def test_unique_enqueue_skips_duplicates(db_session):
+    """Test unique jobs are only queued once while waiting."""
+    assert jobs.enqueue(db_session, "storage.gc", unique=True) is not None
+    db_session.flush()
+    assert jobs.enqueue(db_session, "storage.gc", unique=True) is None
+
+
+def test_upload_enqueues_postprocessing(
+    client, auth_headers, test_project, db_session, ensure_s3_bucket
+):
+    """Test uploads queue a job that fills in the content hash."""
+    response = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("a.txt", io.BytesIO(b"hash me"), "text/plain"))],
+        headers=auth_headers,
+    )
+    doc_id = response.json()[0]["id"]
+    job = (
+        db_session.query(Job)
+        .filter(Job.kind == "document.postprocess")
+        .one()
+    )
+    assert job.status == "queued"
+
+    jobs.run_pending(db_session)
+    document = db_session.get(Document, doc_id)
+    db_session.refresh(document)
+    assert document.content_hash == hashlib.sha256(b"hash me").hexdigest()
@@ -0,0 +1,67 @@
+"""Tests for the project-prefixed key scheme and its migration."""
+
+from app.models.document import Document
+from app.models.storage_deletion import StorageDeletion
+from app.services.key_migration import migrate_keys
+from app.services.s3_service_refactored import S3Service
+
+_FILE = ("a.txt", b"content", "text/plain")
+
+
+def test_new_uploads_use_project_prefix(
+    test_project, db_session, upload_documents
+):
+    """Test new keys look like documents/{project}/{xx}/{uuid}.{ext}."""
+    doc_id = upload_documents(test_project["id"], _FILE).json()[0]["id"]
+    key = db_session.get(Document, doc_id).s3_key
+    prefix, project, shard, name = key.split("/")
+    assert (prefix, project) == ("documents", str(test_project["id"]))
+    assert name.startswith(shard) and name.endswith(".txt")
+
+
+def test_migrate_keys_moves_flat_objects(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    upload_documents,
+    monkeypatch,
+):
+    """Test flat keys are copied, repointed and the old objects queued."""
+    monkeypatch.setattr(
+        "app.core.config.settings.STORAGE_KEY_SCHEME", "flat"
+    )
+    ids = [
+        upload_documents(test_project["id"], _FILE).json()[0]["id"]
+        for _ in range(3)
+    ]
+    old_keys = {i: db_session.get(Document, i).s3_key for i in ids}
+    assert all("/" not in key for key in old_keys.values())
+
+    sleeps = []
+    assert (
+        migrate_keys(
+            db_session,
+            S3Service(),
+            batch_size=2,
+            max_per_second=1000,
+            limit=2,
+            sleep=sleeps.append,
+        )
+        == 2
+    )
+    # Resumes where the first run stopped.
+    assert migrate_keys(db_session, S3Service(), batch_size=2) == 1
+    assert migrate_keys(db_session, S3Service()) == 0
+
+    for doc_id in ids:
+        document = db_session.get(Document, doc_id)
+        db_session.refresh(document)
+        assert document.s3_key == (
+            f"documents/{test_project['id']}/"
+            f"{old_keys[doc_id][:2]}/{old_keys[doc_id]}"
+        )
+        response = client.get(f"/document/{doc_id}", headers=auth_headers)
+        assert response.content == b"content"
+    queued = {row.s3_key for row in db_session.query(StorageDeletion)}
+    assert queued == set(old_keys.values())
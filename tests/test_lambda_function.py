@@ -0,0 +1,243 @@
+"""Tests for incremental project size accounting in the S3 Lambda."""
+
+import json
+import os
+import subprocess
+import sys
+
+import boto3
+import pytest
+from moto import mock_dynamodb, mock_s3
+
+import lambda_function
+
+
+def _event(
+    key, size=None, name="ObjectCreated:Put", bucket="bucket", etag=None
+):
+    obj = {"key": key}
+    if size is not None:
+        obj["size"] = size
+    if etag is not None:
+        obj["eTag"] = etag
+    return {
+        "eventName": name,
+        "s3": {"bucket": {"name": bucket}, "object": obj},
+    }
+
+
+@pytest.fixture
+def sqlite_store(tmp_path, monkeypatch):
+    store = lambda_function.SqliteSizeStore(str(tmp_path / "sizes.db"))
+    monkeypatch.setattr(lambda_function, "_size_store", store)
+    monkeypatch.setattr(
+        lambda_function,
+        "_idempotency_store",
+        lambda_function.SqliteIdempotencyStore(str(tmp_path / "sizes.db")),
+    )
+    return store
+
+
+def test_events_apply_deltas(sqlite_store):
+    """Test creates, overwrites, redeliveries and removals as deltas."""
+    lambda_function.lambda_handler(
+        {
+            "Records": [
+                _event("documents/7/a.txt", 100),
+                _event("documents/7/b.txt", 50),
+                _event("documents/8/c.txt", 10),
+                _event("resized/x.png", 999),
+            ]
+        },
+        None,
+    )
+    assert sqlite_store.total("7") == 150
+    assert sqlite_store.total("8") == 10
+
+    # Redelivered events and overwrites only count the difference.
+    lambda_function.update_project_size("documents/7/a.txt", 100)
+    lambda_function.update_project_size("documents/7/a.txt", 120)
+    assert sqlite_store.total("7") == 170
+
+    lambda_function.lambda_handler(
+        {
+            "Records": [
+                _event("documents/7/b.txt", name="ObjectRemoved:Delete")
+            ]
+        },
+        None,
+    )
+    assert sqlite_store.total("7") == 120
+    # Removing an untracked object is a no-op.
+    lambda_function.update_project_size("documents/7/gone.txt", None)
+    assert sqlite_store.total("7") == 120
+
+
+def _sqs(message_id, *records):
+    return {
+        "eventSource": "aws:sqs",
+        "messageId": message_id,
+        "body": json.dumps({"Records": list(records)}),
+    }
+
+
+def test_batch_groups_projects_and_reports_failures(
+    sqlite_store, monkeypatch
+):
+    """Test one size update per project and per-message failures."""
+    applied, resized = [], []
+    apply_many = sqlite_store.apply_many
+    monkeypatch.setattr(
+        sqlite_store,
+        "apply_many",
+        lambda project_id, changes: applied.append(project_id)
+        or apply_many(project_id, changes),
+    )
+
+    def resize_image(bucket, key):
+        resized.append(key)
+        if "broken" in key:
+            raise OSError("cannot identify image file")
+
+    monkeypatch.setattr(lambda_function, "resize_image", resize_image)
+    monkeypatch.setenv("IMAGE_WORKERS", "2")
+
+    result = lambda_function.lambda_handler(
+        {
+            "Records": [
+                _sqs("m1", _event("documents/7/a.png", 100)),
+                _sqs(
+                    "m2",
+                    _event("documents/7/broken.jpg", 5),
+                    _event("documents/8/b.txt", 10),
+                ),
+                _sqs("m3", _event("documents/7/a.png", 40)),
+                {"eventSource": "aws:sqs", "messageId": "m4", "body": "{}"},
+            ]
+        },
+        None,
+    )
+    assert result["batchItemFailures"] == [{"itemIdentifier": "m2"}]
+    assert sorted(resized) == [
+        "documents/7/a.png",
+        "documents/7/a.png",
+        "documents/7/broken.jpg",
+    ]
+    assert sorted(applied) == ["7", "8"]
+    # The later event for a.png wins; the broken image is still counted.
+    assert sqlite_store.total("7") == 45
+    assert sqlite_store.total("8") == 10
+
+
+def test_duplicates_and_renditions_are_skipped(sqlite_store, monkeypatch):
+    """Test each object version is rendered once and outputs never are."""
+    resized, broken = [], {"documents/7/b.png"}
+
+    def resize_image(bucket, key):
+        resized.append(key)
+        if key in broken:
+            raise OSError("truncated")
+
+    monkeypatch.setattr(lambda_function, "resize_image", resize_image)
+
+    def deliver(*records):
+        return lambda_function.lambda_handler(
+            {"Records": [_sqs(f"m{i}", r) for i, r in enumerate(records)]},
+            None,
+        )["batchItemFailures"]
+
+    a_v1 = _event("documents/7/a.png", 10, etag="v1")
+    b_v1 = _event("documents/7/b.png", 10, etag="v1")
+    rendition = _event("resized/thumb/documents/7/a.png", 3, etag="r1")
+    assert deliver(a_v1, a_v1, rendition, b_v1) == [{"itemIdentifier": "m3"}]
+    assert sorted(resized) == ["documents/7/a.png", "documents/7/b.png"]
+
+    # Redelivery skips finished work but retries the failed image,
+    # and a new version of an object is processed again.
+    broken.clear()
+    assert (
+        deliver(a_v1, b_v1, _event("documents/7/a.png", 12, etag="v2")) == []
+    )
+    assert resized[2:] == ["documents/7/b.png", "documents/7/a.png"]
+    assert sqlite_store.total("7") == 22
+
+
+def test_idempotency_claims_expire(tmp_path):
+    """Test a claim abandoned by a crashed invocation can be retaken."""
+    store = lambda_function.SqliteIdempotencyStore(str(tmp_path / "i.db"))
+    assert store.claim("k#1", now=0)
+    assert not store.claim("k#1", now=60)
+    assert store.claim("k#1", now=lambda_function.CLAIM_TIMEOUT_SECONDS)
+
+
+@mock_s3
+def test_reconcile_rebuilds_from_listing(sqlite_store, monkeypatch):
+    """Test the full reconcile replaces the running total."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="bucket")
+    s3.put_object(Bucket="bucket", Key="documents/7/a.txt", Body=b"x" * 30)
+    s3.put_object(Bucket="bucket", Key="documents/7/b.txt", Body=b"x" * 12)
+    monkeypatch.setattr(lambda_function, "s3_client", s3)
+    lambda_function.update_project_size("documents/7/stale.txt", 1000)
+
+    result = lambda_function.lambda_handler(
+        {"reconcile": {"bucket": "bucket", "project_id": "7"}}, None
+    )
+    assert '"total_size": 42' in result["body"]
+    assert sqlite_store.total("7") == 42
+    lambda_function.update_project_size("documents/7/stale.txt", None)
+    assert sqlite_store.total("7") == 42
+
+
+@mock_dynamodb
+def test_dynamodb_store(monkeypatch):
+    """Test the DynamoDB store keeps the same running totals."""
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    boto3.client("dynamodb").create_table(
+        TableName="sizes",
+        KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    store = lambda_function.DynamoSizeStore("sizes")
+
+    assert store.apply("7", "documents/7/a.txt", 100) == 100
+    assert store.apply("7", "documents/7/a.txt", 100) == 100
+    assert store.apply("7", "documents/7/b.txt", 5) == 105
+    assert store.apply("7", "documents/7/a.txt", None) == 5
+    assert store.reset("7", {"documents/7/c.txt": 9}) == 9
+    assert store.apply("7", "documents/7/b.txt", None) == 9
+    assert (
+        store.apply_many(
+            "7", {"documents/7/c.txt": None, "documents/7/d.txt": 4}
+        )
+        == 4
+    )
+
+    events = lambda_function.DynamoIdempotencyStore("sizes")
+    assert events.claim("documents/7/a.png#v1")
+    assert not events.claim("documents/7/a.png#v1")
+    events.release("documents/7/a.png#v1")
+    assert events.claim("documents/7/a.png#v1")
+    events.complete("documents/7/a.png#v1")
+    assert not events.claim("documents/7/a.png#v1")
+    # Processed-event items are not project objects.
+    assert store.reset("7", {}) == 0
+    assert not events.claim("documents/7/a.png#v1")
+
+
+def test_module_load_defers_heavy_imports():
+    """Test boto3 and Pillow are only imported when first needed."""
+    loaded = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, lambda_function; "
+            "print(sorted({'boto3', 'PIL'} & set(sys.modules)))",
+        ],
+        cwd=os.path.dirname(os.path.abspath(lambda_function.__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert loaded.strip() == "[]"
@@ -0,0 +1,87 @@
+"""Tests for the filesystem storage backend."""
+
+import io
+import os
+
+import pytest
+
+from app.api import documents
+from app.services.local_storage import TMP_PREFIX, LocalStorageService
+
+BUCKET = "bucket"
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.S3_BUCKET_NAME", BUCKET)
+    return LocalStorageService(str(tmp_path), fsync=False)
+
+
+def test_round_trip_and_listing(storage, tmp_path):
+    """Test objects are sharded on disk and listed by prefix."""
+    key = storage.upload_file(b"hello", "a.txt", "text/plain")
+    storage.upload_file(b"blob", "b.bin", "", key="blobs/ab/abc")
+
+    assert key.endswith(".txt")
+    assert storage.download_file(BUCKET, key) == b"hello"
+    with storage.open_stream(BUCKET, "blobs/ab/abc") as stream:
+        assert stream.read() == b"blob"
+    assert storage.list_files(BUCKET) == sorted([key, "blobs/ab/abc"])
+    assert storage.list_files(BUCKET, "blobs/") == ["blobs/ab/abc"]
+
+    path = storage.local_path(BUCKET, "blobs/ab/abc")
+    relative = os.path.relpath(path, tmp_path)
+    assert relative.count(os.sep) == 3  # bucket/aa/bb/name
+    assert not list(tmp_path.rglob(f"{TMP_PREFIX}*"))
+
+
+def test_failed_write_leaves_no_partial_object(storage, tmp_path):
+    """Test an interrupted write neither publishes nor leaks a temp file."""
+
+    def explode(tmp):
+        tmp.write(b"partial")
+        raise OSError("disk full")
+
+    path = storage._path(BUCKET, "k")
+    with pytest.raises(OSError):
+        storage._publish(path, explode)
+    assert storage.local_path(BUCKET, "k") is None
+    assert not list(tmp_path.rglob(f"{TMP_PREFIX}*"))
+
+
+def test_delete_files_and_multipart(storage):
+    """Test bulk deletes and multipart assembly."""
+    upload_id = storage.create_multipart_upload(BUCKET, "big", "text/plain")
+    etags = [
+        (2, storage.upload_part(BUCKET, "big", upload_id, 2, b"world")),
+        (1, storage.upload_part(BUCKET, "big", upload_id, 1, b"hello ")),
+    ]
+    storage.complete_multipart_upload(BUCKET, "big", upload_id, etags)
+    assert storage.download_file(BUCKET, "big") == b"hello world"
+    assert storage.list_files(BUCKET) == ["big"]
+
+    assert storage.delete_files(BUCKET, ["big", "missing"]) == {}
+    assert storage.list_files(BUCKET) == []
+
+
+def test_api_uses_local_backend(
+    client, auth_headers, test_project, storage, monkeypatch
+):
+    """Test STORAGE_BACKEND=local serves documents from disk."""
+    monkeypatch.setattr("app.core.config.settings.STORAGE_BACKEND", "local")
+    monkeypatch.setattr(
+        "app.core.config.settings.LOCAL_STORAGE_ROOT", str(storage.root)
+    )
+    monkeypatch.setattr(documents, "_s3_service", None)
+    assert isinstance(documents.get_s3_service(), LocalStorageService)
+
+    response = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("n.txt", io.BytesIO(b"on disk"), "text/plain"))],
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    doc_id = response.json()[0]["id"]
+    download = client.get(f"/document/{doc_id}", headers=auth_headers)
+    assert download.content == b"on disk"
+    assert "etag" in download.headers  # served by FileResponse
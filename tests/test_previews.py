@@ -0,0 +1,188 @@
+"""Tests for on-demand image previews."""
+
+import io
+import threading
+import time
+
+import boto3
+from PIL import Image
+
+from app.core.config import settings
+from app.services.local_storage import LocalStorageService
+from app.services.previews import (
+    PreviewService,
+    preview_key,
+    preview_sizes,
+    snap_size,
+)
+from app.services.s3_service_refactored import S3Service
+from app.services.storage_gc import drain_deletion_queue, enqueue_deletion
+
+
+def _jpeg(size=(1200, 900)):
+    buffer = io.BytesIO()
+    Image.linear_gradient("L").resize(size).convert("RGB").save(
+        buffer, format="JPEG"
+    )
+    return buffer.getvalue()
+
+
+def _service(tmp_path, **kwargs):
+    storage = LocalStorageService(str(tmp_path), fsync=False)
+    storage.upload_file(_jpeg(), "a.jpg", "image/jpeg", key="a.jpg")
+    options = {"workers": 2, "max_bytes": 1_000_000, **kwargs}
+    return PreviewService(storage, settings.S3_BUCKET_NAME, **options)
+
+
+def test_concurrent_misses_render_once(tmp_path):
+    """Test simultaneous requests for one preview share a single render."""
+    service = _service(tmp_path)
+    release = threading.Event()
+    open_stream = service.storage.open_stream
+
+    def slow_open(bucket, key):
+        release.wait(5)
+        return open_stream(bucket, key)
+
+    service.storage.open_stream = slow_open  # type: ignore[method-assign]
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                service.get("a.jpg", 120, 120, "JPEG")
+            )
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8 and len({id(r) for r in results}) == 1
+    assert service.stats()["renders"] == 1
+    assert Image.open(io.BytesIO(results[0].data)).size == (120, 90)
+
+
+def test_cache_tiers(tmp_path):
+    """Test the LRU stays bounded and storage serves evicted previews."""
+    service = _service(tmp_path)
+    first = service.get("a.jpg", 300, 300, "PNG")
+    service.max_bytes = len(first.data)
+    service.get("a.jpg", 64, 64, "PNG")
+    assert service.stats()["cached_bytes"] <= len(first.data)
+    assert service.storage.download_file(
+        settings.S3_BUCKET_NAME, preview_key("a.jpg", 300, 300, "PNG")
+    )
+
+    again = service.get("a.jpg", 300, 300, "PNG")
+    assert again.data == first.data
+    assert service.stats()["renders"] == 2
+
+
+def test_preview_endpoint(
+    client, auth_headers, test_project, ensure_s3_bucket
+):
+    """Test sizes, format negotiation and validation of the endpoint."""
+    upload = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[
+            ("files", ("photo.jpg", io.BytesIO(_jpeg()), "image/jpeg")),
+            ("files", ("notes.txt", io.BytesIO(b"text"), "text/plain")),
+        ],
+        headers=auth_headers,
+    )
+    photo, notes = (doc["id"] for doc in upload.json())
+
+    response = client.get(
+        f"/document/{photo}/preview?w=200&h=200", headers=auth_headers
+    )
+    assert response.headers["content-type"] == "image/jpeg"
+    # Rounded up to the 256 pixel preview size.
+    assert Image.open(io.BytesIO(response.content)).size == (256, 192)
+    assert len(response.content) < len(_jpeg())
+
+    response = client.get(
+        f"/document/{photo}/preview?w=200&h=200",
+        headers={**auth_headers, "Accept": "image/webp,*/*;q=0.8"},
+    )
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["vary"] == "Accept"
+    response = client.get(
+        f"/document/{photo}/preview?w=64&h=64&fmt=png", headers=auth_headers
+    )
+    assert response.headers["content-type"] == "image/png"
+
+    for url in (
+        f"/document/{notes}/preview",
+        f"/document/{photo}/preview?w=100000",
+    ):
+        assert client.get(url, headers=auth_headers).status_code == 400
+
+
+def test_sizes_snap_to_ladder(
+    client, auth_headers, test_project, ensure_s3_bucket, monkeypatch
+):
+    """Test nearby sizes share one stored preview."""
+    monkeypatch.setattr(
+        "app.core.config.settings.PREVIEW_MAX_DIMENSION", 600
+    )
+    assert preview_sizes(600) == (64, 128, 256, 512, 600)
+    assert [snap_size(n, 600) for n in (1, 64, 65, 513, 600)] == [
+        64,
+        64,
+        128,
+        600,
+        600,
+    ]
+    upload = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("photo.jpg", io.BytesIO(_jpeg()), "image/jpeg"))],
+        headers=auth_headers,
+    )
+    photo = upload.json()[0]
+    for size in (130, 200, 256):
+        response = client.get(
+            f"/document/{photo['id']}/preview?w={size}&h={size}&fmt=png",
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+    s3 = boto3.client("s3", region_name="us-east-1")
+    listed = s3.list_objects_v2(Bucket=ensure_s3_bucket, Prefix="previews/")
+    [stored] = [obj["Key"] for obj in listed["Contents"]]
+    assert stored.endswith("/256x256.png")
+
+
+def test_gc_deletes_stored_previews(tmp_path, db_session):
+    """Test collecting an object also removes its stored previews."""
+    service = _service(tmp_path)
+    service.get("a.jpg", 256, 256, "PNG")
+    service.get("a.jpg", 64, 128, "WEBP")
+    service.storage.upload_file(b"x", "b.jpg", "image/jpeg", key="b.jpg")
+    assert len(service.storage.list_files(settings.S3_BUCKET_NAME)) == 4
+
+    enqueue_deletion(db_session, "a.jpg")
+    db_session.commit()
+    assert drain_deletion_queue(db_session, service.storage) == 1
+    assert service.storage.list_files(settings.S3_BUCKET_NAME) == ["b.jpg"]
+
+
+def test_document_delete_drops_stored_previews(
+    client, auth_headers, test_project, db_session, ensure_s3_bucket
+):
+    """Test deleting a document removes its previews from S3 on GC."""
+    upload = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("photo.jpg", io.BytesIO(_jpeg()), "image/jpeg"))],
+        headers=auth_headers,
+    )
+    photo = upload.json()[0]["id"]
+    client.get(f"/document/{photo}/preview?fmt=webp", headers=auth_headers)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    assert s3.list_objects_v2(Bucket=ensure_s3_bucket)["KeyCount"] == 2
+
+    client.delete(f"/document/{photo}", headers=auth_headers)
+    drain_deletion_queue(db_session, S3Service())
+    assert s3.list_objects_v2(Bucket=ensure_s3_bucket)["KeyCount"] == 0
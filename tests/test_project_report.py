@@ -0,0 +1,104 @@
+"""Tests for project_report usage counters and quota enforcement."""
+
+import io
+
+from fastapi import status
+
+from app.models.document import Document
+from app.models.project_report import ProjectReport
+from app.services.project_report_service import (
+    adjust_usage,
+    reconcile_project_reports,
+)
+
+
+def _report(db_session, project_id):
+    db_session.expire_all()
+    return (
+        db_session.query(ProjectReport)
+        .filter(ProjectReport.project_id == project_id)
+        .one()
+    )
+
+
+def _text_files(*payloads):
+    return [
+        (f"file{i}.txt", data, "text/plain")
+        for i, data in enumerate(payloads)
+    ]
+
+
+def test_upload_increments_counters(
+    test_project, db_session, upload_documents
+):
+    """Test uploads add their sizes and count to the report."""
+    upload_documents(test_project["id"], *_text_files(b"abc", b"defgh"))
+    report = _report(db_session, test_project["id"])
+    assert report.document_count == 2
+    assert report.total_size == 8
+
+
+def test_update_and_delete_adjust_counters(
+    client, auth_headers, test_project, db_session, upload_documents
+):
+    """Test updates apply the size delta and deletes subtract."""
+    doc = upload_documents(test_project["id"], *_text_files(b"abc")).json()[
+        0
+    ]
+    file = ("file", ("new.txt", io.BytesIO(b"abcdefg"), "text/plain"))
+    client.put(f"/document/{doc['id']}", files=[file], headers=auth_headers)
+    report = _report(db_session, test_project["id"])
+    assert (report.document_count, report.total_size) == (1, 7)
+
+    client.delete(f"/document/{doc['id']}", headers=auth_headers)
+    report = _report(db_session, test_project["id"])
+    assert (report.document_count, report.total_size) == (0, 0)
+
+
+def test_quota_rejects_without_changing_counters(
+    test_project, db_session, monkeypatch, upload_documents
+):
+    """Test a rejected upload leaves the counters untouched."""
+    monkeypatch.setattr(
+        "app.core.config.settings.PROJECT_FILE_SIZE_LIMIT", 10
+    )
+    upload_documents(test_project["id"], *_text_files(b"x" * 6))
+    response = upload_documents(
+        test_project["id"],
+        *_text_files(b"x" * 5),
+        expect=status.HTTP_400_BAD_REQUEST,
+    )
+    assert "Current: 6 bytes" in response.text
+    assert _report(db_session, test_project["id"]).total_size == 6
+
+
+def test_adjust_usage_is_conditional(db_session, client, test_project):
+    """Test growing past the limit fails while shrinking always succeeds."""
+    project_id = test_project["id"]
+    assert adjust_usage(db_session, project_id, 60, 1, limit=100)
+    assert not adjust_usage(db_session, project_id, 41, 1, limit=100)
+    assert adjust_usage(db_session, project_id, 40, 1, limit=100)
+    assert adjust_usage(db_session, project_id, -30, -1, limit=50)
+    report = _report(db_session, project_id)
+    assert (report.document_count, report.total_size) == (1, 70)
+
+
+def test_reconcile_rebuilds_counters(db_session, client, test_project):
+    """Test reconcile recomputes drifted counters from documents."""
+    project_id = test_project["id"]
+    db_session.add_all(
+        [
+            Document(
+                filename="a.txt", s3_key="a", size=3, project_id=project_id
+            ),
+            Document(
+                filename="b.txt", s3_key="b", size=4, project_id=project_id
+            ),
+        ]
+    )
+    adjust_usage(db_session, project_id, 999, 9)
+    db_session.commit()
+
+    assert reconcile_project_reports(db_session, project_id) == 1
+    report = _report(db_session, project_id)
+    assert (report.document_count, report.total_size) == (2, 7)
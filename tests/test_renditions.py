@@ -0,0 +1,108 @@
+"""Tests for modern-format renditions and Accept-based selection."""
+
+import io
+
+from PIL import Image
+
+import lambda_function
+from app.core.config import settings
+from app.models.document import Document
+from app.services.image_pipeline import (
+    QualityTarget,
+    Rendition,
+    encode_tuned,
+    render_renditions,
+)
+from app.services.renditions import choose_rendition
+from app.services.s3_service_refactored import get_s3_client
+
+
+def _photo(size=(640, 480)):
+    image = Image.linear_gradient("L").resize(size)
+    image = Image.merge("RGB", (image, image.rotate(90).resize(size), image))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def test_quality_search_meets_targets():
+    """Test the search finds the cheapest quality for each kind of goal."""
+    image = Image.open(io.BytesIO(_photo()))
+    _, strict = encode_tuned(image, "WEBP", QualityTarget(min_psnr=45))
+    _, loose = encode_tuned(image, "WEBP", QualityTarget(min_psnr=30))
+    assert loose <= strict
+    data, quality = encode_tuned(
+        image, "WEBP", QualityTarget(min_psnr=None, max_bytes=4000)
+    )
+    assert len(data) <= 4000 and quality >= 30
+
+
+def test_variants_only_kept_when_smaller():
+    """Test variants follow their rendition and never outgrow it."""
+    rendered = render_renditions(
+        _photo(), [Rendition("medium", 320, 320, variants=("WEBP", "JPEG"))]
+    )
+    base, *variants = rendered
+    assert (base.format, base.variant) == ("JPEG", False)
+    assert all(v.format == "WEBP" for v in variants)
+    assert all(len(v.data) < len(base.data) for v in variants)
+
+
+def test_choose_rendition_by_accept():
+    """Test modern formats need an explicit Accept entry."""
+    entries = [
+        {"content_type": "image/jpeg", "bytes": 900, "variant": False},
+        {"content_type": "image/avif", "bytes": 300, "variant": True},
+        {"content_type": "image/webp", "bytes": 500, "variant": True},
+    ]
+
+    def chosen(accept):
+        return choose_rendition(entries, accept)["content_type"]
+
+    assert chosen("image/avif,image/webp,*/*;q=0.8") == "image/avif"
+    assert chosen("image/webp,image/*;q=0.8") == "image/webp"
+    assert chosen("image/avif;q=0,image/webp") == "image/webp"
+    assert chosen("image/*,*/*;q=0.5") == "image/jpeg"
+    assert chosen(None) == "image/jpeg"
+
+
+def test_rendition_endpoint_negotiates(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    ensure_s3_bucket,
+    monkeypatch,
+):
+    """Test the API serves the smallest stored rendition a client accepts."""
+    response = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("photo.jpg", io.BytesIO(_photo()), "image/jpeg"))],
+        headers=auth_headers,
+    )
+    doc_id = response.json()[0]["id"]
+    url = f"/document/{doc_id}/renditions/thumb"
+    assert client.get(url, headers=auth_headers).status_code == 404
+
+    monkeypatch.setenv("RENDITIONS", "thumb:200x200")
+    monkeypatch.setenv("RENDITION_FORMATS", "webp")
+    monkeypatch.setattr(lambda_function, "s3_client", get_s3_client())
+    key = db_session.get(Document, doc_id).s3_key
+    written = lambda_function.resize_image(settings.S3_BUCKET_NAME, key)
+    assert written == [f"resized/thumb/{key}", f"resized/thumb/{key}.webp"]
+
+    modern = client.get(
+        url, headers={**auth_headers, "Accept": "image/webp,*/*;q=0.8"}
+    )
+    legacy = client.get(url, headers={**auth_headers, "Accept": "*/*"})
+    assert legacy.headers["content-type"] == "image/jpeg"
+    assert modern.headers["vary"] == "Accept"
+    assert modern.headers["content-type"] == "image/webp"
+    assert len(modern.content) < len(legacy.content)
+    assert Image.open(io.BytesIO(modern.content)).size == (200, 150)
+    assert (
+        client.get(
+            f"/document/{doc_id}/renditions/huge", headers=auth_headers
+        ).status_code
+        == 404
+    )
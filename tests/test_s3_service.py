@@ -0,0 +1,68 @@
+"""Tests for the pooled S3 client."""
+
+import threading
+
+from app.core.config import settings
+from app.services.s3_service_refactored import (
+    S3Service,
+    get_s3_client,
+    reset_s3_client,
+)
+
+
+def test_client_is_shared_across_services(aws_mocks):
+    """Test every S3Service instance uses the same client."""
+    assert S3Service()._get_client() is S3Service()._get_client()
+    assert S3Service()._get_client() is get_s3_client()
+
+
+def test_client_created_once_under_concurrency(aws_mocks):
+    """Test concurrent first use builds a single client."""
+    reset_s3_client()
+    clients = []
+
+    def grab():
+        clients.append(get_s3_client())
+
+    threads = [threading.Thread(target=grab) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in clients}) == 1
+
+
+def test_client_uses_transport_settings(aws_mocks, monkeypatch):
+    """Test pool size, timeouts and retries come from settings."""
+    monkeypatch.setattr(settings, "S3_MAX_POOL_CONNECTIONS", 7)
+    monkeypatch.setattr(settings, "S3_CONNECT_TIMEOUT", 2.5)
+    monkeypatch.setattr(settings, "S3_RETRY_MODE", "adaptive")
+    reset_s3_client()
+    config = get_s3_client().meta.config
+    assert config.max_pool_connections == 7
+    assert config.connect_timeout == 2.5
+    assert config.retries["mode"] == "adaptive"
+    assert config.tcp_keepalive is True
+
+
+def test_reset_builds_new_client(aws_mocks):
+    """Test reset_s3_client drops the cached client."""
+    first = get_s3_client()
+    reset_s3_client()
+    assert get_s3_client() is not first
+
+
+def test_delete_files_chunks_requests(monkeypatch):
+    """Test multi-object deletes are split into 1000-key requests."""
+    calls = []
+
+    class FakeClient:
+        def delete_objects(self, Bucket, Delete):
+            calls.append(len(Delete["Objects"]))
+            return {"Errors": [{"Key": "k7", "Code": "AccessDenied"}]}
+
+    service = S3Service()
+    monkeypatch.setattr(service, "_get_client", lambda: FakeClient())
+    failed = service.delete_files("bucket", [f"k{i}" for i in range(2500)])
+    assert calls == [1000, 1000, 500]
+    assert list(failed) == ["k7"]
@@ -0,0 +1,206 @@
+"""Tests for full-text indexing and search."""
+
+import io
+import math
+
+import pytest
+
+from app.models.search_index import SearchDocument, SearchPosting
+from app.services import jobs, search_service
+from app.services.text_extraction import extract_text, tokenize
+
+
+def _search(client, auth_headers, project_id, **params):
+    return client.get(
+        f"/project/{project_id}/documents/search",
+        params=params,
+        headers=auth_headers,
+    )
+
+
+def test_tokenize_and_extract():
+    """Test extraction covers text-like types and tokens are normalized."""
+    assert list(tokenize("Hello, WORLD a x42")) == ["hello", "world", "x42"]
+    assert extract_text(b'{"k": "v"}', "application/json") == '{"k": "v"}'
+    assert extract_text(b"a,b", "application/octet-stream", "t.csv") == "a,b"
+    assert extract_text(b"\x89PNG", "image/png", "x.png") is None
+
+
+def test_search_ranks_indexed_documents(
+    client, auth_headers, test_project, db_session, upload_documents
+):
+    """Test documents are indexed by the job queue and ranked by BM25."""
+    project_id = test_project["id"]
+    strong = upload_documents(
+        project_id,
+        (
+            "notes.md",
+            b"# Budget\nbudget review budget forecast",
+            "text/markdown",
+        ),
+    ).json()[0]
+    weak = upload_documents(
+        project_id,
+        (
+            "data.csv",
+            b"item,budget\nchairs,10\ntables,20\nlamps,30",
+            "text/csv",
+        ),
+    ).json()[0]
+    upload_documents(project_id, ("photo.png", b"budget", "image/png"))
+    # Nothing is searchable until the background jobs have run.
+    assert _search(client, auth_headers, project_id, q="budget").json() == {
+        "total": 0,
+        "results": [],
+    }
+
+    jobs.run_pending(db_session)
+    body = _search(client, auth_headers, project_id, q="Budget").json()
+    assert body["total"] == 2
+    assert [hit["document"]["id"] for hit in body["results"]] == [
+        strong["id"],
+        weak["id"],
+    ]
+    assert body["results"][0]["score"] > body["results"][1]["score"]
+
+    page = _search(
+        client, auth_headers, project_id, q="budget", limit=1, offset=1
+    ).json()
+    assert page["total"] == 2
+    assert [hit["document"]["id"] for hit in page["results"]] == [weak["id"]]
+
+
+def test_sql_scores_match_bm25(
+    client, auth_headers, test_project, db_session, upload_documents
+):
+    """Test the SQL-side scores equal BM25 computed from the postings."""
+    project_id = test_project["id"]
+    contents = [b"alpha beta beta", b"alpha gamma", b"beta " * 8, b"delta"]
+    for i, content in enumerate(contents):
+        upload_documents(project_id, (f"{i}.txt", content, "text/plain"))
+    jobs.run_pending(db_session)
+
+    lengths = {
+        row.document_id: row.term_count
+        for row in db_session.query(SearchDocument)
+    }
+    postings = db_session.query(SearchPosting).filter(
+        SearchPosting.term.in_(["alpha", "beta"])
+    )
+    df = {"alpha": 2, "beta": 2}
+    avg = sum(lengths.values()) / len(lengths)
+    expected = {}
+    for posting in postings:
+        idf = math.log(1 + (len(lengths) - df[posting.term] + 0.5) / 2.5)
+        norm = search_service.BM25_K1 * (
+            1
+            - search_service.BM25_B
+            + search_service.BM25_B * lengths[posting.document_id] / avg
+        )
+        expected[posting.document_id] = expected.get(
+            posting.document_id, 0.0
+        ) + idf * posting.frequency * (search_service.BM25_K1 + 1) / (
+            posting.frequency + norm
+        )
+
+    body = _search(client, auth_headers, project_id, q="alpha beta").json()
+    assert body["total"] == 3
+    scores = {hit["document"]["id"]: hit["score"] for hit in body["results"]}
+    assert scores == pytest.approx(expected)
+    assert list(scores.values()) == sorted(scores.values(), reverse=True)
+
+
+def test_reindex_and_delete_keep_index_current(
+    client, auth_headers, test_project, db_session, upload_documents
+):
+    """Test updates re-index the document and deletes drop its postings."""
+    project_id = test_project["id"]
+    doc = upload_documents(
+        project_id, ("a.txt", b"alpha", "text/plain")
+    ).json()[0]
+    jobs.run_pending(db_session)
+    # Re-running the job for unchanged content is a no-op.
+    jobs.enqueue(db_session, "document.index", {"document_id": doc["id"]})
+    db_session.commit()
+    jobs.run_pending(db_session)
+
+    response = client.put(
+        f"/document/{doc['id']}",
+        files={"file": ("a.txt", io.BytesIO(b"omega"), "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    jobs.run_pending(db_session)
+    assert (
+        _search(client, auth_headers, project_id, q="alpha").json()["total"]
+        == 0
+    )
+    assert (
+        _search(client, auth_headers, project_id, q="omega").json()["total"]
+        == 1
+    )
+
+    client.delete(f"/document/{doc['id']}", headers=auth_headers)
+    assert db_session.query(SearchPosting).count() == 0
+    assert db_session.query(SearchDocument).count() == 0
+
+
+def test_update_to_unindexable_content_drops_postings(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    upload_documents,
+    monkeypatch,
+):
+    """Test old postings go when new content is binary or oversized."""
+    project_id = test_project["id"]
+    doc = upload_documents(
+        project_id, ("a.txt", b"alpha", "text/plain")
+    ).json()[0]
+    jobs.run_pending(db_session)
+
+    def replace(name, content, content_type):
+        response = client.put(
+            f"/document/{doc['id']}",
+            files={"file": (name, io.BytesIO(content), content_type)},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        jobs.run_pending(db_session)
+        return _search(client, auth_headers, project_id, q="alpha")
+
+    assert replace("a.png", b"\x89PNG", "image/png").json()["total"] == 0
+    assert db_session.query(SearchDocument).count() == 0
+
+    replace("a.txt", b"alpha again", "text/plain")
+    assert db_session.query(SearchDocument).count() == 1
+    monkeypatch.setattr(
+        "app.core.config.settings.SEARCH_MAX_DOCUMENT_BYTES", 4
+    )
+    assert replace("a.txt", b"alpha beta", "text/plain").json()["total"] == 0
+    assert db_session.query(SearchPosting).count() == 0
+    assert db_session.query(SearchDocument).count() == 0
+
+
+def test_search_requires_membership(client, auth_headers, test_project):
+    """Test users outside the project cannot search it."""
+    client.post(
+        "/auth",
+        json={
+            "login": "outsider",
+            "email": "outsider@example.com",
+            "password": "outsider123",
+            "repeat_password": "outsider123",
+        },
+    )
+    token = client.post(
+        "/login", json={"login": "outsider", "password": "outsider123"}
+    ).json()["access_token"]
+    response = _search(
+        client,
+        {"Authorization": f"Bearer {token}"},
+        test_project["id"],
+        q="anything",
+    )
+    assert response.status_code == 403
@@ -0,0 +1,98 @@
+"""Tests for compression of documents at rest."""
+
+import io
+
+import boto3
+import pytest
+from fastapi import status
+
+from app.models.document import Document
+from app.services import storage_codec
+
+CSV = b"id,name,amount\n" + b"".join(
+    f"{i},row-{i},{i * 3}\n".encode() for i in range(500)
+)
+
+
+@pytest.fixture
+def gzip_at_rest(monkeypatch):
+    monkeypatch.setattr(
+        "app.core.config.settings.STORAGE_COMPRESSION", "gzip"
+    )
+
+
+def test_encode_skips_incompressible_types(gzip_at_rest):
+    """Test binary types and small files are stored unchanged."""
+    assert storage_codec.encode(CSV, "image/png") == (CSV, None)
+    assert storage_codec.encode(b"tiny", "text/plain") == (b"tiny", None)
+
+
+def test_encode_requires_worthwhile_ratio(gzip_at_rest):
+    """Test content that does not shrink enough stays uncompressed."""
+    import os
+
+    noise = os.urandom(4096)
+    assert storage_codec.encode(noise, "text/plain") == (noise, None)
+
+
+def test_roundtrip_zstd(monkeypatch):
+    """Test zstd output decodes back to the original bytes."""
+    pytest.importorskip("zstandard")
+    monkeypatch.setattr(
+        "app.core.config.settings.STORAGE_COMPRESSION", "zstd"
+    )
+    stored, encoding = storage_codec.encode(CSV, "text/csv")
+    assert encoding == "zstd"
+    assert len(stored) < len(CSV)
+    assert storage_codec.decode(stored, encoding) == CSV
+    stream = storage_codec.open_decoded(io.BytesIO(stored), encoding)
+    assert stream.read() == CSV
+
+
+def test_accepts_encoding():
+    """Test Accept-Encoding parsing honours q-values and wildcards."""
+    assert storage_codec.accepts_encoding("gzip, deflate", "gzip")
+    assert storage_codec.accepts_encoding("*", "zstd")
+    assert not storage_codec.accepts_encoding("gzip;q=0", "gzip")
+    assert not storage_codec.accepts_encoding("br", "gzip")
+    assert not storage_codec.accepts_encoding(None, "gzip")
+
+
+def test_upload_stores_compressed_and_downloads(
+    client,
+    auth_headers,
+    test_project,
+    db_session,
+    ensure_s3_bucket,
+    gzip_at_rest,
+):
+    """Test compressed storage is transparent to both kinds of client."""
+    response = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("data.csv", io.BytesIO(CSV), "text/csv"))],
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    doc = response.json()[0]
+    assert doc["size"] == len(CSV)
+
+    row = db_session.query(Document).filter_by(id=doc["id"]).one()
+    assert row.content_encoding == "gzip"
+    obj = boto3.client("s3", region_name="us-east-1").get_object(
+        Bucket=ensure_s3_bucket, Key=row.s3_key
+    )
+    assert len(obj["Body"].read()) < len(CSV)
+
+    encoded = client.get(
+        f"/document/{doc['id']}",
+        headers={**auth_headers, "Accept-Encoding": "gzip"},
+    )
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.content == CSV  # httpx decodes transparently
+
+    raw = client.get(
+        f"/document/{doc['id']}",
+        headers={**auth_headers, "Accept-Encoding": "identity"},
+    )
+    assert "content-encoding" not in raw.headers
+    assert raw.content == CSV
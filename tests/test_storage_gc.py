@@ -0,0 +1,137 @@
+"""Tests for versioned document updates and storage garbage collection."""
+
+import io
+from datetime import timedelta
+
+import boto3
+from fastapi import status
+
+from app.models.document import Document
+from app.models.storage_deletion import StorageDeletion
+from app.services.document_store import StoredContent, replace_content
+from app.services.s3_service_refactored import S3Service
+from app.services.storage_gc import (
+    _utcnow,
+    drain_deletion_queue,
+    enqueue_deletion,
+)
+
+
+def _keys(bucket):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    return {
+        obj["Key"]
+        for obj in s3.list_objects_v2(Bucket=bucket).get("Contents", [])
+    }
+
+
+def test_update_queues_old_object(
+    client, auth_headers, test_document, db_session, ensure_s3_bucket
+):
+    """Test an update swaps the key and defers deleting the old object."""
+    old_key = (
+        db_session.query(Document.s3_key)
+        .filter(Document.id == test_document["id"])
+        .scalar()
+    )
+    file = ("file", ("v2.txt", io.BytesIO(b"version two"), "text/plain"))
+    response = client.put(
+        f"/document/{test_document['id']}",
+        files=[file],
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["version"] == 2
+
+    queued = [row.s3_key for row in db_session.query(StorageDeletion)]
+    assert queued == [old_key]
+    assert old_key in _keys(ensure_s3_bucket)
+
+    assert drain_deletion_queue(db_session, S3Service()) == 1
+    assert old_key not in _keys(ensure_s3_bucket)
+    assert db_session.query(StorageDeletion).count() == 0
+    download = client.get(
+        f"/document/{test_document['id']}", headers=auth_headers
+    )
+    assert download.content == b"version two"
+
+
+def test_stale_version_does_not_swap(client, test_document, db_session):
+    """Test a swap based on an outdated version is refused."""
+    document = db_session.get(Document, test_document["id"])
+    db_session.query(Document).filter(Document.id == document.id).update(
+        {Document.version: Document.version + 1},
+        synchronize_session=False,
+    )
+    stored = StoredContent(s3_key="other", size=1)
+    assert not replace_content(
+        db_session, document, stored, "x.txt", "text/plain"
+    )
+    assert db_session.query(StorageDeletion).count() == 0
+
+
+def test_gc_skips_referenced_keys(
+    client, test_document, db_session, ensure_s3_bucket
+):
+    """Test keys that are referenced again are dropped, not deleted."""
+    live_key = (
+        db_session.query(Document.s3_key)
+        .filter(Document.id == test_document["id"])
+        .scalar()
+    )
+    enqueue_deletion(db_session, live_key)
+    db_session.commit()
+
+    assert drain_deletion_queue(db_session, S3Service()) == 1
+    assert live_key in _keys(ensure_s3_bucket)
+    assert db_session.query(StorageDeletion).count() == 0
+
+
+class FailingStorage:
+    """Storage whose deletes fail for the given keys."""
+
+    def __init__(self, failing):
+        self.failing = set(failing)
+        self.deleted = []
+
+    def delete_files(self, bucket, keys):
+        self.deleted.extend(key for key in keys if key not in self.failing)
+        return {key: "AccessDenied" for key in keys if key in self.failing}
+
+
+def test_failed_deletes_back_off_and_give_up(db_session, monkeypatch):
+    """Test a failing key is rescheduled, skipped, then left as dead letter."""
+    monkeypatch.setattr(
+        "app.core.config.settings.STORAGE_GC_MAX_ATTEMPTS", 2
+    )
+    for key in ("stuck", "a", "b"):
+        enqueue_deletion(db_session, key)
+    db_session.commit()
+    storage = FailingStorage({"stuck"})
+
+    assert drain_deletion_queue(db_session, storage, batch_size=1) == 0
+    stuck = (
+        db_session.query(StorageDeletion)
+        .filter(StorageDeletion.s3_key == "stuck")
+        .one()
+    )
+    assert (stuck.attempts, stuck.last_error) == (1, "AccessDenied")
+    assert stuck.next_attempt_at > _utcnow()
+
+    # The backed-off row no longer blocks the head of the queue.
+    assert drain_deletion_queue(db_session, storage, batch_size=1) == 1
+    assert drain_deletion_queue(db_session, storage, batch_size=1) == 1
+    assert [
+        key for key in storage.deleted if not key.startswith("previews/")
+    ] == ["a", "b"]
+
+    stuck.next_attempt_at = _utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    assert drain_deletion_queue(db_session, storage) == 0
+    assert stuck.attempts == 2
+    # Out of attempts: kept as a dead letter but never claimed again.
+    stuck.next_attempt_at = _utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    assert drain_deletion_queue(db_session, storage) == 0
+    assert stuck.attempts == 2
+    assert db_session.query(StorageDeletion).count() == 1
@@ -0,0 +1,140 @@
+"""Tests for the ASGI upload size guard."""
+
+import asyncio
+import io
+
+import pytest
+from fastapi import status
+
+from app.core.upload_guard import MULTIPART_OVERHEAD, UploadSizeGuard
+from app.models.document import Document
+from app.services.project_report_service import adjust_usage
+
+
+def test_content_length_over_cap_is_rejected(
+    client, auth_headers, test_project, db_session, monkeypatch
+):
+    """Test a declared body larger than the request cap gets 413."""
+    monkeypatch.setattr(
+        "app.core.config.settings.PROJECT_FILE_SIZE_LIMIT", 1000
+    )
+    payload = b"x" * (1000 + MULTIPART_OVERHEAD + 1)
+    response = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("big.bin", io.BytesIO(payload), "text/plain"))],
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert response.json() == {"detail": "Upload too large."}
+    assert db_session.query(Document).count() == 0
+
+
+def test_unauthenticated_upload_is_left_to_auth(
+    client, test_project, monkeypatch
+):
+    """Test the guard does not look up quotas for anonymous requests."""
+    monkeypatch.setattr(
+        "app.services.project_report_service.get_usage",
+        lambda *args: pytest.fail("quota queried before authentication"),
+    )
+    response = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("a.txt", io.BytesIO(b"x"), "text/plain"))],
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_over_quota_body_is_cut_off_before_handler(
+    client, auth_headers, test_project, db_session, monkeypatch
+):
+    """Test a member's body over the remaining quota never reaches the app."""
+    monkeypatch.setattr(
+        "app.core.config.settings.UPLOAD_MAX_REQUEST_BYTES", 10_000_000
+    )
+    monkeypatch.setattr(
+        "app.core.config.settings.PROJECT_FILE_SIZE_LIMIT", 200_000
+    )
+    assert adjust_usage(db_session, test_project["id"], 190_000, 1)
+    db_session.commit()
+    monkeypatch.setattr(
+        "app.api.documents.store_content",
+        lambda *args, **kwargs: pytest.fail("handler ran"),
+    )
+    payload = b"x" * (10_000 + MULTIPART_OVERHEAD + 1)
+    response = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("big.bin", io.BytesIO(payload), "text/plain"))],
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert response.json() == {"detail": "Upload too large."}
+
+
+def test_invalid_token_gets_only_global_cap(
+    client, test_project, monkeypatch
+):
+    """Test a bad bearer token is not used to look up the project quota."""
+    monkeypatch.setattr(
+        "app.services.project_report_service.get_usage",
+        lambda *args: pytest.fail("quota queried for an invalid token"),
+    )
+    response = client.post(
+        f"/project/{test_project['id']}/documents",
+        files=[("files", ("a.txt", io.BytesIO(b"x"), "text/plain"))],
+        headers={"Authorization": "Bearer not-a-token"},
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_global_cap_applies_to_updates(
+    client, auth_headers, test_document, monkeypatch
+):
+    """Test the global request cap also guards document replacement."""
+    monkeypatch.setattr(
+        "app.core.config.settings.UPLOAD_MAX_REQUEST_BYTES", 500
+    )
+    response = client.put(
+        f"/document/{test_document['id']}",
+        files={"file": ("a.txt", io.BytesIO(b"y" * 1000), "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+def test_chunked_body_is_cut_off(monkeypatch):
+    """Test a body without Content-Length is aborted once over the cap."""
+    monkeypatch.setattr(
+        "app.core.config.settings.UPLOAD_MAX_REQUEST_BYTES", 10
+    )
+    chunks = [b"a" * 6, b"b" * 6, b"c" * 6]
+    consumed = []
+    sent = []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            consumed.append(message["body"])
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 201})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        body = chunks.pop(0)
+        return {"type": "http.request", "body": body, "more_body": True}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/project/1/documents",
+        "headers": [],
+    }
+    asyncio.run(UploadSizeGuard(app)(scope, receive, send))
+
+    assert consumed == [b"a" * 6]
+    assert chunks == [b"c" * 6]
+    assert sent[0]["status"] == 413
+    assert len(sent) == 2
@@ -0,0 +1,157 @@
+"""Tests for resumable chunked uploads."""
+
+from datetime import timedelta
+
+import pytest
+
+from app.models.job import Job
+from app.models.upload_session import UploadPart, UploadSession, _utcnow
+from app.services.s3_service_refactored import S3Service
+from app.services.upload_sessions import expire_sessions
+
+PART_SIZE = 1024
+
+
+@pytest.fixture(autouse=True)
+def small_parts(monkeypatch):
+    monkeypatch.setattr(
+        "app.core.config.settings.UPLOAD_PART_SIZE", PART_SIZE
+    )
+    monkeypatch.setattr("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", PART_SIZE)
+
+
+def _create(client, auth_headers, project_id, size):
+    response = client.post(
+        f"/project/{project_id}/uploads",
+        json={
+            "filename": "big.bin",
+            "content_type": "text/plain",
+            "size": size,
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def _patch(client, auth_headers, session_id, offset, body):
+    return client.patch(
+        f"/uploads/{session_id}",
+        content=body,
+        headers={
+            **auth_headers,
+            "Upload-Offset": str(offset),
+            "Content-Type": "application/offset+octet-stream",
+        },
+    )
+
+
+def test_resumable_upload_round_trip(
+    client, auth_headers, test_project, db_session, ensure_s3_bucket
+):
+    """Test chunks are appended, resumed from HEAD and finalized."""
+    data = bytes(range(256)) * 10  # 2560 bytes: parts of 1024, 1024, 512
+    session = _create(client, auth_headers, test_project["id"], len(data))
+    assert session["part_size"] == PART_SIZE
+    assert session["offset"] == 0
+
+    first = _patch(client, auth_headers, session["id"], 0, data[:1024])
+    assert first.status_code == 204
+    # A retried chunk with a stale offset is refused with the current one.
+    stale = _patch(client, auth_headers, session["id"], 0, data[:1024])
+    assert stale.status_code == 409
+    assert stale.headers["Upload-Offset"] == "1024"
+
+    head = client.head(f"/uploads/{session['id']}", headers=auth_headers)
+    offset = int(head.headers["Upload-Offset"])
+    assert offset == 1024
+    # Short non-final chunks would break the part mapping.
+    short = _patch(client, auth_headers, session["id"], offset, b"x" * 10)
+    assert short.status_code == 400
+    for start in (1024, 2048):
+        end = start + PART_SIZE
+        response = _patch(
+            client, auth_headers, session["id"], start, data[start:end]
+        )
+        assert response.status_code == 204
+
+    response = client.post(
+        f"/uploads/{session['id']}/complete", headers=auth_headers
+    )
+    assert response.status_code == 201
+    document = response.json()
+    assert document["size"] == len(data)
+    download = client.get(
+        f"/document/{document['id']}", headers=auth_headers
+    )
+    assert download.content == data
+    assert db_session.query(UploadSession).count() == 0
+    assert db_session.query(UploadPart).count() == 0
+
+
+def test_complete_requires_all_bytes(
+    client, auth_headers, test_project, ensure_s3_bucket
+):
+    """Test an upload cannot be finalized before the last byte arrives."""
+    session = _create(client, auth_headers, test_project["id"], 2000)
+    response = client.post(
+        f"/uploads/{session['id']}/complete", headers=auth_headers
+    )
+    assert response.status_code == 409
+
+
+def test_declared_size_over_quota_is_rejected(
+    client, auth_headers, test_project, monkeypatch, ensure_s3_bucket
+):
+    """Test sessions larger than the remaining quota are refused upfront."""
+    monkeypatch.setattr(
+        "app.core.config.settings.PROJECT_FILE_SIZE_LIMIT", 100
+    )
+    response = client.post(
+        f"/project/{test_project['id']}/uploads",
+        json={"filename": "big.bin", "size": 101},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_expired_sessions_are_aborted(
+    client, auth_headers, test_project, db_session, ensure_s3_bucket
+):
+    """Test stale sessions disappear and their multipart upload is aborted."""
+    session = _create(client, auth_headers, test_project["id"], 2048)
+    _patch(client, auth_headers, session["id"], 0, b"a" * PART_SIZE)
+    assert (
+        db_session.query(Job).filter(Job.kind == "uploads.expire").count()
+        == 1
+    )
+    row = db_session.get(UploadSession, session["id"])
+    row.expires_at = _utcnow() - timedelta(seconds=1)
+    db_session.commit()
+
+    response = client.get(f"/uploads/{session['id']}", headers=auth_headers)
+    assert response.status_code == 404
+    assert expire_sessions(db_session, S3Service()) == 1
+    assert db_session.query(UploadSession).count() == 0
+    assert db_session.query(UploadPart).count() == 0
+    s3 = S3Service()._get_client()
+    uploads = s3.list_multipart_uploads(Bucket=ensure_s3_bucket)
+    assert uploads.get("Uploads", []) == []
+
+
+def test_project_delete_aborts_open_uploads(
+    client, auth_headers, test_project, db_session, ensure_s3_bucket
+):
+    """Test deleting a project drops its sessions and multipart uploads."""
+    session = _create(client, auth_headers, test_project["id"], 2048)
+    _patch(client, auth_headers, session["id"], 0, b"a" * PART_SIZE)
+
+    response = client.delete(
+        f"/project/{test_project['id']}", headers=auth_headers
+    )
+    assert response.status_code == 204
+    assert db_session.query(UploadSession).count() == 0
+    assert db_session.query(UploadPart).count() == 0
+    s3 = S3Service()._get_client()
+    uploads = s3.list_multipart_uploads(Bucket=ensure_s3_bucket)
+    assert uploads.get("Uploads", []) == []
@@ -0,0 +1,70 @@
+"""Tests for streamed project ZIP export."""
+
+import io
+import zipfile
+
+from fastapi import status
+
+from app.services.zip_export import ArchiveEntry, stream_zip, unique_names
+
+
+def test_unique_names():
+    """Test duplicate and path-like names become safe, distinct members."""
+    names = list(unique_names(["a.txt", "a.txt", "../b.txt", "c/d.txt"]))
+    assert names == ["a.txt", "a (1).txt", "_b.txt", "c_d.txt"]
+
+
+def test_stream_zip_yields_incrementally():
+    """Test the archive is emitted in pieces and round-trips."""
+    blobs = {f"k{i}": bytes([i]) * 200_000 for i in range(5)}
+    entries = [
+        ArchiveEntry(name=f"f{i}.bin", s3_key=f"k{i}") for i in range(5)
+    ]
+    chunks = list(
+        stream_zip(
+            entries,
+            lambda entry: io.BytesIO(blobs[entry.s3_key]),
+            read_ahead=2,
+            chunk_size=16_384,
+        )
+    )
+    assert len(chunks) > len(entries)
+    assert max(len(chunk) for chunk in chunks) < 100_000
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    for i in range(5):
+        assert archive.read(f"f{i}.bin") == blobs[f"k{i}"]
+
+
+def test_project_archive_endpoint(
+    client, auth_headers, test_project, ensure_s3_bucket
+):
+    """Test the endpoint streams every project document into a ZIP."""
+    files = [
+        ("files", ("notes.txt", io.BytesIO(b"hello"), "text/plain")),
+        ("files", ("notes.txt", io.BytesIO(b"again"), "text/plain")),
+        ("files", ("logo.png", io.BytesIO(b"\x89PNG"), "image/png")),
+    ]
+    client.post(
+        f"/project/{test_project['id']}/documents",
+        files=files,
+        headers=auth_headers,
+    )
+    response = client.get(
+        f"/project/{test_project['id']}/documents/archive",
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.read("notes.txt") == b"hello"
+    assert archive.read("notes (1).txt") == b"again"
+    assert archive.getinfo("logo.png").compress_type == zipfile.ZIP_STORED
+
+
+def test_project_archive_requires_access(client, auth_headers):
+    """Test non-members cannot export a project."""
+    response = client.get(
+        "/project/99999/documents/archive", headers=auth_headers
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN